@@ -1,7 +1,7 @@
-import os
 from dotenv import load_dotenv
-from langchain_community.vectorstores import FAISS
 from langchain_openai import AzureOpenAIEmbeddings
+from faiss_storage import has_vector_db, load_vector_db
+from lexical_index import HybridRetriever, load_lexical_index
 
 def main():
     """
@@ -19,7 +19,7 @@ def main():
     # --- 2. 벡터 DB 로드 ---
 
     # DB 폴더가 존재하는지 확인
-    if not os.path.exists(DB_PATH):
+    if not has_vector_db(DB_PATH):
         print(f"오류: 벡터 DB 폴더 '{DB_PATH}'를 찾을 수 없습니다.")
         print("DB 생성 스크립트를 먼저 실행해주세요.")
         return
@@ -29,11 +29,7 @@ def main():
         embeddings = AzureOpenAIEmbeddings(model="text-embedding-3-small")
 
         print(f"'{DB_PATH}' 폴더에서 벡터스토어를 로드합니다...")
-        loaded_vectorstore = FAISS.load_local(
-            DB_PATH,
-            embeddings=embeddings,
-            allow_dangerous_deserialization=True  # 로컬 DB 로드 시 필요
-        )
+        loaded_vectorstore = load_vector_db(DB_PATH, embeddings)
         print("로드 완료.")
 
     except Exception as e:
@@ -42,10 +38,15 @@ def main():
 
     # --- 3. 유사도 검색 실행 ---
 
-    print(f"\n--- \"{query}\"(으)로 유사도 검색을 시작합니다. ---")
-    
     # k: 검색 결과 개수
-    results = loaded_vectorstore.similarity_search(query, k=3)
+    lexical_index = load_lexical_index(DB_PATH)
+    if lexical_index is not None:
+        # 어휘 색인이 있으면 BM25 + 벡터 하이브리드 검색을 사용합니다 ("SQL" 같은 키워드는 임베딩 호출 없이 처리).
+        print(f"\n--- \"{query}\"(으)로 하이브리드 검색을 시작합니다. ---")
+        results = HybridRetriever(vectorstore=loaded_vectorstore, lexical_index=lexical_index, k=3).invoke(query)
+    else:
+        print(f"\n--- \"{query}\"(으)로 유사도 검색을 시작합니다. ---")
+        results = loaded_vectorstore.similarity_search(query, k=3)
 
     if not results:
         print(" -> 유사한 내용을 찾을 수 없습니다.")
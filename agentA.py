@@ -1,8 +1,8 @@
 import os
 import re
-from typing import Optional
 import time
-from urllib.parse import urljoin
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
 from dotenv import load_dotenv
 from langchain_openai import AzureChatOpenAI
 from langchain.agents import AgentExecutor, create_openai_tools_agent
@@ -10,21 +10,99 @@ from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain.tools import tool
 from langchain_community.utilities import WikipediaAPIWrapper
 from langchain_community.tools import WikipediaQueryRun, DuckDuckGoSearchRun
-from selenium import webdriver
-from bs4 import BeautifulSoup
-import requests
-import fitz
+from content_extraction import LineDeduplicator
+from web_scraper import fetch_pdf_attachments, scrape_page
+from resource_registry import get_registry
+from report_cache import replace_sections
+from context_gathering import gather_contexts
+from research_budget import ResearchBudget, ToolCallMemo
 
 load_dotenv()
 
+MAX_SCRAPED_CHARS = 20000
+# 저장된 회사 단위 섹션이 있을 때 건너뛸 수 있는 SOP 단계
+SECTION_STEPS = {"1.1": "Step 1.1", "3.1": "Step 2.1", "3.2": "Step 2.2, Step 2.3"}
+REUSED_SECTION_PLACEHOLDER = "(저장된 분석 재사용)"
+
+# 파이프라인 방식: 조사별 제한 시간(초), 검색 결과 수, 합성 프롬프트에 넣는 조사별 최대 글자 수
+PIPELINE_LOOKUP_TIMEOUT = 90
+PIPELINE_SEARCH_RESULTS = 5
+PIPELINE_SOURCE_CHARS = 8000
+
+REPORT_FORMAT = """
+        **최종 결과물 형식:**
+        ### [회사명] 및 관련 산업 심층 분석 보고서 ([희망 직무] 관점)
+        ## 1. 기업 분석 (Company Analysis)
+        ### 1.1. 기업 개요 (Source: Wikipedia/Homepage)
+        ```text
+        (위키피디아, 공식 홈페이지 등에서 수집한 기업의 비전, 연혁, 주요 사업, 가치, 인재상 등 상세 정보)
+        ```
+        ### 1.2. 기술 및 개발 문화 (Source: Tech Blog/Job Posting)
+        ```text
+        (기술 블로그, 채용 공고 PDF 등에서 수집한 기술 스택, 인프라, 개발 문화, 협업 방식 관련 내용)
+        ```
+        ## 2. 채용 포지션 분석 (Position Analysis)
+        ### 2.1. 공식 채용 공고 (Source: Job Posting URL)
+        ```text
+        (URL이 제공된 경우, 해당 공고 및 첨부 PDF에서 수집한 직무, 책임, 자격 요건, 우대 사항 등 모든 정보)
+        ```
+        ### 2.2. 일반적인 직무 기술서 (Source: Web Search)
+        ```text
+        (웹에서 검색한 해당 직무의 일반적인 역할, 책임, 필요 역량(JD)에 대한 정보)
+        ```
+        ## 3. 시장 및 산업 분석 (Market & Industry Analysis)
+        ### 3.1. 주요 경쟁사 및 시장 내 위치 (Source: Web Search)
+        - **경쟁사 목록**: [조사된 주요 경쟁사 2~3곳 나열]
+        - **경쟁사별 특징 및 비교 분석**: 
+        ```text
+        (각 경쟁사에 대해 수집한 정보 및 타겟 기업과의 비교 분석 내용)
+        ```
+        ### 3.2. 관련 산업 최신 동향 및 전망 (Source: Web Search/Reports)
+        ```text
+        (수집한 산업 동향, 최신 기술, 시장 전망, 증권사 리포트 등 상세 정보)
+        ```
+        ### 참고 자료
+        - [출처 1]: (정보 수집에 사용된 모든 URL 주소)
+        - [출처 2]: (정보 수집에 사용된 모든 URL 주소)
+        - ...
+        """
+
+SYNTHESIS_PROMPT = """
+        당신은 AI 시장 분석 전문가입니다. 아래 [수집 자료]는 표준 조사 절차(위키피디아 개요, 공식 홈페이지, 채용 공고, 기술 블로그, 직무 기술서, 경쟁사, 산업 동향, 분석 보고서)에 따라 미리 수집된 것입니다.
+        수집 자료만을 근거로 "최종 결과물 형식"에 맞춰 상세 보고서를 작성한다. 요약은 최소화하고 원본에 가까운 상세한 정보를 제공하며, 자료에 없는 내용은 지어내지 말고 '수집된 정보 없음'이라고 적는다.
+        참고 자료에는 수집 자료에 나온 URL을 모두 적는다.
+        이미 확보된 섹션: {known_sections}
+        (이미 확보된 섹션이 '없음'이 아니라면, 보고서의 그 섹션 본문에는 `{reused_placeholder}`라고만 적는다.)
+        ---
+        """ + REPORT_FORMAT
+
+class CachedWikipediaAPIWrapper(WikipediaAPIWrapper):
+    """조회 결과를 HTTP 캐시의 텍스트 저장소에 WIKIPEDIA_CACHE_SECONDS(기본 7일) 동안 보관합니다."""
+    def run(self, query: str) -> str:
+        http_cache = get_registry().get_http_cache()
+        if http_cache is None:
+            return super().run(query)
+        key = f"wikipedia://{self.lang}/{query.strip()}"
+        extractor = f"summary:{self.top_k_results}:{self.doc_content_chars_max}"
+        max_age = float(os.getenv("WIKIPEDIA_CACHE_SECONDS", 7 * 24 * 3600))
+        cached = http_cache.get_text(key, extractor, max_age=max_age)
+        if cached is not None:
+            print(f">>> 저장된 위키피디아 조회 결과를 사용합니다: {query}")
+            return cached
+        result = super().run(query)
+        if result and not result.startswith("No good Wikipedia Search Result"):
+            http_cache.put_text(key, extractor, result)
+        return result
+
 def initialize_llm_and_tools():
     """LLM과 도구들을 초기화하고 튜플 형태로 반환합니다."""
     deployment_name = os.getenv("AZURE_OPENAI_CHAT_DEPLOYMENT_NAME")
     if not deployment_name:
         raise ValueError("AZURE_OPENAI_CHAT_DEPLOYMENT_NAME 환경 변수를 .env 파일에 설정해주세요.")
-    llm = AzureChatOpenAI(azure_deployment=deployment_name, temperature=0.3, max_tokens=4000)
+    # 에이전트는 LLM을 스트리밍으로 호출하므로, 토큰 예산 확인에 쓸 사용량을 스트림에 포함하도록 요청합니다.
+    llm = AzureChatOpenAI(azure_deployment=deployment_name, temperature=0.3, max_tokens=4000, stream_usage=True)
     search_tool = DuckDuckGoSearchRun(region='kr-kr')
-    wiki_tool = WikipediaQueryRun(api_wrapper=WikipediaAPIWrapper(top_k_results=1, doc_content_chars_max=4000))
+    wiki_tool = WikipediaQueryRun(api_wrapper=CachedWikipediaAPIWrapper(top_k_results=1, doc_content_chars_max=4000))
     tools = [scrape_website_content, search_tool, wiki_tool]
     return llm, tools
 
@@ -36,47 +114,41 @@ def scrape_website_content(url: str) -> str:
     """
     print(f">>> Executing Smart Scraper for URL: {url}")
     scraped_data = []
-    chrome_options = webdriver.ChromeOptions()
-    chrome_options.add_argument('--headless')
-    chrome_options.add_argument('--no-sandbox')
-    chrome_options.add_argument('--disable-dev-shm-usage')
-    driver = webdriver.Chrome(options=chrome_options)
     try:
-        driver.get(url)
-        time.sleep(3)
-        page_source = driver.page_source
-        soup = BeautifulSoup(page_source, 'html.parser')
-        main_text = soup.get_text(separator='\n', strip=True)
-        scraped_data.append("--- 메인 페이지 내용 ---\n" + main_text)
-        pdf_links = soup.find_all('a', href=lambda href: href and href.lower().endswith('.pdf'))
-        print(f">>> Found {len(pdf_links)} PDF link(s).")
+        page = scrape_page(url)
+        # 페이지와 첨부 PDF에 걸쳐 반복되는 줄(머리말, 꼬리말, 같은 공고 문구)은 한 번만 남긴 뒤 출력 한도로 자릅니다.
+        dedup = LineDeduplicator()
+        scraped_data.append("--- 메인 페이지 내용 ---\n" + dedup.filter(page.main_text))
+        print(f">>> Found {len(page.pdf_links)} PDF link(s).")
         meaningful_keywords = ['직무', '요강', '설명', '기술서', '소개서', '공고']
-        for link in pdf_links:
-            link_text = link.get_text(strip=True)
+        meaningful_links = []
+        for link_text, pdf_url in page.pdf_links:
             if any(keyword in link_text for keyword in meaningful_keywords):
-                pdf_url = urljoin(url, link['href'])
                 print(f">>> 의미있는 PDF 발견: {link_text} ({pdf_url})")
-                try:
-                    pdf_response = requests.get(pdf_url, timeout=20)
-                    pdf_response.raise_for_status()
-                    pdf_doc = fitz.open(stream=pdf_response.content, filetype="pdf")
-                    pdf_text = "".join(page.get_text() for page in pdf_doc)
-                    scraped_data.append(f"\n\n--- 첨부 PDF 내용: {link_text} ---\n" + pdf_text)
-                    print(f">>> PDF '{link_text}' 텍스트 추출 성공.")
-                except Exception as e:
-                    scraped_data.append(f"\n--- PDF '{link_text}' 처리 중 오류: {e} ---")
+                meaningful_links.append((link_text, pdf_url))
+        # 메인 페이지가 이미 출력 한도를 채웠다면 PDF는 내려받지 않습니다.
+        pdf_budget = MAX_SCRAPED_CHARS - len(scraped_data[0])
+        for attachment in fetch_pdf_attachments(meaningful_links, pdf_budget):
+            if attachment.error:
+                scraped_data.append(f"\n--- PDF '{attachment.title}' 처리 중 오류: {attachment.error} ---")
+            else:
+                scraped_data.append(f"\n\n--- 첨부 PDF 내용: {attachment.title} ---\n" + dedup.filter(attachment.text))
     except Exception as e:
         return f"웹사이트 스크래핑 중 오류 발생: {e}"
-    finally:
-        driver.quit()
-    return "\n".join(scraped_data)[:20000]
+    return "\n".join(scraped_data)[:MAX_SCRAPED_CHARS]
 
 class GptResearcherStyleAnalyzer:
-    def __init__(self, llm_model, tool_list):
+    """
+    mode="pipeline"(기본값, 환경 변수 ANALYZER_MODE): SOP의 조사 단계를 정해진 계획대로 동시에 실행한 뒤 LLM 한 번으로 보고서를 작성합니다.
+    mode="agent": 기존 ReAct 에이전트가 도구를 하나씩 호출합니다. 파이프라인이 실패하면 이 방식으로 다시 시도합니다.
+    """
+    def __init__(self, llm_model, tool_list, mode: Optional[str] = None):
         self.llm = llm_model
         self.tools = tool_list
-        self.agent_executor = self._create_agent()
-    def _create_agent(self):
+        self.mode = mode or os.getenv("ANALYZER_MODE", "pipeline")
+        self._tools_by_name = {t.name: t for t in tool_list}
+        self._memo = ToolCallMemo()
+    def _create_agent(self, tools):
         prompt_template = """
         당신은 AI 정보 수집 및 시장 분석 전문 에이전트입니다. 당신의 임무는 아래에 명시된 '표준 행동 절차(SOP)'를 엄격히 따라서, 주어진 주제에 대한 심층 분석 보고서를 작성하는 것입니다. 모든 정보는 요약 없이 상세하게 수집하고, 출처를 명시해야 합니다.
         ---
@@ -99,69 +171,182 @@ class GptResearcherStyleAnalyzer:
         - 회사명: {company_name}
         - 희망 직무: {job_role}
         - 채용 공고 URL: {url}
+        - 이미 확보된 섹션: {known_sections}
+        (이미 확보된 섹션이 '없음'이 아니라면, 해당 섹션을 위한 조사 단계는 건너뛰고 보고서의 그 섹션 본문에는 `{reused_placeholder}`라고만 적는다.)
         ---
-        **최종 결과물 형식:**
-        ### [회사명] 및 관련 산업 심층 분석 보고서 ([희망 직무] 관점)
-        ## 1. 기업 분석 (Company Analysis)
-        ### 1.1. 기업 개요 (Source: Wikipedia/Homepage)
-        ```text
-        (위키피디아, 공식 홈페이지 등에서 수집한 기업의 비전, 연혁, 주요 사업, 가치, 인재상 등 상세 정보)
-        ```
-        ### 1.2. 기술 및 개발 문화 (Source: Tech Blog/Job Posting)
-        ```text
-        (기술 블로그, 채용 공고 PDF 등에서 수집한 기술 스택, 인프라, 개발 문화, 협업 방식 관련 내용)
-        ```
-        ## 2. 채용 포지션 분석 (Position Analysis)
-        ### 2.1. 공식 채용 공고 (Source: Job Posting URL)
-        ```text
-        (URL이 제공된 경우, 해당 공고 및 첨부 PDF에서 수집한 직무, 책임, 자격 요건, 우대 사항 등 모든 정보)
-        ```
-        ### 2.2. 일반적인 직무 기술서 (Source: Web Search)
-        ```text
-        (웹에서 검색한 해당 직무의 일반적인 역할, 책임, 필요 역량(JD)에 대한 정보)
-        ```
-        ## 3. 시장 및 산업 분석 (Market & Industry Analysis)
-        ### 3.1. 주요 경쟁사 및 시장 내 위치 (Source: Web Search)
-        - **경쟁사 목록**: [조사된 주요 경쟁사 2~3곳 나열]
-        - **경쟁사별 특징 및 비교 분석**: 
-        ```text
-        (각 경쟁사에 대해 수집한 정보 및 타겟 기업과의 비교 분석 내용)
-        ```
-        ### 3.2. 관련 산업 최신 동향 및 전망 (Source: Web Search/Reports)
-        ```text
-        (수집한 산업 동향, 최신 기술, 시장 전망, 증권사 리포트 등 상세 정보)
-        ```
-        ### 참고 자료
-        - [출처 1]: (정보 수집에 사용된 모든 URL 주소)
-        - [출처 2]: (정보 수집에 사용된 모든 URL 주소)
-        - ...
-        """
+        """ + REPORT_FORMAT
         prompt = ChatPromptTemplate.from_messages([
             ("system", prompt_template),
             ("human", "회사명: {company_name}\n희망 직무: {job_role}\n채용 공고 URL: {url}"),
             MessagesPlaceholder(variable_name="agent_scratchpad"),
         ])
-        agent = create_openai_tools_agent(self.llm, self.tools, prompt)
-        return AgentExecutor(agent=agent, tools=self.tools, verbose=True, max_iterations=50, handle_parsing_errors=True)
-    def process(self, company_name: str, url: Optional[str] = None, job_role: Optional[str] = None) -> str:
+        agent = create_openai_tools_agent(self.llm, tools, prompt)
+        return AgentExecutor(agent=agent, tools=tools, verbose=True, max_iterations=50, handle_parsing_errors=True)
+    def process(self, company_name: str, url: Optional[str] = None, job_role: Optional[str] = None,
+                known_sections: Optional[Dict[str, str]] = None) -> str:
+        """known_sections({'1.1': 본문, ...})가 주어지면 해당 조사 단계를 건너뛰고 결과 보고서에 그 본문을 그대로 넣습니다."""
+        known_sections = known_sections or {}
+        # 도구 호출 결과는 한 번의 분석 안에서만 재사용합니다 (파이프라인 실패 후 에이전트로 다시 분석할 때 포함).
+        self._memo = ToolCallMemo()
+        if self.mode == "pipeline":
+            try:
+                report = self._run_pipeline(company_name, url, job_role, known_sections)
+                if report:
+                    return report
+                print("경고: 파이프라인 결과에서 보고서를 찾지 못해 에이전트 방식으로 다시 분석합니다.")
+            except Exception as e:
+                print(f"경고: 파이프라인 분석 중 오류 발생, 에이전트 방식으로 다시 분석합니다: {e}")
+        return self._run_agent(company_name, url, job_role, known_sections)
+
+    def _run_agent(self, company_name: str, url: Optional[str], job_role: Optional[str], known_sections: Dict[str, str]) -> str:
         print(f"▶ 분석 에이전트 실행 시작 (입력: 회사명={company_name}, 직무={job_role}, URL={url})")
-        response = self.agent_executor.invoke({
+        known_text = ", ".join(f"{section} ({SECTION_STEPS[section]})" for section in sorted(known_sections) if section in SECTION_STEPS)
+        inputs = {
             "company_name": company_name,
             "job_role": job_role or "지정되지 않음",
-            "url": url or "제공되지 않음"
-        })
-        raw_output = response.get('output', "결과물을 생성하지 못했습니다.")
+            "url": url or "제공되지 않음",
+            "known_sections": known_text or "없음",
+            "reused_placeholder": REUSED_SECTION_PLACEHOLDER,
+        }
+        agent_executor = self._create_agent(self._memo.wrap_all(self.tools))
+        budget = ResearchBudget(posting_url=url, covered_sections=known_sections)
+        collected = []
+        raw_output = None
+        # 한 단계씩 실행하면서 모든 섹션의 자료가 모였거나 시간/토큰 예산을 다 썼으면 루프를 멈추고 모은 자료로 보고서를 작성합니다.
+        for step in agent_executor.iter(inputs, callbacks=[budget.token_usage]):
+            if "output" in step:
+                raw_output = step["output"]
+                break
+            for action, observation in step.get("intermediate_step", []):
+                budget.record(action.tool, action.tool_input, observation)
+                collected.append(f"### 자료: {action.tool}({action.tool_input})\n{str(observation)[:PIPELINE_SOURCE_CHARS]}")
+            reason = budget.stop_reason()
+            if reason:
+                print(f"--- 에이전트 조사 중단: {reason}, 도구 호출 {len(collected)}회 (재사용 {self._memo.hits}회) ---")
+                break
+        if raw_output is None:
+            report = self._synthesize(company_name, url, job_role, known_sections, collected) if collected else None
+            return report or "최종 보고서 형식의 결과물을 찾을 수 없습니다."
         print("\n--- 에이전트 최종 결과물 (Raw) ---")
         print(raw_output)
-        report_match = re.search(r"###\s.*", raw_output, re.DOTALL)
-        if report_match:
-            return report_match.group(0).strip()
-        return "최종 보고서 형식의 결과물을 찾을 수 없습니다."
+        report = _extract_report(raw_output)
+        if report:
+            return replace_sections(report, known_sections)
+        if collected:
+            # 반복 횟수 상한으로 끝나 보고서가 없으면("Agent stopped ...") 그동안 모은 자료로 보고서를 작성합니다.
+            print(f"--- 에이전트 결과에 보고서가 없어 수집한 자료 {len(collected)}건으로 보고서를 작성합니다 ---")
+            report = self._synthesize(company_name, url, job_role, known_sections, collected)
+        return report or "최종 보고서 형식의 결과물을 찾을 수 없습니다."
+
+    # --- 파이프라인 방식 ---
+    def _search(self, query: str) -> Tuple[str, List[str]]:
+        """검색 결과 요약 텍스트와 결과 링크 목록을 반환합니다."""
+        search_tool = self._tools_by_name["duckduckgo_search"]
+        api_wrapper = getattr(search_tool, "api_wrapper", None)
+        if api_wrapper is None:
+            return self._memo.get_or_call(search_tool.name, query, lambda: search_tool.invoke(query)), []
+        results = self._memo.get_or_call(
+            "duckduckgo_results", query, lambda: api_wrapper.results(query, PIPELINE_SEARCH_RESULTS)
+        )
+        lines = [f"- {r.get('title', '')}: {r.get('snippet', '')} ({r.get('link', '')})" for r in results]
+        return f"[검색: {query}]\n" + "\n".join(lines), [r["link"] for r in results if r.get("link")]
+
+    def _scrape(self, url: str) -> str:
+        scrape_tool = self._tools_by_name["scrape_website_content"]
+        return f"[스크래핑: {url}]\n" + self._memo.get_or_call(scrape_tool.name, url, lambda: scrape_tool.invoke(url))
+
+    def _search_and_scrape(self, query: str) -> str:
+        """검색한 뒤 첫 번째 결과 페이지를 스크래핑합니다 (SOP의 '검색해 URL을 찾고 스크래핑' 단계)."""
+        summary, links = self._search(query)
+        if not links:
+            return summary
+        return summary + "\n\n" + self._scrape(links[0])
+
+    def _pipeline_lookups(self, company_name: str, url: Optional[str], job_role: Optional[str],
+                          known_sections: Dict[str, str]) -> Dict[str, Tuple[Tuple[str, ...], Callable[[], str]]]:
+        """조사 이름 -> (뒷받침하는 보고서 섹션, 실행 함수). SOP의 Phase 1, 2 단계에 대응합니다."""
+        role = job_role or ""
+        lookups = {
+            "overview": (("1.1",), lambda: f"[위키피디아: {company_name}]\n" + self._memo.get_or_call(
+                "wikipedia", company_name, lambda: self._tools_by_name["wikipedia"].invoke(company_name)
+            )),
+            "homepage": (("1.1", "1.2"), lambda: self._search_and_scrape(f"{company_name} 공식 홈페이지")),
+            "tech_blog": (("1.2",), lambda: self._search_and_scrape(f"{company_name} 기술 블로그")),
+            "job_description": (("2.2",), lambda: self._search_and_scrape(f"{company_name} {role} 직무 기술서")),
+            "competitors": (("3.1",), lambda: self._search(f"{company_name} 주요 경쟁사")[0]),
+            "trends": (("3.2",), lambda: "\n\n".join(
+                self._search(query)[0] for query in (f"{company_name} 산업 기술 트렌드 2025", f"{role} 분야 최신 기술 동향")
+            )),
+            "reports": (("3.2",), lambda: self._search_and_scrape(f"{company_name} 기업 분석 보고서")),
+        }
+        if url:
+            lookups["job_posting"] = (("2.1",), lambda: self._scrape(url))
+        # 저장된 섹션만 뒷받침하는 조사는 실행하지 않습니다.
+        return {name: lookup for name, lookup in lookups.items() if not all(section in known_sections for section in lookup[0])}
+
+    def _run_pipeline(self, company_name: str, url: Optional[str], job_role: Optional[str], known_sections: Dict[str, str]) -> Optional[str]:
+        print(f"▶ 분석 파이프라인 실행 시작 (입력: 회사명={company_name}, 직무={job_role}, URL={url})")
+        start = time.perf_counter()
+        lookups = self._pipeline_lookups(company_name, url, job_role, known_sections)
+        timeout = float(os.getenv("ANALYZER_LOOKUP_TIMEOUT", PIPELINE_LOOKUP_TIMEOUT))
+        # 조사는 제한 시간이 길어 실행마다 전용 풀을 사용합니다. 공용 풀을 쓰면 다른 세션의 피드백 검색(수 초 제한)이 밀려납니다.
+        executor = ThreadPoolExecutor(max_workers=max(1, len(lookups)), thread_name_prefix="research")
+        try:
+            materials = gather_contexts({name: fn for name, (_, fn) in lookups.items()},
+                                        timeouts={name: timeout for name in lookups}, executor=executor)
+        finally:
+            # 제한 시간을 넘긴 조사는 기다리지 않습니다 (실행 중인 것은 끝나면 스레드가 정리됨).
+            executor.shutdown(wait=False, cancel_futures=True)
+        collected = [
+            f"### 자료: {name} (관련 섹션: {', '.join(lookups[name][0])})\n{text[:PIPELINE_SOURCE_CHARS]}"
+            for name, text in materials.items() if text
+        ]
+        print(f"--- 자료 수집 완료: {len(collected)}/{len(lookups)}개 ({time.perf_counter() - start:.2f}초) ---")
+        if not collected:
+            return None
+        return self._synthesize(company_name, url, job_role, known_sections, collected)
+
+    def _synthesize(self, company_name: str, url: Optional[str], job_role: Optional[str], known_sections: Dict[str, str],
+                    collected: List[str]) -> Optional[str]:
+        """수집한 자료로 LLM을 한 번 호출해 보고서를 작성합니다 (파이프라인, 그리고 예산으로 중단된 에이전트 루프에서 사용)."""
+        start = time.perf_counter()
+        known_text = ", ".join(sorted(known_sections)) or "없음"
+        prompt = ChatPromptTemplate.from_messages([
+            ("system", SYNTHESIS_PROMPT),
+            ("human", "회사명: {company_name}\n희망 직무: {job_role}\n채용 공고 URL: {url}\n\n[수집 자료]\n{materials}"),
+        ])
+        response = (prompt | self.llm).invoke({
+            "company_name": company_name,
+            "job_role": job_role or "지정되지 않음",
+            "url": url or "제공되지 않음",
+            "known_sections": known_text,
+            "reused_placeholder": REUSED_SECTION_PLACEHOLDER,
+            "materials": "\n\n".join(collected),
+        })
+        print(f"--- 보고서 작성 완료 ({time.perf_counter() - start:.2f}초) ---")
+        report = _extract_report(response.content)
+        return replace_sections(report, known_sections) if report else None
+
+def _extract_report(raw_output: str) -> Optional[str]:
+    report_match = re.search(r"###\s.*", raw_output, re.DOTALL)
+    return report_match.group(0).strip() if report_match else None
 
-def run_analyzer(company_name: str, job_role: Optional[str] = None, url: Optional[str] = None) -> str:
+def run_analyzer(company_name: str, job_role: Optional[str] = None, url: Optional[str] = None, force_refresh: bool = False) -> str:
     """
     입력값만으로 에이전트의 모든 설정과 실행을 처리하고 최종 보고서를 반환하는 마스터 함수.
+    같은 (회사, 직무, 공고 URL)의 신선한 보고서가 저장되어 있으면 에이전트를 실행하지 않고 바로 반환하며,
+    같은 회사의 다른 직무 보고서가 있으면 회사 단위 섹션(1.1, 3.x)을 재사용합니다. force_refresh=True면 저장된 결과를 무시합니다.
     """
+    report_store = get_registry().get_report_store()
+    known_sections = {}
+    if report_store is not None and not force_refresh:
+        cached_report = report_store.get_report(company_name, job_role, url)
+        if cached_report is not None:
+            print(f"--- 저장된 기업 분석 보고서를 사용합니다 ({company_name}, {job_role}) ---")
+            return cached_report
+        known_sections = report_store.get_company_sections(company_name)
+        if known_sections:
+            print(f"--- 저장된 회사 단위 섹션을 재사용합니다: {', '.join(sorted(known_sections))} ---")
     print("--- 분석 시스템 초기화 시작 ---")
     llm, tools = initialize_llm_and_tools()
     analyzer = GptResearcherStyleAnalyzer(llm_model=llm, tool_list=tools)
@@ -169,6 +354,9 @@ def run_analyzer(company_name: str, job_role: Optional[str] = None, url: Optiona
     report = analyzer.process(
         company_name=company_name,
         url=url,
-        job_role=job_role
+        job_role=job_role,
+        known_sections=known_sections
     )
+    if report_store is not None:
+        report_store.put(company_name, job_role, url, report)
     return report
@@ -0,0 +1,190 @@
+import os
+import json
+import math
+from typing import Optional
+import numpy as np
+import faiss
+
+ANN_INDEX_NAME = "index.ann.faiss"
+ANN_META_NAME = "ann_meta.json"
+INDEX_TYPES = ("auto", "flat", "ivf", "hnsw")
+# auto 모드에서 근사 인덱스로 전환하는 코퍼스 크기 기준
+AUTO_HNSW_MIN_VECTORS = 20_000
+AUTO_IVF_MIN_VECTORS = 500_000
+# IVF 센트로이드를 학습한 시점보다 벡터 수가 이 배수 이상 늘면 다시 학습합니다.
+IVF_RETRAIN_GROWTH = 2.0
+HNSW_M = 32
+HNSW_EF_CONSTRUCTION = 80
+HNSW_EF_SEARCH = 64
+# faiss 1.10부터 제공되는 mmap 플래그(flat, IVF-flat, HNSW-flat의 벡터 배열을 복사하지 않음). 없으면 일반 mmap 플래그로 대체합니다.
+_MMAP_FLAG = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP)
+
+
+def resolve_index_type(index_type: Optional[str], ntotal: int) -> str:
+    """설정값(인자 또는 FAISS_INDEX_TYPE 환경 변수)을 실제 인덱스 종류로 바꿉니다."""
+    index_type = (index_type or os.getenv("FAISS_INDEX_TYPE", "auto")).lower()
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"지원하지 않는 인덱스 종류입니다: {index_type} (가능: {', '.join(INDEX_TYPES)})")
+    if index_type != "auto":
+        return index_type
+    if ntotal >= AUTO_IVF_MIN_VECTORS:
+        return "ivf"
+    if ntotal >= AUTO_HNSW_MIN_VECTORS:
+        return "hnsw"
+    return "flat"
+
+
+def ivf_nlist(ntotal: int) -> int:
+    # 센트로이드당 최소 39개의 학습 표본이 있어야 faiss가 안정적으로 학습합니다.
+    return int(max(1, min(65536, max(16, 4 * math.sqrt(ntotal)), ntotal // 39)))
+
+
+def ivf_nprobe(nlist: int) -> int:
+    return min(nlist, max(8, nlist // 32))
+
+
+def build_hnsw(vectors: np.ndarray) -> faiss.Index:
+    index = faiss.IndexHNSWFlat(vectors.shape[1], HNSW_M)
+    index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+    index.add(vectors)
+    index.hnsw.efSearch = HNSW_EF_SEARCH
+    return index
+
+
+def train_ivf(vectors: np.ndarray, nlist: int) -> faiss.Index:
+    quantizer = faiss.IndexFlatL2(vectors.shape[1])
+    index = faiss.IndexIVFFlat(quantizer, vectors.shape[1], nlist)
+    # 학습에는 센트로이드당 최대 256개 표본이면 충분합니다.
+    max_train = nlist * 256
+    if len(vectors) > max_train:
+        sample = vectors[np.random.default_rng(0).choice(len(vectors), max_train, replace=False)]
+    else:
+        sample = vectors
+    index.train(sample)
+    return index
+
+
+def apply_search_params(index: faiss.Index, meta: dict):
+    if meta.get("type") == "hnsw":
+        index.hnsw.efSearch = meta.get("ef_search", HNSW_EF_SEARCH)
+    elif meta.get("type") == "ivf":
+        faiss.extract_index_ivf(index).nprobe = meta.get("nprobe", ivf_nprobe(meta["nlist"]))
+
+
+def _flat_signature(flat_path: str) -> list:
+    stat = os.stat(flat_path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def read_ann_meta(db_path: str) -> Optional[dict]:
+    meta_path = os.path.join(db_path, ANN_META_NAME)
+    if not os.path.exists(meta_path):
+        return None
+    with open(meta_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def remove_ann_index(db_path: str):
+    for name in (ANN_INDEX_NAME, ANN_META_NAME):
+        path = os.path.join(db_path, name)
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def update_ann_index(db_path: str, flat_index: faiss.Index, flat_path: str, index_type: Optional[str] = None) -> str:
+    """
+    정확 검색용 flat 인덱스(index.faiss)를 기준으로 근사 인덱스(index.ann.faiss)를 맞춰 둡니다.
+    flat 인덱스는 삭제/추가와 메모리 매핑을 위해 항상 유지하고, 근사 인덱스는 같은 행 순서로 만듭니다.
+    - hnsw: 삭제를 지원하지 않으므로 변경 시 전체를 다시 만듭니다.
+    - ivf: 학습 이후 벡터 수가 IVF_RETRAIN_GROWTH배 이상 늘었을 때만 센트로이드를 다시 학습하고,
+      그 외에는 기존 센트로이드를 재사용해 벡터만 다시 채웁니다.
+    """
+    ntotal = flat_index.ntotal
+    resolved = resolve_index_type(index_type, ntotal)
+    meta = read_ann_meta(db_path)
+    if resolved == "flat" or ntotal == 0:
+        if meta is not None:
+            print("근사 인덱스를 제거하고 정확 검색(flat)을 사용합니다.")
+        remove_ann_index(db_path)
+        return "flat"
+    signature = _flat_signature(flat_path)
+    if meta and meta.get("type") == resolved and meta.get("flat_signature") == signature:
+        return resolved
+    vectors = flat_index.reconstruct_n(0, ntotal)
+    ann_path = os.path.join(db_path, ANN_INDEX_NAME)
+    if resolved == "hnsw":
+        print(f"HNSW 인덱스를 생성합니다... ({ntotal}개 벡터)")
+        index = build_hnsw(vectors)
+        new_meta = {"type": "hnsw", "m": HNSW_M, "ef_search": HNSW_EF_SEARCH}
+    else:
+        can_reuse = (
+            meta is not None and meta.get("type") == "ivf" and os.path.exists(ann_path)
+            and ntotal < meta["trained_ntotal"] * IVF_RETRAIN_GROWTH
+        )
+        if can_reuse:
+            print(f"기존 IVF 센트로이드를 재사용하여 벡터를 다시 채웁니다... ({ntotal}개 벡터)")
+            index = faiss.read_index(ann_path)
+            index.reset()
+            nlist, trained_ntotal = meta["nlist"], meta["trained_ntotal"]
+        else:
+            nlist, trained_ntotal = ivf_nlist(ntotal), ntotal
+            print(f"IVF 센트로이드를 학습합니다... (nlist={nlist}, {ntotal}개 벡터)")
+            index = train_ivf(vectors, nlist)
+        index.add(vectors)
+        new_meta = {"type": "ivf", "nlist": nlist, "nprobe": ivf_nprobe(nlist), "trained_ntotal": trained_ntotal}
+    new_meta.update({"ntotal": ntotal, "flat_signature": signature})
+    tmp_path = ann_path + ".tmp"
+    faiss.write_index(index, tmp_path)
+    os.replace(tmp_path, ann_path)
+    meta_path = os.path.join(db_path, ANN_META_NAME)
+    with open(meta_path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(new_meta, f)
+    os.replace(meta_path + ".tmp", meta_path)
+    return resolved
+
+
+def load_ann_index(db_path: str, flat_path: str, mmap: bool = True) -> Optional[faiss.Index]:
+    """
+    flat 인덱스와 동기화된 근사 인덱스가 있으면 검색 파라미터를 설정해 반환합니다. 없거나 오래됐으면 None.
+    flat 인덱스와 마찬가지로 mmap=True이면 메모리 매핑으로 엽니다 (read_index 참고).
+    """
+    meta = read_ann_meta(db_path)
+    ann_path = os.path.join(db_path, ANN_INDEX_NAME)
+    if meta is None or not os.path.exists(ann_path):
+        return None
+    if meta.get("flat_signature") != _flat_signature(flat_path):
+        print("경고: 근사 인덱스가 현재 DB와 맞지 않아 정확 검색(flat)을 사용합니다.")
+        return None
+    index = read_index(ann_path, mmap)
+    apply_search_params(index, meta)
+    return index
+
+
+def read_index(path: str, mmap: bool = True) -> faiss.Index:
+    """
+    인덱스 파일을 엽니다. mmap=True이면 메모리 매핑으로 열어 여러 워커 프로세스가 같은 페이지를 공유하고,
+    이 방식을 지원하지 않는 인덱스 종류나 faiss 버전이면 전체를 메모리로 읽습니다.
+    """
+    if mmap:
+        try:
+            return faiss.read_index(path, _MMAP_FLAG)
+        except RuntimeError as e:
+            print(f"경고: 인덱스를 메모리 매핑으로 열 수 없어 전체를 읽습니다: {e}")
+    return faiss.read_index(path)
+
+
+def make_filtered_search_params(index: faiss.Index, selected_ids: np.ndarray) -> faiss.SearchParameters:
+    """
+    선택된 행만 검색하도록 IDSelector를 담은 검색 파라미터를 만듭니다 (사후 필터링 없이 사전 필터).
+    근사 인덱스는 후보 중 선택된 행의 비율이 작을수록 결과가 모자라므로 그 비율만큼 탐색 폭을 넓힙니다.
+    """
+    selector = faiss.IDSelectorBatch(selected_ids.astype("int64"))
+    widen = max(1.0, index.ntotal / max(1, len(selected_ids)))
+    if isinstance(index, faiss.IndexHNSW):
+        ef_search = min(1024, int(index.hnsw.efSearch * widen))
+        return faiss.SearchParametersHNSW(sel=selector, efSearch=ef_search)
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        nprobe = min(ivf.nlist, int(ivf.nprobe * widen))
+        return faiss.SearchParametersIVF(sel=selector, nprobe=nprobe)
+    return faiss.SearchParameters(sel=selector)
@@ -1,19 +1,26 @@
 import streamlit as st
 import os
+import itertools
 from dotenv import load_dotenv
 from chatbot_core import ChatbotCore, MemoryHub
 from agentA import run_analyzer
 from build_faiss_db import build_or_update_vector_db
+from stage_scheduler import Stage, StageError, StageEvent, StageScheduler
 
 load_dotenv()
 st.set_page_config(page_title="AI 면접 코치", layout="wide")
 st.title("AI 면접 코치 🤖")
 
-# 세션 상태 초기화
+# 세션 상태 초기화 (주소의 ?session=<세션 ID>가 있으면 저장된 세션을 이어서 진행합니다)
 if "memory_hub" not in st.session_state:
-    st.session_state["memory_hub"] = MemoryHub(
-        interview_session={"chat_history": [{"role": "assistant", "content": "안녕하세요! 먼저 사이드바에 정보를 입력하고 자료를 업로드 해주세요."}]}
-    )
+    memory_hub = MemoryHub.resume(st.query_params.get("session", ""))
+    if memory_hub is None:
+        memory_hub = MemoryHub.create(
+            interview_session={"chat_history": [{"role": "assistant", "content": "안녕하세요! 먼저 사이드바에 정보를 입력하고 자료를 업로드 해주세요."}]}
+        )
+    st.session_state["memory_hub"] = memory_hub
+    if memory_hub.session_id:
+        st.query_params["session"] = memory_hub.session_id
 chatbot = ChatbotCore(memory=st.session_state.memory_hub)
 
 with st.sidebar:
@@ -21,6 +28,7 @@ with st.sidebar:
     company_name = st.text_input("회사명", key="company_name")
     job_role = st.text_input("희망 직무", key="job_role")
     job_url = st.text_input("채용 공고 URL (선택 사항)", key="job_url")
+    force_refresh = st.checkbox("기업 분석 새로 하기 (저장된 분석 무시)", key="force_refresh")
 
     st.divider()
 
@@ -40,42 +48,75 @@ with st.sidebar:
         elif not personal_files:
             st.warning("개인 맞춤 분석을 위해 하나 이상의 개인 파일을 업로드해주세요.")
         else:
-            with st.spinner("1/3 | 최신 기업 및 시장 정보를 분석 중입니다..."):
-                try:
-                    report = run_analyzer(
-                        company_name=st.session_state.company_name,
-                        job_role=st.session_state.job_role,
-                        url=st.session_state.job_url
-                    )
-                    chatbot.add_company_analysis(report)
-                except Exception as e:
-                    st.error(f"기업 분석 중 오류 발생: {e}")
-                    st.stop()
-            
-            with st.spinner("2/3 | 업로드된 개인 문서를 분석하고 있습니다..."):
-                try:
-                    job_description_from_report = report 
-                    chatbot.process_personal_documents(personal_files, job_description_from_report)
-                except Exception as e:
-                    st.error(f"개인 문서 처리 중 오류 발생: {e}")
-                    st.stop()
+            # 단계 함수는 작업 스레드에서 실행되므로 세션 상태 값은 미리 꺼내 둡니다.
+            company, role = st.session_state.company_name, st.session_state.job_role
+            url, refresh = st.session_state.job_url, st.session_state.force_refresh
+            file_names = [file.name for file in personal_files]
+
+            def analyze_company(_):
+                report = run_analyzer(company_name=company, job_role=role, url=url, force_refresh=refresh)
+                chatbot.add_company_analysis(report)
+                return report
+
+            # 개인 문서 읽기와 기업 분석은 서로 무관하므로 동시에 시작하고, 요약/질문 생성은 입력이 준비되는 즉시 시작합니다.
+            stages = [
+                Stage("documents", "개인 문서 읽기", lambda _: chatbot.load_personal_documents(personal_files)),
+                Stage("company", "최신 기업 및 시장 정보 분석", analyze_company),
+                Stage("digest", "기업 분석 보고서 요약", lambda _: chatbot.company_digest(), deps=("company",)),
+                Stage("summary", "개인 문서 분석",
+                      lambda r: chatbot.summarize_personal_documents(r["documents"], file_names), deps=("documents", "digest")),
+                Stage("questions", "맞춤 면접 질문 생성", lambda _: chatbot.generate_interview_questions(), deps=("summary",)),
+                Stage("prefetch", "내부 DB 검색 준비", lambda _: chatbot.prefetch_question_contexts(),
+                      deps=("questions",), optional=True),
+            ]
+            with st.status("면접 준비를 진행하고 있습니다...", expanded=True) as status:
+                lines = {stage.name: st.empty() for stage in stages}
+                for stage in stages:
+                    lines[stage.name].markdown(f"⏸️ {stage.label} (대기)")
+
+                def show_progress(event: StageEvent):
+                    line = lines[event.stage.name]
+                    if event.status == "started":
+                        line.markdown(f"⏳ {event.stage.label} 진행 중...")
+                    elif event.status == "done":
+                        line.markdown(f"✅ {event.stage.label} ({event.elapsed:.1f}초)")
+                    else:
+                        line.markdown(f"❌ {event.stage.label} 실패: {event.error}")
 
-            with st.spinner("3/3 | 모든 정보를 종합하여 맞춤 면접 질문을 생성합니다..."):
                 try:
-                    chatbot.generate_interview_questions()
-                    initial_message = (
-                        f"✅ **'{st.session_state.company_name}'({st.session_state.job_role})** 직무에 대한 모든 준비가 완료되었습니다!\n\n"
-                        "**생성된 맞춤 면접 질문:**\n"
-                    )
-                    # for i, q in enumerate(chatbot.memory.interview_session.generated_questions[:5]):
-                    #     initial_message += f"- {q}\n"
-                    initial_message += "\n면접을 시작하시겠습니까? '시작할게'라고 입력해주세요."
-                    st.session_state.memory_hub.interview_session.chat_history = [
-                        {"role": "assistant", "content": initial_message}
-                    ]  # 초기화하여 중복 방지
-                except Exception as e:
-                    st.error(f"질문 생성 중 오류 발생: {e}")
+                    StageScheduler(stages).run(on_event=show_progress)
+                except StageError as e:
+                    status.update(label="면접 준비 중 오류가 발생했습니다.", state="error")
+                    st.error(f"{e.stage.label} 중 오류 발생: {e.cause}")
                     st.stop()
+                status.update(label="면접 준비 완료!", state="complete", expanded=False)
+
+            initial_message = (
+                f"✅ **'{company}'({role})** 직무에 대한 모든 준비가 완료되었습니다!\n\n"
+                "**생성된 맞춤 면접 질문:**\n"
+            )
+            # for i, q in enumerate(chatbot.memory.interview_session.generated_questions[:5]):
+            #     initial_message += f"- {q}\n"
+            initial_message += "\n면접을 시작하시겠습니까? '시작할게'라고 입력해주세요."
+            st.session_state.memory_hub.interview_session.chat_history = [
+                {"role": "assistant", "content": initial_message}
+            ]  # 초기화하여 중복 방지
+            st.session_state.memory_hub.save()
+            st.rerun()
+
+    st.divider()
+    st.header("💾 세션")
+    if st.session_state.memory_hub.session_id:
+        st.caption("아래 세션 ID로 다른 창이나 서버 재시작 후에도 이어서 진행할 수 있습니다.")
+        st.code(st.session_state.memory_hub.session_id, language=None)
+    resume_id = st.text_input("세션 ID로 이어하기", key="resume_session_id")
+    if st.button("세션 불러오기", use_container_width=True):
+        resumed = MemoryHub.resume(resume_id.strip())
+        if resumed is None:
+            st.warning("해당 세션을 찾을 수 없습니다.")
+        else:
+            st.session_state["memory_hub"] = resumed
+            st.query_params["session"] = resumed.session_id
             st.rerun()
 
     st.divider()
@@ -112,15 +153,18 @@ if user_input := st.chat_input("면접 질문에 답변하거나 자유롭게 
     with chat_container:
         with st.chat_message("user"):
             st.markdown(user_input)
-    with st.spinner("답변을 생성하는 중입니다..."):
-        try:
-            # 중복 메시지 방지를 위해 chat_history를 직접 수정
-            ai_response = chatbot.get_response(user_input)
-            with chat_container:
-                with st.chat_message("assistant"):
-                    st.markdown(ai_response)
-        except Exception as e:
-            with chat_container:
-                with st.chat_message("assistant"):
-                    st.error(f"응답 생성 중 오류 발생: {e}")
+    try:
+        # 중복 메시지 방지를 위해 chat_history는 chatbot이 직접 수정합니다.
+        # 피드백은 필드(관련성, 논리성, ...)가 완성되는 대로 이어서 표시합니다.
+        with chat_container:
+            with st.chat_message("assistant"):
+                with st.spinner("답변을 생성하는 중입니다..."):
+                    response_stream = chatbot.stream_response(user_input)
+                    first_fragment = next(response_stream, "")
+                st.write_stream(itertools.chain([first_fragment], response_stream))
+    except Exception as e:
+        with chat_container:
+            with st.chat_message("assistant"):
+                st.error(f"응답 생성 중 오류 발생: {e}")
+    st.session_state.memory_hub.save()
     st.rerun()
\ No newline at end of file
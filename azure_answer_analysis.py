@@ -3,47 +3,50 @@ import json
 import re
 import traceback
 from dotenv import load_dotenv
-from openai import AzureChatOpenAI
 from langchain_community.tools import DuckDuckGoSearchRun
-from langchain_community.vectorstores import FAISS
-from langchain_openai import AzureOpenAIEmbeddings
+from resource_registry import get_registry
+from context_gathering import gather_contexts
+from context_budget import ContextPart, assemble_context
 
 load_dotenv()
 # --- 환경 변수 로드 ---
-load_dotenv()
-AZURE_OPENAI_ENDPOINT = os.getenv("AZURE_OPENAI_ENDPOINT")
-AZURE_OPENAI_API_KEY = os.getenv("AZURE_OPENAI_API_KEY")
 AZURE_OPENAI_DEPLOYMENT = os.getenv("AZURE_OPENAI_DEPLOYMENT", "gpt-4o-mini")
-AZURE_OPENAI_API_VERSION = os.getenv("AZURE_OPENAI_API_VERSION", "2024-12-01-preview")
-
-# --- 클라이언트 초기화 ---
-client = AzureChatOpenAI(
-)
+# 참고 컨텍스트 전체의 토큰 예산 (feedback_score와 같은 환경 변수 사용)
+CONTEXT_TOKENS = int(os.getenv("FEEDBACK_CONTEXT_TOKENS", 3000))
 
 # --- RAG: 벡터 DB 로딩 ---
-def load_retriever(db_path="faiss_db"):
-    if os.path.exists(db_path):
-        embeddings = AzureOpenAIEmbeddings(model="text-embedding-3-small")
-        vectorstore = FAISS.load_local(db_path, embeddings=embeddings, allow_dangerous_deserialization=True)
-        return vectorstore.as_retriever(search_kwargs={'k': 5})
-    return None
-
-retriever = load_retriever()
+def load_retriever():
+    # 클라이언트와 벡터 DB는 레지스트리가 프로세스 단위로 공유합니다.
+    return get_registry().get_retriever(k=5)
+
 web_search = DuckDuckGoSearchRun(region='kr-kr')
 
+def search_internal_db(query):
+    retriever = load_retriever()
+    if not retriever:
+        return ""
+    docs = retriever.invoke(query)
+    return "\n\n".join([d.page_content for d in docs])
+
 # --- 분석 에이전트 (업그레이드 프롬프트 포함) ---
 def analyze_answer_with_agent(question, answer, company_analysis="", personal_info="", chat_history=""):
     """
     개인 데이터 + 기업 분석 기반 맞춤형 면접 답변 평가 에이전트 (고도화 버전)
     """
-    # 1. 내부 DB 검색
-    context_from_db = ""
-    if retriever:
-        docs = retriever.invoke(answer)
-        context_from_db = "\n\n".join([d.page_content for d in docs])
-
-    # 2. 웹 검색
-    web_context = web_search.run(f"{question} {company_analysis[:50]}")
+    # 1~2. 내부 DB 검색과 웹 검색을 동시에 수행 (제한 시간을 넘긴 출처는 "없음"으로 처리)
+    contexts = gather_contexts({
+        "db": lambda: search_internal_db(answer),
+        "web": lambda: web_search.run(f"{question} {company_analysis[:50]}"),
+    })
+    context = assemble_context([
+        ContextPart("company_analysis", company_analysis, priority=1, min_tokens=400),
+        ContextPart("personal_info", personal_info, priority=2, min_tokens=400),
+        ContextPart("chat_history", chat_history, priority=3, min_tokens=200),
+        ContextPart("db", contexts["db"], priority=4),
+        ContextPart("web", contexts["web"], priority=5),
+    ], CONTEXT_TOKENS)
+    company_analysis, personal_info, chat_history = context["company_analysis"], context["personal_info"], context["chat_history"]
+    context_from_db, web_context = context["db"], context["web"]
 
     # 3. 프롬프트 구성
     prompt = f"""
@@ -91,6 +94,7 @@ def analyze_answer_with_agent(question, answer, company_analysis="", personal_in
     """
 
     try:
+        client = get_registry().get_openai_client()
         response = client.chat.completions.create(
             model=AZURE_OPENAI_DEPLOYMENT,
             messages=[
@@ -0,0 +1,87 @@
+import os
+import sys
+import time
+import argparse
+import numpy as np
+import faiss
+from ann_index import build_hnsw, train_ivf, ivf_nlist, ivf_nprobe, HNSW_EF_SEARCH
+from faiss_storage import INDEX_NAME
+
+def load_vectors(db_path: str, synthetic: int, dim: int) -> np.ndarray:
+    """faiss_db의 flat 인덱스에서 벡터를 꺼냅니다. --synthetic을 주면 무작위 벡터를 사용합니다."""
+    if synthetic:
+        rng = np.random.default_rng(0)
+        # 실제 임베딩처럼 군집 구조를 갖도록 중심점 주변에 생성합니다.
+        centers = rng.normal(size=(max(1, synthetic // 200), dim)).astype("float32")
+        labels = rng.integers(0, len(centers), synthetic)
+        return centers[labels] + 0.3 * rng.normal(size=(synthetic, dim)).astype("float32")
+    index_path = os.path.join(db_path, INDEX_NAME)
+    if not os.path.exists(index_path):
+        print(f"'{index_path}'가 없습니다. build_faiss_db.py를 먼저 실행하거나 --synthetic N을 사용하세요.")
+        sys.exit(1)
+    index = faiss.read_index(index_path)
+    return index.reconstruct_n(0, index.ntotal)
+
+def make_queries(vectors: np.ndarray, n_queries: int) -> np.ndarray:
+    """저장된 벡터에 잡음을 섞어 질의를 만듭니다 (임베딩 API 호출 없이 실제 분포와 비슷한 질의)."""
+    rng = np.random.default_rng(1)
+    picks = vectors[rng.choice(len(vectors), n_queries, replace=len(vectors) < n_queries)]
+    noise = rng.normal(scale=float(np.std(vectors)) * 0.5, size=picks.shape).astype("float32")
+    return picks + noise
+
+def measure(index: faiss.Index, queries: np.ndarray, k: int):
+    """질의를 하나씩 검색하여(채팅 한 턴과 같은 조건) 지연 시간 분포를 잽니다."""
+    latencies, results = [], []
+    for q in queries:
+        start = time.perf_counter()
+        _, ids = index.search(q.reshape(1, -1), k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        results.append(ids[0])
+    return np.array(latencies), np.array(results)
+
+def recall_at_k(truth: np.ndarray, found: np.ndarray) -> float:
+    hits = sum(len(set(t) & set(f[f >= 0])) for t, f in zip(truth, found))
+    return hits / truth.size
+
+def main():
+    parser = argparse.ArgumentParser(description="flat / IVF / HNSW 인덱스의 recall@k와 지연 시간 비교")
+    parser.add_argument("--db-path", default="faiss_db")
+    parser.add_argument("--synthetic", type=int, default=0, help="DB 대신 사용할 무작위 벡터 수")
+    parser.add_argument("--dim", type=int, default=1536, help="--synthetic 사용 시 벡터 차원")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args()
+
+    vectors = np.ascontiguousarray(load_vectors(args.db_path, args.synthetic, args.dim), dtype="float32")
+    queries = make_queries(vectors, args.queries)
+    k = min(args.k, len(vectors))
+    print(f"벡터 {len(vectors):,}개 (차원 {vectors.shape[1]}), 질의 {len(queries)}개, k={k}\n")
+
+    flat = faiss.IndexFlatL2(vectors.shape[1])
+    flat.add(vectors)
+    _, truth = flat.search(queries, k)
+
+    nlist = ivf_nlist(len(vectors))
+    candidates = [("flat", lambda: flat)]
+    if nlist >= 16:
+        def make_ivf():
+            index = train_ivf(vectors, nlist)
+            index.add(vectors)
+            index.nprobe = ivf_nprobe(nlist)
+            return index
+        candidates.append((f"ivf (nlist={nlist}, nprobe={ivf_nprobe(nlist)})", make_ivf))
+    else:
+        print(f"벡터 수가 적어 IVF는 건너뜁니다.\n")
+    candidates.append((f"hnsw (efSearch={HNSW_EF_SEARCH})", lambda: build_hnsw(vectors)))
+
+    print(f"{'인덱스':<32}{'빌드(초)':>10}{'recall@k':>10}{'p50(ms)':>10}{'p99(ms)':>10}")
+    for name, factory in candidates:
+        start = time.perf_counter()
+        index = factory()
+        build_seconds = time.perf_counter() - start
+        latencies, found = measure(index, queries, k)
+        print(f"{name:<32}{build_seconds:>10.2f}{recall_at_k(truth, found):>10.3f}"
+              f"{np.percentile(latencies, 50):>10.3f}{np.percentile(latencies, 99):>10.3f}")
+
+if __name__ == "__main__":
+    main()
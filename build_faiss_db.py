@@ -1,94 +1,198 @@
 import os
-import pandas as pd
+import uuid
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Optional
 from dotenv import load_dotenv
-from langchain_core.documents import Document
-from langchain_community.document_loaders import PyMuPDFLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_openai import AzureOpenAIEmbeddings
+from langchain_core.documents import Document
 from langchain_community.vectorstores import FAISS
-from file_processors import load_hwp_text_with_extractor, unzip_and_cleanup
+from file_processors import SUPPORTED_EXTENSIONS, parse_file_worker, unzip_and_cleanup
+from resource_registry import get_registry
+from embedding_cache import CachedEmbeddings
+from faiss_storage import INDEX_NAME, has_vector_db, is_legacy_format, load_vector_db_for_update, save_vector_db
+from ann_index import update_ann_index
+from lexical_index import sync_lexical_index
+from doc_metadata import parse_filename
+from vector_db_manifest import MANIFEST_NAME, Manifest, compute_diff, load_manifest, make_entry, save_manifest
 
 load_dotenv()
 
-def build_or_update_vector_db():
+# 파싱된 청크가 이 개수만큼 쌓이면 파싱이 끝나기를 기다리지 않고 임베딩 단계로 넘깁니다.
+EMBED_BATCH_SIZE = 256
+
+def _default_worker_count() -> int:
+    return int(os.getenv("INGEST_WORKERS", 0)) or os.cpu_count() or 1
+
+def _iter_parse_results(file_paths: list[str], max_workers: int):
+    """파일을 병렬로 파싱하고, 완료되는 순서대로 결과를 내보냅니다."""
+    if max_workers <= 1 or len(file_paths) <= 1:
+        for file_path in file_paths:
+            yield parse_file_worker(file_path)
+        return
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(parse_file_worker, path) for path in file_paths]
+        for future in as_completed(futures):
+            yield future.result()
+
+def _print_parse_summary(summary: list[dict]):
+    print("\n--- 파일별 처리 결과 ---")
+    for item in sorted(summary, key=lambda x: x["file"]):
+        status = "성공" if item["error"] is None else f"실패 ({item['error']})"
+        print(f"{status}: '{item['file']}' 문서 {item['docs']}개, 청크 {item['chunks']}개, {item['seconds']:.2f}초")
+    failed = sum(1 for item in summary if item["error"] is not None)
+    print(f"총 {len(summary)}개 파일 중 {len(summary) - failed}개 성공, {failed}개 실패")
+
+def _backfill_file_metadata(vectorstore) -> int:
+    """파일명 메타데이터(doc_type 등)가 없는 기존 청크에 다시 임베딩하지 않고 메타데이터만 채워 넣습니다."""
+    updated = 0
+    for doc_id in vectorstore.index_to_docstore_id.values():
+        doc = vectorstore.docstore.search(doc_id)
+        if isinstance(doc, Document) and "doc_type" not in doc.metadata and doc.metadata.get("source"):
+            doc.metadata.update(parse_filename(doc.metadata["source"]))
+            updated += 1
+    if updated:
+        print(f"기존 청크 {updated}개에 파일명 메타데이터를 추가했습니다.")
+    return updated
+
+def _sync_ann_index(vectorstore, db_path: str, index_type: Optional[str]):
+    index_type = update_ann_index(db_path, vectorstore.index, os.path.join(db_path, INDEX_NAME), index_type)
+    print(f"검색 인덱스 종류: {index_type} ({vectorstore.index.ntotal}개 벡터)")
+
+def build_or_update_vector_db(max_workers: Optional[int] = None, dry_run: bool = False, index_type: Optional[str] = None):
+    """
+    data 폴더와 매니페스트(faiss_db/manifest.json)를 비교해 변경된 파일만 벡터 DB에 반영합니다.
+    - 추가/변경된 파일: 파싱 후 임베딩하여 추가 (변경된 파일은 기존 청크를 먼저 삭제)
+    - 삭제된 파일: 해당 파일의 청크를 id로 docstore와 인덱스에서 삭제
+    dry_run=True이면 변경 내역만 출력하고 DB에는 반영하지 않습니다.
+    index_type(auto/flat/ivf/hnsw, 기본값: FAISS_INDEX_TYPE 환경 변수 또는 auto)에 따라 근사 검색 인덱스를 함께 관리합니다.
+    하이브리드 검색용 어휘 색인(lexical.sqlite)도 변경된 청크만큼 함께 갱신합니다.
+    파싱은 max_workers개의 프로세스로 병렬 수행되며(기본값: INGEST_WORKERS 환경 변수 또는 CPU 코어 수),
+    파싱이 끝난 파일부터 바로 청크 분할과 임베딩 단계로 넘어갑니다.
+    """
     doc_dir = "data"
     db_path = "faiss_db"
-    log_path = os.path.join(db_path, "processed_files.log")
     if not os.path.exists(doc_dir):
         print(f"오류: '{doc_dir}' 폴더를 찾을 수 없습니다.")
         return
-    unzip_and_cleanup(doc_dir)
+    if not dry_run:
+        unzip_and_cleanup(doc_dir)
+    registry = get_registry()
+    embedding_model = registry.embedding_model
+    current_files = [f for f in os.listdir(doc_dir) if f.lower().endswith(tuple(SUPPORTED_EXTENSIONS))]
+    if dry_run:
+        # 매니페스트만 읽어 비교합니다 (임베딩 클라이언트 생성, 벡터 DB 로드 없음).
+        manifest = load_manifest(db_path, embedding_model, doc_dir=doc_dir) if has_vector_db(db_path) else Manifest()
+        if has_vector_db(db_path) and not manifest.files:
+            print(f"참고: '{db_path}'에 매니페스트가 없어 모든 파일이 추가 대상으로 표시됩니다 (실제 실행 시 기존 DB에서 변환).")
+        diff, _ = compute_diff(manifest, doc_dir, current_files, embedding_model)
+        print(f"\n--- 변경 내역 ---\n{diff.describe()}")
+        return diff
+    embeddings = registry.get_embeddings()
     vectorstore = None
-    processed_files = set()
-    embeddings = AzureOpenAIEmbeddings(model="text-embedding-3-small")
-    if os.path.exists(db_path):
+    manifest = Manifest()
+    if has_vector_db(db_path):
         print(f"기존 벡터 DB를 '{db_path}'에서 로드합니다...")
         try:
-            vectorstore = FAISS.load_local(db_path, embeddings=embeddings, allow_dangerous_deserialization=True)
-            if os.path.exists(log_path):
-                with open(log_path, 'r', encoding='utf-8') as f:
-                    processed_files = set(line.strip() for line in f)
-            print(f"로드 완료. 총 {len(processed_files)}개의 파일이 이미 처리되었습니다.")
+            vectorstore = load_vector_db_for_update(db_path, embeddings)
+            manifest = load_manifest(db_path, embedding_model, vectorstore=vectorstore, doc_dir=doc_dir)
+            print(f"로드 완료. 총 {len(manifest.files)}개의 파일이 이미 처리되었습니다.")
         except Exception as e:
             print(f"기존 DB 로드 실패: {e}. DB를 새로 생성합니다.")
-            processed_files = set()
+            vectorstore, manifest = None, Manifest()
     else:
         print(f"기존 벡터 DB가 없습니다. '{db_path}'에 새로 생성합니다.")
-        os.makedirs(db_path, exist_ok=True)
-    supported_extensions = ['.pdf', '.hwp', '.hwpx', '.csv']
-    current_files = {f for f in os.listdir(doc_dir) if f.lower().endswith(tuple(supported_extensions))}
-    new_files_to_process = sorted(list(current_files - processed_files))
-    if not new_files_to_process:
-        print("\n새롭게 추가된 파일이 없습니다. 프로세스를 종료합니다.")
-        return
-    print(f"\n총 {len(new_files_to_process)}개의 새로운 파일을 처리합니다: {new_files_to_process}")
-    new_docs = []
-    for file_basename in new_files_to_process:
-        file_path = os.path.join(doc_dir, file_basename)
-        try:
-            ext = os.path.splitext(file_path)[1].lower()
-            docs = []
-            if ext == '.pdf':
-                loader = PyMuPDFLoader(file_path)
-                docs = loader.load()
-            elif ext in ['.hwp', '.hwpx']:
-                docs = load_hwp_text_with_extractor(file_path)
-            elif ext == '.csv':
-                encodings_to_try = ['utf-8-sig', 'utf-8', 'cp949', 'euc-kr']
-                df = None
-                for encoding in encodings_to_try:
-                    try:
-                        df = pd.read_csv(file_path, encoding=encoding)
-                        break
-                    except (UnicodeDecodeError, FileNotFoundError):
-                        continue
-                if df is None: raise ValueError("지원되는 인코딩으로 파일을 읽을 수 없습니다.")
-                for index, row in df.iterrows():
-                    content = row.get("Question", " ".join(map(str, row.values)))
-                    metadata = {"source": file_basename, "row": index + 1, **row.to_dict()}
-                    docs.append(Document(page_content=content, metadata=metadata))
-            new_docs.extend(docs)
-            print(f"성공: '{file_basename}' ({len(docs)}개 문서)")
-        except Exception as e:
-            print(f"오류: '{file_basename}' 처리 중 오류 발생: {e}")
-    if not new_docs:
-        print("\n새로운 문서 내용이 없어 DB를 업데이트하지 않습니다.")
-        return
-    print("\n새로운 문서를 청크(chunk)로 분할합니다...")
-    text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=100, length_function=len)
-    split_chunks = text_splitter.split_documents(new_docs)
-    print(f"총 {len(split_chunks)}개의 새로운 청크로 분할되었습니다.")
-    if vectorstore is None:
-        print("\n새로운 벡터스토어를 생성합니다...")
-        vectorstore = FAISS.from_documents(documents=split_chunks, embedding=embeddings)
-    else:
-        print("\n기존 벡터스토어에 새로운 문서를 추가합니다...")
-        vectorstore.add_documents(split_chunks)
-    vectorstore.save_local(db_path)
-    with open(log_path, 'w', encoding='utf-8') as f:
-        for filename in sorted(list(current_files)):
-            f.write(filename + '\n')
-    print(f"\n✅ 벡터스토어 업데이트 완료. 총 {len(current_files)}개의 파일이 처리되었습니다.")
+    diff, hashes = compute_diff(manifest, doc_dir, current_files, embedding_model)
+    print(f"\n--- 변경 내역 ---\n{diff.describe()}")
+    if not diff.has_changes():
+        print("\n변경된 파일이 없습니다. 프로세스를 종료합니다.")
+        if vectorstore is not None and is_legacy_format(db_path):
+            print("이전 형식(pickle)의 DB를 새 저장 형식으로 변환합니다...")
+            _backfill_file_metadata(vectorstore)
+            save_vector_db(vectorstore, db_path)
+        elif vectorstore is not None and _backfill_file_metadata(vectorstore):
+            save_vector_db(vectorstore, db_path)
+        if vectorstore is not None and not os.path.exists(os.path.join(db_path, MANIFEST_NAME)):
+            save_manifest(db_path, manifest)
+        if vectorstore is not None:
+            _sync_ann_index(vectorstore, db_path, index_type)
+            sync_lexical_index(db_path, vectorstore)
+        return diff
+    os.makedirs(db_path, exist_ok=True)
+
+    # 1. 변경/삭제된 파일의 기존 청크를 id로 제거
+    stale_ids = []
+    for name in diff.modified + diff.deleted:
+        entry = manifest.files.pop(name, None)
+        if entry:
+            stale_ids.extend(entry.chunk_ids)
+    if stale_ids and vectorstore is not None:
+        existing_ids = set(vectorstore.index_to_docstore_id.values())
+        removable = [i for i in stale_ids if i in existing_ids]
+        if removable:
+            vectorstore.delete(removable)
+        print(f"\n변경/삭제된 파일의 기존 청크 {len(removable)}개를 삭제했습니다.")
+
+    # 2. 추가/변경된 파일을 파싱하여 임베딩
+    files_to_process = diff.files_to_process()
+    max_workers = max_workers or _default_worker_count()
+    summary = []
+    total_chunks = 0
+    if files_to_process:
+        print(f"\n총 {len(files_to_process)}개의 파일을 {max_workers}개 프로세스로 처리합니다: {files_to_process}")
+        text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=100, length_function=len)
+        file_paths = [os.path.join(doc_dir, f) for f in files_to_process]
+        pending_chunks, pending_ids = [], []
+
+        def flush_chunks():
+            nonlocal vectorstore, pending_chunks, pending_ids
+            if not pending_chunks:
+                return
+            if vectorstore is None:
+                print(f"\n새로운 벡터스토어를 생성합니다... ({len(pending_chunks)}개 청크)")
+                vectorstore = FAISS.from_documents(documents=pending_chunks, embedding=embeddings, ids=pending_ids)
+            else:
+                print(f"\n기존 벡터스토어에 {len(pending_chunks)}개 청크를 추가합니다...")
+                vectorstore.add_documents(pending_chunks, ids=pending_ids)
+            pending_chunks, pending_ids = [], []
+
+        for result in _iter_parse_results(file_paths, max_workers):
+            chunks = text_splitter.split_documents(result["docs"]) if result["docs"] else []
+            summary.append({**result, "docs": len(result["docs"]), "chunks": len(chunks)})
+            if result["error"] is not None:
+                # 실패한 파일은 매니페스트에 기록하지 않아 다음 실행에서 다시 시도합니다.
+                print(f"오류: '{result['file']}' 처리 중 오류 발생: {result['error']}")
+                continue
+            print(f"성공: '{result['file']}' ({len(result['docs'])}개 문서, {len(chunks)}개 청크)")
+            chunk_ids = [str(uuid.uuid4()) for _ in chunks]
+            manifest.files[result["file"]] = make_entry(
+                os.path.join(doc_dir, result["file"]), embedding_model,
+                sha256=hashes.get(result["file"]), chunk_ids=chunk_ids,
+            )
+            pending_chunks.extend(chunks)
+            pending_ids.extend(chunk_ids)
+            total_chunks += len(chunks)
+            if len(pending_chunks) >= EMBED_BATCH_SIZE:
+                flush_chunks()
+        flush_chunks()
+        _print_parse_summary(summary)
+        if isinstance(embeddings, CachedEmbeddings):
+            print(embeddings.stats_summary())
+
+    # 3. 벡터스토어를 먼저 저장한 뒤 매니페스트를 기록 (매니페스트가 실제 DB보다 앞서지 않도록)
+    if vectorstore is not None:
+        _backfill_file_metadata(vectorstore)
+        save_vector_db(vectorstore, db_path)
+        _sync_ann_index(vectorstore, db_path, index_type)
+        sync_lexical_index(db_path, vectorstore)
+    save_manifest(db_path, manifest)
+    print(f"\n✅ 벡터스토어 업데이트 완료. 새 청크 {total_chunks}개, 삭제 청크 {len(stale_ids)}개, 총 {len(manifest.files)}개의 파일이 반영되어 있습니다.")
+    return diff
 
 if __name__ == "__main__":
-    build_or_update_vector_db()
+    parser = argparse.ArgumentParser(description="data 폴더의 변경 사항을 벡터 DB에 반영합니다.")
+    parser.add_argument("--dry-run", action="store_true", help="변경 내역만 출력하고 DB에는 반영하지 않습니다.")
+    parser.add_argument("--workers", type=int, default=None, help="파싱에 사용할 프로세스 수")
+    parser.add_argument("--index-type", choices=["auto", "flat", "ivf", "hnsw"], default=None, help="검색 인덱스 종류")
+    args = parser.parse_args()
+    build_or_update_vector_db(max_workers=args.workers, dry_run=args.dry_run, index_type=args.index_type)
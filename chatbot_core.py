@@ -1,12 +1,17 @@
 import os
 from dotenv import load_dotenv
-from langchain_openai import AzureChatOpenAI, AzureOpenAIEmbeddings
 from langchain.schema import HumanMessage, AIMessage, SystemMessage, BaseMessage
-from langchain_community.vectorstores import FAISS
 from langchain.prompts import ChatPromptTemplate
-from pydantic import BaseModel, Field
-from typing import List, Optional, Any
+from concurrent.futures import Future
+from functools import partial
+from pydantic import BaseModel, Field, PrivateAttr
+from typing import Any, ClassVar, Dict, Iterator, List, Optional, Tuple
 from feedback_score import FeedbackAgent
+from resource_registry import get_registry
+from llm_cache import bypass_llm_cache
+from context_budget import ContextPart, assemble_context, truncate_to_tokens
+from report_cache import split_sections
+from context_gathering import source_timeout, submit_background
 
 load_dotenv()
 
@@ -17,6 +22,8 @@ class PersonalContext(BaseModel):
 
 class CompanyContext(BaseModel):
     analysis_report: Optional[str] = Field(default=None)
+    # 보고서에서 면접에 필요한 핵심(인재상, 직무 요구사항, 시장 정보)만 압축한 요약. 세션당 한 번 생성해 모든 프롬프트에 사용합니다.
+    report_digest: Optional[str] = Field(default=None)
 
 class InterviewSession(BaseModel):
     generated_questions: List[str] = Field(default_factory=list)
@@ -24,45 +31,232 @@ class InterviewSession(BaseModel):
     asked_questions: List[str] = Field(default_factory=list)
     current_question: Optional[str] = Field(default=None)
     interview_started: bool = Field(default=False)
+    # 질문별 내부 DB 검색 결과 (질문 생성 직후 한꺼번에 검색). 버전은 검색 당시 벡터 DB 버전으로, 다르면 버립니다.
+    question_contexts: Dict[str, str] = Field(default_factory=dict)
+    question_contexts_version: Optional[str] = Field(default=None)
+    # 추측 실행 결과 (직렬화하지 않음): (질문, 심화 질문 생성 작업)과 질문별 내부 DB 검색 작업.
+    # 작업은 ChatbotCore를 참조하지 않으므로 Streamlit이 화면을 다시 그리며 ChatbotCore를 새로 만들어도 이어서 쓸 수 있습니다.
+    _speculative_followup: Optional[Tuple[str, Future]] = PrivateAttr(default=None)
+    _prefetched_db_contexts: Dict[str, Future] = PrivateAttr(default_factory=dict)
+
+    def set_speculation(self, question: Optional[str], future: Future):
+        """question에 대한 심화 질문 생성 작업을 기록합니다. 이전 작업은 취소합니다."""
+        self.discard_speculation()
+        self._speculative_followup = (question, future)
+
+    def take_speculation(self, question: Optional[str]) -> Optional[Future]:
+        """question에 대해 미리 시작한 심화 질문 작업을 꺼냅니다. 다른 질문에 대한 작업이었으면 버리고 None."""
+        speculation, self._speculative_followup = self._speculative_followup, None
+        if speculation is None or speculation[0] != question:
+            return None
+        return speculation[1]
+
+    def discard_speculation(self):
+        if self._speculative_followup is not None:
+            self._speculative_followup[1].cancel()
+            self._speculative_followup = None
+
+    def has_db_context(self, question: str) -> bool:
+        """question의 내부 DB 검색 결과가 저장되어 있거나 검색 중이면 True."""
+        return question in self.question_contexts or question in self._prefetched_db_contexts
+
+    def prefetch_db_context(self, question: str, future: Future):
+        self._prefetched_db_contexts[question] = future
+
+    def prefetched_db_context(self, question: str) -> Optional[Future]:
+        return self._prefetched_db_contexts.get(question)
+
+    def clear_db_contexts(self) -> bool:
+        """저장된 검색 결과와 진행 중인 검색을 모두 버립니다. 버린 것이 있으면 True."""
+        had_contexts = bool(self.question_contexts or self._prefetched_db_contexts)
+        self.question_contexts = {}
+        self._prefetched_db_contexts.clear()
+        return had_contexts
 
 class MemoryHub(BaseModel):
     personal_context: PersonalContext = Field(default_factory=PersonalContext)
     company_context: CompanyContext = Field(default_factory=CompanyContext)
     interview_session: InterviewSession = Field(default_factory=InterviewSession)
+    # 세션 저장소(SessionStore)의 세션 ID. None이면 저장하지 않습니다.
+    session_id: Optional[str] = Field(default=None)
+
+    # 세션을 복원할 때 바로 읽지 않고 처음 필요할 때 읽는 큰 필드
+    REPORT_FIELD: ClassVar[str] = "company_context.analysis_report"
+    QUESTION_CONTEXTS_FIELD: ClassVar[str] = "interview_session.question_contexts"
+    LAZY_FIELDS: ClassVar[Tuple[str, ...]] = (REPORT_FIELD, QUESTION_CONTEXTS_FIELD)
+
+    @classmethod
+    def create(cls, **data) -> "MemoryHub":
+        """새 세션을 만듭니다. 세션 저장소를 사용할 수 있으면 세션 ID를 발급합니다."""
+        hub = cls(**data)
+        store = get_registry().get_session_store()
+        if store is not None:
+            hub.session_id = store.new_session_id()
+        return hub
+
+    @classmethod
+    def resume(cls, session_id: str) -> Optional["MemoryHub"]:
+        """세션 ID로 저장된 세션을 복원합니다 (다른 워커에서 저장한 세션도 가능). 없으면 None."""
+        store = get_registry().get_session_store()
+        hub = store.load(session_id, cls, lazy_fields=cls.LAZY_FIELDS) if store is not None and session_id else None
+        if hub is not None:
+            hub.session_id = session_id
+        return hub
+
+    def save(self):
+        """마지막 저장 이후 바뀐 필드와 새 대화 메시지만 세션 저장소에 씁니다."""
+        store = get_registry().get_session_store()
+        if store is None or not self.session_id:
+            return
+        try:
+            store.save(self, self.session_id)
+        except Exception as e:
+            print(f"경고: 세션 저장 실패: {e}")
+
+    def ensure_loaded(self, *fields: str):
+        """복원 시 건너뛴 큰 필드를 읽어 채웁니다."""
+        store = get_registry().get_session_store()
+        if store is not None and self.session_id:
+            store.ensure_loaded(self, self.session_id, *fields)
+
+# --- 사용자 입력 옵션과 피드백 출력 형식 ---
+RETRY_INPUTS = ["1", "다시 답변", "다시 답변하기"]
+FOLLOWUP_INPUTS = ["2", "심화 질문", "심화 질문 받기"]
+NEXT_INPUTS = ["3", "다른 질문", "다른 질문 받기"]
+OPTIONS_PROMPT = (
+    "\n\n다음 중 하나를 선택해주세요:\n"
+    "1. 같은 질문에 대해 다시 답변하기\n"
+    "2. 같은 주제에 대한 심화 질문 받기\n"
+    "3. 다른 질문 받기"
+)
+FEEDBACK_HEADER = "### 피드백\n"
+SCORE_FIELDS = ["관련성", "논리성", "진정성", "직무적합성"]
+FEEDBACK_FIELDS = SCORE_FIELDS + ["전략적코멘트", "개선피드백", "모범답안", "참고자료"]
+
+# --- 프롬프트별 컨텍스트 토큰 예산 ---
+DIGEST_MAX_TOKENS = 1200
+EXTRACT_CONTEXT_TOKENS = 12000
+QUESTION_CONTEXT_TOKENS = 4000
+FOLLOWUP_CONTEXT_TOKENS = 3000
+# 요약 생성에 실패했을 때 보고서 섹션에서 바로 뽑는 항목 (제목, 섹션 번호)
+DIGEST_SECTIONS = [
+    ("인재상·핵심 가치", ("1.1",)),
+    ("직무 요구사항", ("2.1", "2.2", "1.2")),
+    ("시장·경쟁 정보", ("3.1", "3.2")),
+]
+
+def format_feedback_field(name: str, value: Any) -> str:
+    """피드백 JSON의 필드 하나를 마크다운으로 변환합니다 (스트리밍 시 필드가 완성될 때마다 사용)."""
+    if name in SCORE_FIELDS:
+        return f"- **{name}**: {value['점수']}/5 - {value['이유']}\n\n"
+    if name == "전략적코멘트":
+        return f"\n**전략적 코멘트**: {value}\n"
+    if name == "개선피드백":
+        return f"**개선 피드백**: {value}\n"
+    if name == "모범답안":
+        return f"**모범 답안 예시**: {value}\n"
+    if name == "참고자료":
+        return f"**참고 자료**: {', '.join(value) or '없음'}"
+    return ""
+
+def _run_followup_chain(chain, inputs: Dict[str, Any]) -> str:
+    # 심화 질문은 매번 새로 생성해야 하므로 응답 캐시를 사용하지 않습니다.
+    return ChatbotCore._invoke(chain, inputs, use_cache=False).content.strip()
 
 # --- 챗봇 핵심 로직 클래스 ---
 class ChatbotCore:
-    def __init__(self, memory: MemoryHub):
+    def __init__(self, memory: MemoryHub, speculative: Optional[bool] = None):
+        """
+        speculative=True(기본값은 환경 변수 SPECULATIVE_FOLLOWUP=1)이면 답변이 들어오는 즉시 피드백과 함께
+        심화 질문과 다음 질문의 내부 DB 검색을 미리 시작해 둡니다. 사용자가 2번을 고르면 바로 응답할 수 있습니다.
+        """
         self.memory = memory
-        self.llm = AzureChatOpenAI(
-            azure_deployment=os.getenv("AZURE_OPENAI_CHAT_DEPLOYMENT_NAME"),
-            temperature=0.7, max_tokens=2000
+        self.speculative = speculative if speculative is not None else os.getenv("SPECULATIVE_FOLLOWUP", "0") == "1"
+        registry = get_registry()
+        # 같은 이력서/보고서에 대한 요약과 질문 생성은 응답 캐시에서 재사용합니다.
+        self.llm = registry.get_chat_llm(
+            os.getenv("AZURE_OPENAI_CHAT_DEPLOYMENT_NAME"), temperature=0.7, max_tokens=2000, cache=True
         )
         self.retriever = self._initialize_retriever()
         self.feedback_agent = FeedbackAgent()
 
     def _initialize_retriever(self):
-        db_path = "faiss_db"
-        if os.path.exists(db_path):
-            try:
-                embeddings = AzureOpenAIEmbeddings(model="text-embedding-3-small")
-                vectorstore = FAISS.load_local(db_path, embeddings=embeddings, allow_dangerous_deserialization=True)
-                return vectorstore.as_retriever(search_kwargs={'k': 5})
-            except Exception as e:
-                print(f"오류: FAISS DB 로드 실패: {e}")
-        return None
+        # 벡터 DB는 레지스트리가 프로세스 단위로 한 번만 로드하여 공유합니다.
+        return get_registry().get_retriever(k=5)
 
     def add_company_analysis(self, report: str):
         self.memory.company_context.analysis_report = report
+        self.memory.company_context.report_digest = None
 
-    def process_personal_documents(self, uploaded_files: List[Any], job_description: str):
+    def company_digest(self, use_cache: bool = True) -> str:
+        """기업 분석 보고서의 압축 요약. 세션에서 처음 필요할 때 한 번 만들어 CompanyContext에 저장합니다."""
+        company = self.memory.company_context
+        if company.report_digest is None:
+            # 복원된 세션에서는 요약이 없을 때만 보고서 전문을 읽습니다.
+            self.memory.ensure_loaded(MemoryHub.REPORT_FIELD)
+            if not company.analysis_report:
+                return "제공되지 않음"
+            company.report_digest = self._build_report_digest(company.analysis_report, use_cache=use_cache)
+        return company.report_digest
+
+    def _build_report_digest(self, report: str, use_cache: bool = True) -> str:
+        print("--- 기업 분석 보고서 요약 생성 ---")
+        prompt = ChatPromptTemplate.from_template(
+            """
+            다음 기업 분석 보고서를 면접 준비에 필요한 핵심만 남긴 요약으로 압축하세요.
+            보고서에 있는 사실만 사용하고, 각 항목은 짧은 불릿으로 작성하며 아래 형식을 그대로 지키세요.
+
+            ### 핵심 요약: [회사명] ([희망 직무])
+            **인재상·핵심 가치**
+            - (비전, 미션, 인재상, 조직 문화)
+            **직무 요구사항**
+            - (주요 업무, 자격 요건, 우대 사항, 기술 스택)
+            **시장·경쟁 정보**
+            - (주요 사업, 경쟁사, 산업 동향, 핵심 수치)
+
+            [기업 분석 보고서]
+            {report}
+            """
+        )
+        try:
+            result = self._invoke(prompt | self.llm, {"report": report}, use_cache)
+            return truncate_to_tokens(result.content.strip(), DIGEST_MAX_TOKENS)
+        except Exception as e:
+            print(f"경고: 보고서 요약 생성 실패, 보고서 섹션에서 직접 추출합니다: {e}")
+            return self._extractive_digest(report)
+
+    def _extractive_digest(self, report: str) -> str:
+        sections = split_sections(report)
+        if not sections:
+            return truncate_to_tokens(report, DIGEST_MAX_TOKENS)
+        per_item = DIGEST_MAX_TOKENS // len(DIGEST_SECTIONS)
+        items = []
+        for title, section_ids in DIGEST_SECTIONS:
+            body = "\n".join(sections[i].replace("```text", "").replace("```", "").strip() for i in section_ids if i in sections)
+            if body:
+                items.append(f"**{title}**\n{truncate_to_tokens(body, per_item)}")
+        return "\n".join(items)
+
+    def process_personal_documents(self, uploaded_files: List[Any], job_description: Optional[str] = None, use_cache: bool = True):
+        """job_description을 주지 않으면 기업 분석 보고서 요약을 직무 설명으로 사용합니다."""
         if not uploaded_files:
             return
-        print("--- 개인 문서 처리 및 요약 시작 ---")
-        combined_text = self._load_personal_docs_text(uploaded_files)
-        summary = self._extract_relevant_info(combined_text, job_description)
+        combined_text = self.load_personal_documents(uploaded_files)
+        self.summarize_personal_documents(combined_text, [file.name for file in uploaded_files], job_description, use_cache)
+
+    def load_personal_documents(self, uploaded_files: List[Any]) -> str:
+        """업로드된 문서의 텍스트만 읽습니다. 기업 분석 결과가 필요 없으므로 기업 분석과 동시에 실행할 수 있습니다."""
+        print("--- 개인 문서 텍스트 추출 시작 ---")
+        return self._load_personal_docs_text(uploaded_files)
+
+    def summarize_personal_documents(self, combined_text: str, file_names: List[str], job_description: Optional[str] = None,
+                                     use_cache: bool = True):
+        """load_personal_documents()로 읽은 텍스트에서 직무 관련 정보를 요약해 메모리에 저장합니다."""
+        print("--- 개인 문서 요약 시작 ---")
+        job_description = job_description or self.company_digest(use_cache=use_cache)
+        summary = self._extract_relevant_info(combined_text, job_description, use_cache=use_cache)
         self.memory.personal_context.summary = summary
-        self.memory.personal_context.uploaded_files = [file.name for file in uploaded_files]
+        self.memory.personal_context.uploaded_files = list(file_names)
         print("--- 개인 문서 요약 완료 및 메모리 저장 ---")
 
     def _load_personal_docs_text(self, files: List[Any]) -> str:
@@ -89,7 +283,7 @@ class ChatbotCore:
         os.rmdir(temp_dir)
         return "\n\n".join(all_texts)
 
-    def _extract_relevant_info(self, doc_text: str, job_desc: str) -> str:
+    def _extract_relevant_info(self, doc_text: str, job_desc: str, use_cache: bool = True) -> str:
         prompt = ChatPromptTemplate.from_template(
             """
             You are an expert in extracting relevant information from an individual's resume and CV.
@@ -103,10 +297,24 @@ class ChatbotCore:
             """
         )
         chain = prompt | self.llm
-        result = chain.invoke({"job_description": job_desc, "document_text": doc_text})
+        # 문서 원문이 가장 중요하므로 예산이 모자라면 직무 설명부터 줄입니다.
+        inputs = assemble_context([
+            ContextPart("document_text", doc_text, priority=1, min_tokens=EXTRACT_CONTEXT_TOKENS // 2),
+            ContextPart("job_description", job_desc, priority=2, min_tokens=300),
+        ], EXTRACT_CONTEXT_TOKENS)
+        result = self._invoke(chain, inputs, use_cache)
         return result.content if hasattr(result, 'content') else str(result)
 
-    def generate_interview_questions(self):
+    @staticmethod
+    def _invoke(runnable, inputs, use_cache: bool = True):
+        """use_cache=False이면 응답 캐시를 건너뛰고 항상 LLM을 호출합니다."""
+        if use_cache:
+            return runnable.invoke(inputs)
+        with bypass_llm_cache():
+            return runnable.invoke(inputs)
+
+    def generate_interview_questions(self, use_cache: bool = True):
+        self.memory.ensure_loaded(MemoryHub.REPORT_FIELD)
         if not self.memory.company_context.analysis_report:
             return
         print("--- 개인 맞춤 면접 질문 생성 시작 ---")
@@ -116,107 +324,180 @@ class ChatbotCore:
         질문은 지원자의 기술적 역량, 경험, 회사 인재상과 직무 적합성을 평가할 수 있도록 설계해야 합니다.
         질문만 목록 형식으로 답변해주세요.
         """
+        context = assemble_context([
+            ContextPart("company", self.company_digest(use_cache=use_cache), priority=1, min_tokens=500),
+            ContextPart("personal", self.memory.personal_context.summary or "제공되지 않음", priority=2, min_tokens=500),
+        ], QUESTION_CONTEXT_TOKENS)
         human_content = f"""
         [기업 분석 보고서]:
-        {self.memory.company_context.analysis_report}
+        {context["company"]}
 
         [지원자 정보 요약]:
-        {self.memory.personal_context.summary or "제공되지 않음"}
+        {context["personal"]}
         """
         messages = [SystemMessage(content=system_prompt), HumanMessage(content=human_content)]
-        response = self.llm.invoke(messages)
+        response = self._invoke(self.llm, messages, use_cache)
         questions = [q.strip() for q in response.content.split('\n') if q.strip() and (q.strip()[0].isdigit() or q.strip()[0] == '-')]
         self.memory.interview_session.generated_questions = questions
+        self.memory.interview_session.question_contexts = {}
         print(f"생성된 면접 질문: {questions}")
 
+    def prefetch_question_contexts(self) -> int:
+        """
+        생성된 모든 질문의 내부 DB 검색을 한꺼번에 수행해 InterviewSession에 저장합니다.
+        이후 답변 피드백에서는 저장된 결과를 사용하므로 같은 질문에 다시 답해도 검색을 반복하지 않습니다.
+        """
+        session = self.memory.interview_session
+        # 검색 전에 버전을 읽어 두어, 검색 도중 DB가 갱신되면 다음 사용 시점에 무효화되도록 합니다.
+        version = get_registry().get_index_version()
+        contexts = self.feedback_agent.search_db_batch(session.generated_questions)
+        session.question_contexts = contexts
+        session.question_contexts_version = str(version) if version is not None else None
+        print(f"면접 질문 {len(contexts)}개의 내부 DB 검색 결과를 미리 저장했습니다.")
+        return len(contexts)
+
     def start_interview(self) -> str:
+        response = self._begin_interview()
+        self.memory.interview_session.chat_history.append({"role": "assistant", "content": response})
+        return response
+
+    def _begin_interview(self) -> str:
         self.memory.interview_session.interview_started = True
         if not self.memory.interview_session.generated_questions:
-            response = "면접 질문을 먼저 생성해주세요."
-            self.memory.interview_session.chat_history.append({"role": "assistant", "content": response})
-            return response
+            return "면접 질문을 먼저 생성해주세요."
         available_questions = [q for q in self.memory.interview_session.generated_questions 
                             if q not in self.memory.interview_session.asked_questions]
         if not available_questions:
-            response = "더 이상 새로운 질문이 없습니다. 다른 주제로 질문을 생성하시겠습니까?"
-            self.memory.interview_session.chat_history.append({"role": "assistant", "content": response})
-            return response
+            return "더 이상 새로운 질문이 없습니다. 다른 주제로 질문을 생성하시겠습니까?"
         self.memory.interview_session.current_question = available_questions[0]
         self.memory.interview_session.asked_questions.append(available_questions[0])
-        response = f"첫 번째 질문: {self.memory.interview_session.current_question}"
-        self.memory.interview_session.chat_history.append({"role": "assistant", "content": response})
-        return response
+        return f"첫 번째 질문: {self.memory.interview_session.current_question}"
 
     def get_response(self, user_input: str) -> str:
+        return "".join(self._handle_turn(user_input, stream=False))
+
+    def stream_response(self, user_input: str) -> Iterator[str]:
+        """
+        get_response()의 스트리밍 버전 (app.py에서 st.write_stream으로 사용).
+        면접 답변이면 피드백 필드가 완성되는 대로 마크다운 조각을 내보내고, 그 밖의 입력은 응답을 한 번에 내보냅니다.
+        """
+        return self._handle_turn(user_input, stream=True)
+
+    def _handle_turn(self, user_input: str, stream: bool) -> Iterator[str]:
+        """
+        get_response()와 stream_response()가 함께 쓰는 대화 한 턴 처리.
+        사용자 메시지는 응답을 만들기 전에 기록하고, 응답은 끝까지 나가지 못해도(스트리밍 중단, 오류)
+        그때까지 내보낸 부분을 기록한 뒤 세션을 저장합니다.
+        """
         print(f"Processing user input: {user_input}")  # 디버깅 로그
-        self.memory.interview_session.chat_history.append({"role": "user", "content": user_input})
+        session = self.memory.interview_session
+        session.chat_history.append({"role": "user", "content": user_input})
+        parts: List[str] = []
+        try:
+            for fragment in self._turn_fragments(user_input, stream):
+                parts.append(fragment)
+                yield fragment
+        finally:
+            if parts:
+                response = "".join(parts)
+                session.chat_history.append({"role": "assistant", "content": response})
+                print(f"Generated response: {response}")
+            self.memory.save()
 
+    def _turn_fragments(self, user_input: str, stream: bool) -> Iterator[str]:
         # 면접 시작 여부 확인
         if not self.memory.interview_session.interview_started:
             if user_input.lower() in ["시작할게", "시작", "start"]:
-                return self.start_interview()
-            response = "면접을 시작하시겠습니까? '시작할게'라고 입력해주세요."
-            self.memory.interview_session.chat_history.append({"role": "assistant", "content": response})
-            print(f"Generated response: {response}")
-            return response
+                yield self._begin_interview()
+            else:
+                yield "면접을 시작하시겠습니까? '시작할게'라고 입력해주세요."
+            return
 
         # 사용자 입력 처리
         normalized_input = user_input.strip().lower()
-        if normalized_input in ["1", "다시 답변", "다시 답변하기"]:
-            response = f"같은 질문: {self.memory.interview_session.current_question}"
-            self.memory.interview_session.chat_history.append({"role": "assistant", "content": response})
-            print(f"Generated response: {response}")
-            return response
-        elif normalized_input in ["2", "심화 질문", "심화 질문 받기"]:
-            response = self._generate_followup_question()
-            self.memory.interview_session.chat_history.append({"role": "assistant", "content": response})
-            print(f"Generated response: {response}")
-            return response
-        elif normalized_input in ["3", "다른 질문", "다른 질문 받기"]:
-            response = self._get_next_question()
-            self.memory.interview_session.chat_history.append({"role": "assistant", "content": response})
-            print(f"Generated response: {response}")
-            return response
+        if normalized_input in RETRY_INPUTS + NEXT_INPUTS:
+            # 심화 질문을 고르지 않았으므로 미리 만들어 둔 심화 질문은 버립니다.
+            self.memory.interview_session.discard_speculation()
+        if normalized_input in RETRY_INPUTS:
+            yield f"같은 질문: {self.memory.interview_session.current_question}"
+        elif normalized_input in FOLLOWUP_INPUTS:
+            yield self._generate_followup_question()
+        elif normalized_input in NEXT_INPUTS:
+            yield self._get_next_question()
         else:
             # 답변으로 간주하고 피드백 생성
-            feedback = self._generate_feedback(self.memory.interview_session.current_question, user_input)
-            options_prompt = (
-                "\n\n다음 중 하나를 선택해주세요:\n"
-                "1. 같은 질문에 대해 다시 답변하기\n"
-                "2. 같은 주제에 대한 심화 질문 받기\n"
-                "3. 다른 질문 받기"
-            )
-            response = f"{feedback}\n{options_prompt}"
-            self.memory.interview_session.chat_history.append({"role": "assistant", "content": response})
-            print(f"Generated response: {response}")
-            return response
+            question = self.memory.interview_session.current_question
+            self._start_speculation(user_input)
+            if stream:
+                yield from self._stream_feedback(question, user_input)
+            else:
+                yield self._generate_feedback(question, user_input)
+            yield f"\n{OPTIONS_PROMPT}"
 
     def _generate_feedback(self, question: str, answer: str) -> str:
         print(f"Generating feedback for question: {question}, answer: {answer}")  # 디버깅 로그
         feedback_result = self.feedback_agent.analyze(
             question=question,
             answer=answer,
-            company_analysis=self.memory.company_context.analysis_report or "제공되지 않음",
-            personal_info=self.memory.personal_context.summary or "제공되지 않음"
+            company_analysis=self.company_digest(),
+            personal_info=self.memory.personal_context.summary or "제공되지 않음",
+            context_from_db=self._prefetched_db_context(question),
         )
         if "error" in feedback_result:
             return f"피드백 생성 중 오류 발생: {feedback_result['error']}"
         
-        feedback_text = (
-            f"### 피드백\n"
-            f"- **관련성**: {feedback_result['관련성']['점수']}/5 - {feedback_result['관련성']['이유']}\n\n"
-            f"- **논리성**: {feedback_result['논리성']['점수']}/5 - {feedback_result['논리성']['이유']}\n\n"
-            f"- **진정성**: {feedback_result['진정성']['점수']}/5 - {feedback_result['진정성']['이유']}\n\n"
-            f"- **직무적합성**: {feedback_result['직무적합성']['점수']}/5 - {feedback_result['직무적합성']['이유']}\n\n"
-            f"\n**전략적 코멘트**: {feedback_result['전략적코멘트']}\n"
-            f"**개선 피드백**: {feedback_result['개선피드백']}\n"
-            f"**모범 답안 예시**: {feedback_result['모범답안']}\n"
-            f"**참고 자료**: {', '.join(feedback_result['참고자료']) or '없음'}"
-        )
+        feedback_text = FEEDBACK_HEADER + "".join(format_feedback_field(name, feedback_result[name]) for name in FEEDBACK_FIELDS)
         return feedback_text
 
+    def _stream_feedback(self, question: str, answer: str) -> Iterator[str]:
+        """_generate_feedback()의 스트리밍 버전. 피드백 필드가 완성될 때마다 마크다운 조각을 내보냅니다."""
+        # 제목은 첫 필드와 함께 내보내어, 첫 필드가 나올 때까지 app.py의 스피너가 유지되도록 합니다.
+        pending = FEEDBACK_HEADER
+        for name, value in self.feedback_agent.stream_analyze(
+            question=question,
+            answer=answer,
+            company_analysis=self.company_digest(),
+            personal_info=self.memory.personal_context.summary or "제공되지 않음",
+            context_from_db=self._prefetched_db_context(question),
+        ):
+            if name == "error":
+                fragment = f"피드백 생성 중 오류 발생: {value}\n"
+            else:
+                try:
+                    fragment = format_feedback_field(name, value)
+                except (KeyError, TypeError):
+                    # 형식이 맞지 않는 필드는 건너뜁니다.
+                    continue
+            yield pending + fragment
+            pending = ""
+        if pending:
+            yield pending
+
     def _generate_followup_question(self) -> str:
         print("Generating followup question...")  # 디버깅 로그
+        session = self.memory.interview_session
+        try:
+            new_question = self._take_speculative_followup()
+            if new_question is None:
+                new_question = self._create_followup_question(session.current_question, self._last_answer(), list(session.asked_questions))
+            if new_question in session.asked_questions:
+                return "심화 질문 생성 실패: 중복된 질문입니다. 다른 옵션을 선택해주세요."
+            session.asked_questions.append(new_question)
+            session.current_question = new_question
+            return f"심화 질문: {new_question}"
+        except Exception as e:
+            print(f"Followup question generation error: {e}")
+            return f"심화 질문 생성 중 오류 발생: {e}"
+
+    def _create_followup_question(self, current_question: Optional[str], user_answer: str, asked_questions: List[str]) -> str:
+        """심화 질문 하나를 생성합니다."""
+        return _run_followup_chain(*self._followup_request(current_question, user_answer, asked_questions))
+
+    def _followup_request(self, current_question: Optional[str], user_answer: str, asked_questions: List[str]) -> Tuple[Any, Dict[str, Any]]:
+        """
+        심화 질문 생성에 쓸 (체인, 입력)을 만듭니다. 세션 상태를 읽는 부분은 여기서 끝나므로
+        _run_followup_chain()은 ChatbotCore 없이 백그라운드에서 실행할 수 있습니다.
+        """
         prompt = ChatPromptTemplate.from_template(
             """
             당신은 기술 면접관입니다. 주어진 질문과 사용자의 답변을 바탕으로,
@@ -231,24 +512,77 @@ class ChatbotCore:
             [지원자 정보 요약]: {personal_info}
             """
         )
-        chain = prompt | self.llm
+        inputs = assemble_context([
+            ContextPart("user_answer", user_answer, priority=1, min_tokens=800),
+            ContextPart("company_analysis", self.company_digest(), priority=2, min_tokens=400),
+            ContextPart("personal_info", self.memory.personal_context.summary or "제공되지 않음", priority=3, min_tokens=400),
+            ContextPart("asked_questions", ", ".join(asked_questions), priority=4, min_tokens=200),
+        ], FOLLOWUP_CONTEXT_TOKENS, empty_text="제공되지 않음")
+        inputs["current_question"] = current_question
+        return prompt | self.llm, inputs
+
+    def _last_answer(self) -> str:
+        """가장 최근의 면접 답변 (1/2/3 옵션 선택 입력은 제외)."""
+        option_inputs = RETRY_INPUTS + FOLLOWUP_INPUTS + NEXT_INPUTS
+        for message in reversed(self.memory.interview_session.chat_history):
+            if message["role"] == "user" and message["content"].strip().lower() not in option_inputs:
+                return message["content"]
+        return ""
+
+    def _start_speculation(self, answer: str):
+        """답변이 들어온 시점에 심화 질문 생성과 다음 질문의 내부 DB 검색을 백그라운드에서 시작합니다."""
+        if not self.speculative:
+            return
+        session = self.memory.interview_session
+        chain, inputs = self._followup_request(session.current_question, answer, list(session.asked_questions))
+        session.set_speculation(session.current_question, submit_background(partial(_run_followup_chain, chain, inputs)))
+        next_question = next((q for q in session.generated_questions if q not in session.asked_questions), None)
+        self._invalidate_stale_contexts()
+        if next_question and not session.has_db_context(next_question):
+            session.prefetch_db_context(next_question, submit_background(partial(self.feedback_agent.search_db, next_question)))
+
+    def _take_speculative_followup(self) -> Optional[str]:
+        """현재 질문에 대해 미리 만든 심화 질문이 있으면 (필요하면 완료를 기다려) 꺼냅니다. 없거나 실패했으면 None."""
+        session = self.memory.interview_session
+        future = session.take_speculation(session.current_question)
+        if future is None:
+            return None
         try:
-            result = chain.invoke({
-                "current_question": self.memory.interview_session.current_question,
-                "user_answer": self.memory.interview_session.chat_history[-1]["content"],
-                "asked_questions": ", ".join(self.memory.interview_session.asked_questions),
-                "company_analysis": self.memory.company_context.analysis_report or "제공되지 않음",
-                "personal_info": self.memory.personal_context.summary or "제공되지 않음"
-            })
-            new_question = result.content.strip()
-            if new_question in self.memory.interview_session.asked_questions:
-                return "심화 질문 생성 실패: 중복된 질문입니다. 다른 옵션을 선택해주세요."
-            self.memory.interview_session.asked_questions.append(new_question)
-            self.memory.interview_session.current_question = new_question
-            return f"심화 질문: {new_question}"
+            question = future.result()
+            print("미리 생성한 심화 질문을 사용합니다.")
+            return question
         except Exception as e:
-            print(f"Followup question generation error: {e}")
-            return f"심화 질문 생성 중 오류 발생: {e}"
+            print(f"경고: 미리 생성한 심화 질문을 사용할 수 없어 다시 생성합니다: {e}")
+            return None
+
+    def _prefetched_db_context(self, question: Optional[str]) -> Optional[str]:
+        """미리 가져온 내부 DB 검색 결과. 없거나 제한 시간 안에 끝나지 않으면 None (피드백 단계에서 직접 검색)."""
+        if not question:
+            return None
+        session = self.memory.interview_session
+        self._invalidate_stale_contexts()
+        if question in session.question_contexts:
+            return session.question_contexts[question]
+        future = session.prefetched_db_context(question)
+        if future is None:
+            return None
+        try:
+            return future.result(timeout=source_timeout("db"))
+        except Exception as e:
+            print(f"경고: 미리 가져온 내부 DB 검색 결과를 사용할 수 없습니다: {e}")
+            return None
+
+    def _invalidate_stale_contexts(self):
+        """세션 도중 내부 DB가 갱신되었으면 이전 DB로 검색해 둔 결과를 모두 버립니다."""
+        session = self.memory.interview_session
+        self.memory.ensure_loaded(MemoryHub.QUESTION_CONTEXTS_FIELD)
+        version = get_registry().get_index_version()
+        current = str(version) if version is not None else None
+        if session.question_contexts_version == current:
+            return
+        if session.clear_db_contexts():
+            print("내부 DB가 갱신되어 미리 가져온 검색 결과를 버립니다.")
+        session.question_contexts_version = current
 
     def _get_next_question(self) -> str:
         print("Fetching next question...")  # 디버깅 로그
@@ -0,0 +1,171 @@
+import re
+from typing import List, NamedTuple, Optional, Set, Tuple
+from bs4 import BeautifulSoup, Comment, NavigableString, Tag
+
+# 텍스트 블록을 나누는 태그. 블록 사이의 인라인 텍스트 묶음 하나하나에 점수를 매깁니다.
+BLOCK_TAGS = {
+    "p", "div", "section", "article", "main", "header", "li", "dd", "dt", "tr", "td", "th", "pre", "blockquote",
+    "h1", "h2", "h3", "h4", "h5", "h6", "caption", "figcaption",
+}
+CELL_TAGS = {"td", "th"}
+HEADING_TAGS = {"h1", "h2", "h3", "h4", "h5", "h6", "dt", "caption"}
+NOISE_TAGS = ["script", "style", "noscript", "template", "svg", "iframe", "form", "button", "select", "nav", "footer", "aside"]
+# id/class/role 이름으로 보아 메뉴, 배너, 푸터 등으로 판단되는 요소
+BOILERPLATE_WORDS = {
+    "gnb", "lnb", "snb", "nav", "menu", "footer", "breadcrumb", "cookie", "banner", "sidebar", "sitemap", "popup",
+    "modal", "quick", "util", "skip", "share", "sns", "login", "familysite", "copyright",
+}
+_ATTR_TOKEN_PREFIX_RE = re.compile(r"^[^-_]+")
+GOOD_BLOCK_CHARS = 40
+MAX_LINK_DENSITY = 0.4
+# 이웃한 좋은 블록이 이 거리 안에 있으면 짧은 블록(소제목, 표 셀, 목록 항목)도 본문으로 남깁니다.
+NEIGHBOR_DISTANCE = 3
+# 추출 결과가 너무 짧으면 점수 매기기가 실패한 것으로 보고 전체 텍스트를 사용합니다.
+MIN_MAIN_TEXT_CHARS = 200
+MIN_DEDUP_LINE_CHARS = 8
+# 명시적인 쪽 번호 형식("- 3 -", "3/12", "page 3")만 지웁니다. 숫자만 있는 줄은 표 셀(연도, 인원, 금액)일 수 있어 남깁니다.
+_PAGE_NUMBER_LINE_RE = re.compile(
+    r"^(?:[-–]\s*\d+\s*[-–]|\d+\s*/\s*\d+|page\s*\d+(?:\s*(?:/|of)\s*\d+)?)$", re.IGNORECASE
+)
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+class TextBlock(NamedTuple):
+    text: str
+    link_density: float
+    is_heading: bool
+    in_table: bool
+
+
+def _is_boilerplate_element(tag: Tag) -> bool:
+    if tag.get("role") in ("navigation", "banner", "contentinfo", "menu"):
+        return True
+    # id/class 토큰 전체나 첫 '-'/'_' 앞부분이 반복 요소 이름이어야 합니다 ('footer-inner'는 해당, 'has-sidebar'는 아님).
+    tokens = (tag.get("id") or "").split() + list(tag.get("class") or [])
+    for token in tokens:
+        token = token.lower()
+        prefix = _ATTR_TOKEN_PREFIX_RE.match(token)
+        if token in BOILERPLATE_WORDS or (prefix and prefix.group(0) in BOILERPLATE_WORDS):
+            return True
+    return False
+
+
+def _remove_boilerplate(soup: BeautifulSoup):
+    for tag in soup(NOISE_TAGS):
+        tag.decompose()
+    # header 태그는 본문 제목을 감싸는 경우도 있어 id/class로 판단된 것만 지웁니다.
+    for tag in soup.find_all(True):
+        if tag.decomposed or tag.name in ("html", "body"):
+            continue
+        if _is_boilerplate_element(tag):
+            tag.decompose()
+
+
+def _inline_text(node) -> Tuple[str, int]:
+    """인라인 요소의 (텍스트, 그중 링크 텍스트 길이)."""
+    if isinstance(node, NavigableString):
+        return ("" if isinstance(node, Comment) else str(node)), 0
+    text = node.get_text(separator=" ")
+    links = len(text) if node.name == "a" else sum(len(a.get_text(separator=" ")) for a in node.find_all("a"))
+    return text, links
+
+
+def _walk(tag: Tag, blocks: List[TextBlock], in_table: bool):
+    """문서 순서대로 블록을 모읍니다. 블록 태그 사이에 놓인 인라인 텍스트도 하나의 블록으로 봅니다."""
+    in_table = in_table or tag.name == "table"
+    parts: List[str] = []
+    link_chars = 0
+
+    def flush():
+        nonlocal parts, link_chars
+        text = _WHITESPACE_RE.sub(" ", " ".join(parts)).strip()
+        if text:
+            blocks.append(TextBlock(text, min(1.0, link_chars / len(text)), tag.name in HEADING_TAGS, in_table))
+        parts, link_chars = [], 0
+
+    for child in tag.children:
+        if isinstance(child, Tag) and child.name == "tr" and not child.find(BLOCK_TAGS - CELL_TAGS):
+            # 표는 행 단위로 묶어서 봅니다 (셀 안에 블록이 없을 때).
+            flush()
+            cells = [_WHITESPACE_RE.sub(" ", cell.get_text(separator=" ", strip=True)) for cell in child.find_all(CELL_TAGS)]
+            text = " | ".join(cell for cell in cells if cell)
+            if text:
+                links = sum(len(a.get_text(strip=True)) for a in child.find_all("a"))
+                blocks.append(TextBlock(text, min(1.0, links / len(text)), False, True))
+        elif isinstance(child, Tag) and (child.name in BLOCK_TAGS or child.find(BLOCK_TAGS)):
+            flush()
+            _walk(child, blocks, in_table)
+        else:
+            text, links = _inline_text(child)
+            parts.append(text)
+            link_chars += links
+    flush()
+
+
+def _collect_blocks(soup: BeautifulSoup) -> List[TextBlock]:
+    blocks: List[TextBlock] = []
+    _walk(soup.body or soup, blocks, False)
+    return blocks
+
+
+def _classify(block: TextBlock) -> str:
+    if block.link_density > MAX_LINK_DENSITY:
+        return "bad"
+    if len(block.text) >= GOOD_BLOCK_CHARS or (block.in_table and len(block.text) >= GOOD_BLOCK_CHARS // 4):
+        return "good"
+    return "short"
+
+
+def extract_main_text(soup: BeautifulSoup) -> str:
+    """
+    메뉴, 푸터, 배너 같은 반복 요소를 제거하고 본문 블록만 남깁니다 (soup은 변경됩니다).
+    각 블록을 텍스트 길이와 링크 밀도로 평가하고, 짧은 블록은 가까운 곳에 본문 블록이 있을 때만 남깁니다.
+    """
+    full_text = soup.get_text(separator="\n", strip=True)
+    _remove_boilerplate(soup)
+    blocks = _collect_blocks(soup)
+    labels = [_classify(block) for block in blocks]
+    good_positions = [i for i, label in enumerate(labels) if label == "good"]
+    kept = []
+    for i, (block, label) in enumerate(zip(blocks, labels)):
+        if label == "bad":
+            continue
+        if label == "short":
+            # 소제목은 뒤에 오는 본문, 그 외 짧은 블록은 앞뒤의 본문과 가까워야 합니다.
+            near = [p for p in good_positions if (0 < p - i <= NEIGHBOR_DISTANCE) or (not block.is_heading and 0 < i - p <= NEIGHBOR_DISTANCE)]
+            if not near:
+                continue
+        kept.append(block.text)
+    main_text = "\n".join(kept)
+    if len(main_text) < min(MIN_MAIN_TEXT_CHARS, len(full_text) // 2):
+        return full_text
+    return main_text
+
+
+class LineDeduplicator:
+    """
+    여러 텍스트(페이지 본문, 첨부 PDF들)에 걸쳐 이미 나온 줄을 지웁니다.
+    PDF마다 반복되는 머리말/꼬리말, 페이지 번호 줄, 본문과 PDF에 중복된 공고 문구를 줄입니다.
+    """
+    def __init__(self, min_line_chars: int = MIN_DEDUP_LINE_CHARS):
+        self.min_line_chars = min_line_chars
+        self._seen: Set[str] = set()
+        self.removed_lines = 0
+
+    def filter(self, text: Optional[str]) -> str:
+        kept = []
+        for line in (text or "").splitlines():
+            normalized = _WHITESPACE_RE.sub(" ", line).strip()
+            if not normalized:
+                continue
+            if _PAGE_NUMBER_LINE_RE.match(normalized):
+                self.removed_lines += 1
+                continue
+            if len(normalized) >= self.min_line_chars:
+                key = normalized.lower()
+                if key in self._seen:
+                    self.removed_lines += 1
+                    continue
+                self._seen.add(key)
+            kept.append(normalized)
+        return "\n".join(kept)
@@ -0,0 +1,91 @@
+import os
+import threading
+from typing import Dict, List, NamedTuple, Optional
+
+# tiktoken 인코딩을 쓸 수 없을 때(오프라인 등) 사용하는 대략적인 환산값. 한국어는 영어보다 글자당 토큰이 많습니다.
+CHARS_PER_TOKEN_FALLBACK = 2
+TRUNCATION_MARK = "\n…(이하 생략)"
+DEFAULT_ENCODING = "o200k_base"
+
+_encoder = None
+_encoder_failed = False
+_encoder_lock = threading.Lock()
+
+
+def _get_encoder():
+    """tiktoken 인코더를 한 번만 불러옵니다. 실패하면(설치되지 않았거나 인코딩 파일을 받을 수 없음) 글자 수 환산으로 대체합니다."""
+    global _encoder, _encoder_failed
+    if _encoder is None and not _encoder_failed:
+        with _encoder_lock:
+            if _encoder is None and not _encoder_failed:
+                try:
+                    import tiktoken
+                    _encoder = tiktoken.get_encoding(os.getenv("TIKTOKEN_ENCODING", DEFAULT_ENCODING))
+                except Exception as e:
+                    print(f"경고: tiktoken 인코더를 불러오지 못해 글자 수로 토큰을 추정합니다: {e}")
+                    _encoder_failed = True
+    return _encoder
+
+
+def count_tokens(text: Optional[str]) -> int:
+    if not text:
+        return 0
+    encoder = _get_encoder()
+    if encoder is None:
+        return -(-len(text) // CHARS_PER_TOKEN_FALLBACK)
+    return len(encoder.encode(text, disallowed_special=()))
+
+
+def truncate_to_tokens(text: Optional[str], max_tokens: int) -> str:
+    """max_tokens 이내로 자릅니다. 가능하면 줄 단위로 자르고 생략 표시를 붙입니다."""
+    if not text or max_tokens <= 0:
+        return ""
+    if count_tokens(text) <= max_tokens:
+        return text
+    budget = max_tokens - count_tokens(TRUNCATION_MARK)
+    if budget <= 0:
+        return ""
+    encoder = _get_encoder()
+    if encoder is None:
+        cut = text[:budget * CHARS_PER_TOKEN_FALLBACK]
+    else:
+        cut = encoder.decode(encoder.encode(text, disallowed_special=())[:budget])
+    # 마지막 줄이 중간에서 잘렸으면 앞쪽 절반 이상이 남는 경우에만 줄 경계까지 되돌립니다.
+    line_end = cut.rfind("\n")
+    if line_end > len(cut) // 2:
+        cut = cut[:line_end]
+    return cut.rstrip() + TRUNCATION_MARK
+
+
+class ContextPart(NamedTuple):
+    """
+    프롬프트에 들어갈 컨텍스트 하나. priority가 작을수록 중요합니다.
+    예산이 모자라면 priority가 큰 것부터 줄이며, min_tokens보다 적게는 줄이지 않습니다 (0이면 통째로 뺄 수 있음).
+    """
+    name: str
+    text: str
+    priority: int
+    min_tokens: int = 0
+
+
+def assemble_context(parts: List[ContextPart], token_budget: int, empty_text: str = "") -> Dict[str, str]:
+    """
+    컨텍스트들을 token_budget 안에 맞춰 {이름: 텍스트}로 돌려줍니다.
+    우선순위가 낮은 것부터 필요한 만큼만 잘라내므로, 예산이 충분하면 아무것도 바뀌지 않습니다.
+    """
+    tokens = {part.name: count_tokens(part.text) for part in parts}
+    overflow = sum(tokens.values()) - token_budget
+    result = {part.name: part.text or empty_text for part in parts}
+    if overflow <= 0:
+        return result
+    for part in sorted(parts, key=lambda p: p.priority, reverse=True):
+        if overflow <= 0:
+            break
+        keep = max(part.min_tokens, tokens[part.name] - overflow)
+        if keep >= tokens[part.name]:
+            continue
+        trimmed = truncate_to_tokens(part.text, keep)
+        overflow -= tokens[part.name] - count_tokens(trimmed)
+        result[part.name] = trimmed or empty_text
+        print(f"컨텍스트 '{part.name}' 축소: {tokens[part.name]} → {count_tokens(trimmed)}토큰")
+    return result
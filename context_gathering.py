@@ -0,0 +1,75 @@
+import os
+import time
+import threading
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, Optional
+
+# 출처별 기본 제한 시간(초). 환경 변수 CONTEXT_TIMEOUT_<출처 이름 대문자>로 바꿀 수 있습니다 (예: CONTEXT_TIMEOUT_WEB=3).
+DEFAULT_SOURCE_TIMEOUTS = {"db": 5.0, "web": 4.0}
+DEFAULT_TIMEOUT = 5.0
+NO_CONTEXT = "관련 정보 없음"
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+_background_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """
+    프로세스 전역 스레드 풀. 제한 시간을 넘긴 작업은 기다리지 않고 버리므로,
+    매 호출마다 풀을 만들고 닫으면(shutdown 대기) 느린 출처가 다시 전체를 붙잡게 됩니다.
+    """
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=int(os.getenv("CONTEXT_WORKERS", 8)), thread_name_prefix="context")
+    return _executor
+
+
+def submit_background(fn: Callable[[], Any]) -> Future:
+    """
+    결과를 나중에 쓸 수도 있는 작업(추측 실행, 미리 가져오기)을 시작합니다.
+    제한 시간이 짧은 컨텍스트 수집과 작업자를 다투지 않도록 별도의 작은 풀(BACKGROUND_WORKERS, 기본 2)에서 실행합니다.
+    """
+    global _background_executor
+    if _background_executor is None:
+        with _executor_lock:
+            if _background_executor is None:
+                _background_executor = ThreadPoolExecutor(
+                    max_workers=int(os.getenv("BACKGROUND_WORKERS", 2)), thread_name_prefix="background"
+                )
+    return _background_executor.submit(fn)
+
+
+def source_timeout(name: str) -> float:
+    default = DEFAULT_SOURCE_TIMEOUTS.get(name, DEFAULT_TIMEOUT)
+    return float(os.getenv(f"CONTEXT_TIMEOUT_{name.upper()}", default))
+
+
+def gather_contexts(sources: Dict[str, Callable[[], str]], timeouts: Optional[Dict[str, float]] = None,
+                    executor: Optional[Executor] = None) -> Dict[str, str]:
+    """
+    여러 컨텍스트 출처(내부 DB 검색, 웹 검색 등)를 동시에 실행하고 출처별 제한 시간 안에 끝난 결과만 모읍니다.
+    제한 시간을 넘기거나 오류가 난 출처는 빈 문자열이 되므로, 느린 웹 검색 하나가 피드백 전체를 지연시키지 않습니다.
+    제한 시간이 긴 작업(기업 분석 조사 등)은 executor를 따로 넘겨, 피드백용 공용 풀의 작업자를 붙잡지 않도록 합니다.
+    """
+    timeouts = timeouts or {}
+    executor = executor or _get_executor()
+    start = time.perf_counter()
+    futures: Dict[str, Future] = {name: executor.submit(fn) for name, fn in sources.items()}
+    results: Dict[str, str] = {}
+    for name, future in futures.items():
+        deadline = start + timeouts.get(name, source_timeout(name))
+        try:
+            results[name] = future.result(timeout=max(0.0, deadline - time.perf_counter())) or ""
+            print(f"컨텍스트 '{name}' 수집 완료 ({time.perf_counter() - start:.2f}초)")
+        except FutureTimeoutError:
+            future.cancel()
+            print(f"경고: 컨텍스트 '{name}' 수집이 제한 시간을 넘어 건너뜁니다.")
+            results[name] = ""
+        except Exception as e:
+            print(f"경고: 컨텍스트 '{name}' 수집 중 오류 발생: {e}")
+            results[name] = ""
+    return results
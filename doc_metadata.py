@@ -0,0 +1,93 @@
+import os
+import re
+from typing import Dict, Optional
+
+# 검색 시 사전 필터로 사용할 수 있는 메타데이터 필드 (faiss_db/docstore.sqlite의 facets 테이블에 색인됩니다)
+FACET_FIELDS = ("doc_type", "ncs_code", "job_name", "interview_format", "material_kind", "organization")
+
+DOC_TYPE_INTERVIEW = "면접자료"
+DOC_TYPE_JOB_DESCRIPTION = "직무기술서"
+DOC_TYPE_GUIDE = "면접가이드"
+DOC_TYPE_QUESTION_BANK = "질문은행"
+DOC_TYPE_OTHER = "기타"
+INTERVIEW_FORMATS = ("발표면접", "토론면접", "상황면접", "경험면접")
+
+_NCS_PREFIX_RE = re.compile(r"^(\d{1,2}-\d{1,2}-\d{1,2})\.\s*(.*)$")
+_INTERVIEW_RE = re.compile(r"(발표|토론|상황|경험)면접\s*(과제|평가도구|평가양식|도구)?\s*(\d+)?\s*(평가도구)?")
+_POSTING_RE = re.compile(r"【직무기술서】\s*공고일\s*(\d{2})\.(\d{1,2})\.(\d{1,2})\s+([^_]+?)_(.+)$")
+# cp949 파일명을 cp437로 잘못 풀어 생긴 글자(박스 그리기 문자 등)
+_MOJIBAKE_RE = re.compile(r"[─-▟Γ-ω¡-ÿ]")
+
+
+def repair_filename(name: str) -> str:
+    """한글 파일명이 ZIP 해제 과정에서 cp437로 깨진 경우(예: '▒Γ░Φ...') 원래 이름으로 되돌립니다."""
+    if not _MOJIBAKE_RE.search(name):
+        return name
+    try:
+        return name.encode("cp437").decode("cp949")
+    except (UnicodeEncodeError, UnicodeDecodeError):
+        return name
+
+
+def parse_filename(filename: str) -> Dict[str, str]:
+    """
+    data 폴더의 파일명에서 문서 종류와 검색 필터용 메타데이터를 추출합니다.
+    - 'NCS코드. 직무명_형식면접 과제 N [평가도구].hwp' -> 면접자료 (ncs_code, job_name, interview_format, material_kind, task_no)
+    - '【직무기술서】공고일 YY.M.D 기관_공고명.pdf' -> 직무기술서 (posted_date, organization, posting_title)
+    값이 없는 필드는 포함하지 않습니다.
+    """
+    stem = os.path.splitext(repair_filename(os.path.basename(filename)))[0].replace("+", " ").strip()
+    meta: Dict[str, str] = {}
+    posting = _POSTING_RE.search(stem)
+    if posting:
+        yy, month, day, organization, title = posting.groups()
+        meta.update({
+            "doc_type": DOC_TYPE_JOB_DESCRIPTION,
+            "posted_date": f"20{yy}-{int(month):02d}-{int(day):02d}",
+            "organization": organization.strip(),
+            "posting_title": title.strip(),
+        })
+        return meta
+    if "직무기술서" in stem:
+        meta["doc_type"] = DOC_TYPE_JOB_DESCRIPTION
+        return meta
+
+    ncs = _NCS_PREFIX_RE.match(stem)
+    if ncs:
+        meta["ncs_code"] = ncs.group(1)
+        stem = ncs.group(2)
+    interview = _INTERVIEW_RE.search(stem)
+    if interview:
+        kind, material, task_no, trailing_tool = interview.groups()
+        meta["doc_type"] = DOC_TYPE_INTERVIEW
+        meta["interview_format"] = f"{kind}면접"
+        # '평가도구'/'평가양식'은 채점 기준, '과제'/'도구'는 지원자에게 주어지는 문항입니다.
+        is_rubric = trailing_tool is not None or material in ("평가도구", "평가양식")
+        meta["material_kind"] = "평가도구" if is_rubric else "과제"
+        if task_no:
+            meta["task_no"] = task_no
+        job_name = stem[:interview.start()].rstrip(" _")
+        if job_name:
+            meta["job_name"] = job_name
+        return meta
+
+    if "가이드" in stem:
+        meta["doc_type"] = DOC_TYPE_GUIDE
+    elif filename.lower().endswith(".csv"):
+        meta["doc_type"] = DOC_TYPE_QUESTION_BANK
+    else:
+        meta["doc_type"] = DOC_TYPE_OTHER
+    return meta
+
+
+def metadata_filter_from(
+    doc_type=None, ncs_code: Optional[str] = None, interview_format: Optional[str] = None,
+    material_kind: Optional[str] = None, organization: Optional[str] = None,
+) -> Optional[Dict]:
+    """retriever에 넘길 사전 필터를 만듭니다. 각 값은 문자열 또는 문자열 목록(OR)입니다. 조건이 없으면 None."""
+    conditions = {
+        "doc_type": doc_type, "ncs_code": ncs_code, "interview_format": interview_format,
+        "material_kind": material_kind, "organization": organization,
+    }
+    conditions = {field: value for field, value in conditions.items() if value}
+    return conditions or None
@@ -0,0 +1,149 @@
+import os
+import re
+import time
+import sqlite3
+import hashlib
+import threading
+import unicodedata
+from array import array
+from typing import Dict, List
+from langchain_core.embeddings import Embeddings
+
+DEFAULT_CACHE_PATH = os.path.join(".cache", "embeddings.sqlite")
+DEFAULT_MAX_ENTRIES = 500_000
+# SQLite의 바인딩 변수 개수 제한을 넘지 않도록 IN 조회를 나누는 크기
+_LOOKUP_BATCH = 500
+_WHITESPACE_RE = re.compile(r"\s+")
+
+def normalize_text(text: str) -> str:
+    """같은 내용이 공백이나 유니코드 정규화 차이로 다른 키가 되지 않도록 정리합니다."""
+    return _WHITESPACE_RE.sub(" ", unicodedata.normalize("NFC", text)).strip()
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    (모델명, 정규화된 청크 해시) -> 임베딩 벡터를 저장하는 SQLite 캐시.
+    벡터는 float32 바이트로 저장하며, 항목 수가 max_entries를 넘으면 가장 오래 사용되지 않은 항목부터 지웁니다.
+    """
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " model TEXT NOT NULL, text_hash TEXT NOT NULL, vector BLOB NOT NULL, last_used REAL NOT NULL,"
+            " PRIMARY KEY (model, text_hash))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings(last_used)")
+        self._conn.commit()
+
+    def get_many(self, model: str, hashes: List[str]) -> Dict[str, List[float]]:
+        found: Dict[str, List[float]] = {}
+        unique = list(dict.fromkeys(hashes))
+        with self._lock:
+            for start in range(0, len(unique), _LOOKUP_BATCH):
+                batch = unique[start:start + _LOOKUP_BATCH]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings WHERE model = ? AND text_hash IN ({placeholders})",
+                    [model, *batch],
+                ).fetchall()
+                for key, blob in rows:
+                    vector = array("f")
+                    vector.frombytes(blob)
+                    found[key] = vector.tolist()
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE model = ? AND text_hash = ?",
+                    [(now, model, key) for key in found],
+                )
+                self._conn.commit()
+        return found
+
+    def put_many(self, model: str, items: Dict[str, List[float]]):
+        if not items:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, text_hash, vector, last_used) VALUES (?, ?, ?, ?)",
+                [(model, key, array("f", vector).tobytes(), now) for key, vector in items.items()],
+            )
+            self._conn.commit()
+            self._evict_if_needed()
+
+    def _evict_if_needed(self):
+        count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        if count <= self.max_entries:
+            return
+        # 한 번에 10% 여유를 두고 지워서 삽입할 때마다 삭제가 일어나지 않도록 합니다.
+        excess = count - int(self.max_entries * 0.9)
+        self._conn.execute(
+            "DELETE FROM embeddings WHERE rowid IN (SELECT rowid FROM embeddings ORDER BY last_used LIMIT ?)",
+            (excess,),
+        )
+        self._conn.commit()
+        print(f"임베딩 캐시 정리: 오래된 항목 {excess}개 삭제")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    임베딩 클라이언트를 감싸 캐시에 없는 텍스트만 실제 API로 요청합니다.
+    한 번의 embed_documents 호출 안에서 캐시 조회와 미스 계산을 모두 일괄 처리합니다.
+    """
+    def __init__(self, underlying: Embeddings, model_name: str, cache: EmbeddingCache):
+        self.underlying = underlying
+        self.model_name = model_name
+        self.cache = cache
+        self.hits = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [text_hash(t) for t in texts]
+        cached = self.cache.get_many(self.model_name, keys)
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in cached and key not in missing:
+                missing[key] = text
+        if missing:
+            vectors = self.underlying.embed_documents(list(missing.values()))
+            computed = dict(zip(missing.keys(), vectors))
+            self.cache.put_many(self.model_name, computed)
+            cached.update(computed)
+        with self._stats_lock:
+            self.misses += len(missing)
+            self.hits += len(texts) - len(missing)
+        return [cached[key] for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        key = text_hash(text)
+        cached = self.cache.get_many(self.model_name, [key])
+        if key in cached:
+            with self._stats_lock:
+                self.hits += 1
+            return cached[key]
+        vector = self.underlying.embed_query(text)
+        self.cache.put_many(self.model_name, {key: vector})
+        with self._stats_lock:
+            self.misses += 1
+        return vector
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats_summary(self) -> str:
+        return f"임베딩 캐시: 적중 {self.hits}건, 미스 {self.misses}건 (적중률 {self.hit_rate:.1%}), 저장 항목 {len(self.cache)}개"
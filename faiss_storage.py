@@ -0,0 +1,257 @@
+import os
+import json
+import sqlite3
+import threading
+from collections.abc import Mapping
+from typing import Dict, Iterator, List, Optional, Union
+from urllib.request import pathname2url
+import numpy as np
+import faiss
+from langchain_core.documents import Document
+from langchain_community.docstore.base import Docstore
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+from ann_index import load_ann_index, make_filtered_search_params, read_index
+from doc_metadata import FACET_FIELDS
+
+INDEX_NAME = "index.faiss"
+DOCSTORE_NAME = "docstore.sqlite"
+LEGACY_PICKLE_NAME = "index.pkl"
+
+
+def _connect_read_only(path: str) -> sqlite3.Connection:
+    uri = "file:" + pathname2url(os.path.abspath(path)) + "?mode=ro"
+    return sqlite3.connect(uri, uri=True, check_same_thread=False)
+
+
+def _filter_key(metadata_filter: Dict) -> tuple:
+    return tuple(sorted(
+        (field, tuple(sorted(str(v) for v in value)) if isinstance(value, (list, tuple, set)) else (str(value),))
+        for field, value in metadata_filter.items()
+    ))
+
+
+class SQLiteDocstore(Docstore):
+    """
+    청크 본문과 메타데이터를 SQLite에 보관하는 읽기 전용 docstore.
+    검색 결과(top-k)에 해당하는 행만 id로 조회하므로, 전체 docstore를 메모리에 올리지 않습니다.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._conn = _connect_read_only(path)
+        self._lock = threading.Lock()
+        self._facet_cache: Dict[tuple, np.ndarray] = {}
+        self._facet_doc_id_cache: Dict[tuple, frozenset] = {}
+        with self._lock:
+            self.has_facets = self._conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'facets'"
+            ).fetchone() is not None
+
+    def search(self, search: str) -> Union[str, Document]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT page_content, metadata FROM docs WHERE doc_id = ?", (search,)
+            ).fetchone()
+        if row is None:
+            return f"ID {search} not found."
+        return Document(id=search, page_content=row[0], metadata=json.loads(row[1]))
+
+    def get_many(self, ids: List[str]) -> Dict[str, Document]:
+        if not ids:
+            return {}
+        placeholders = ",".join("?" * len(ids))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT doc_id, page_content, metadata FROM docs WHERE doc_id IN ({placeholders})", ids
+            ).fetchall()
+        return {doc_id: Document(id=doc_id, page_content=text, metadata=json.loads(meta)) for doc_id, text, meta in rows}
+
+    def get_by_faiss_idx(self, faiss_ids: List[int]) -> List[Document]:
+        """FAISS 행 번호 순서대로 청크를 반환합니다."""
+        if not faiss_ids:
+            return []
+        placeholders = ",".join("?" * len(faiss_ids))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT faiss_idx, doc_id, page_content, metadata FROM docs WHERE faiss_idx IN ({placeholders})",
+                [int(i) for i in faiss_ids],
+            ).fetchall()
+        by_idx = {idx: Document(id=doc_id, page_content=text, metadata=json.loads(meta)) for idx, doc_id, text, meta in rows}
+        return [by_idx[int(i)] for i in faiss_ids if int(i) in by_idx]
+
+    def faiss_ids_for(self, metadata_filter: Dict) -> np.ndarray:
+        """
+        메타데이터 필터(필드 -> 값 또는 값 목록)에 해당하는 FAISS 행 번호를 facets 테이블에서 찾습니다.
+        DB 버전이 바뀌면 docstore도 새로 열리므로 결과를 필터별로 캐시합니다.
+        """
+        key = _filter_key(metadata_filter)
+        cached = self._facet_cache.get(key)
+        if cached is not None:
+            return cached
+        selected: Optional[np.ndarray] = None
+        with self._lock:
+            for field, values in key:
+                placeholders = ",".join("?" * len(values))
+                rows = self._conn.execute(
+                    f"SELECT faiss_idx FROM facets WHERE field = ? AND value IN ({placeholders})",
+                    [field, *values],
+                ).fetchall()
+                ids = np.fromiter((r[0] for r in rows), dtype="int64", count=len(rows))
+                selected = ids if selected is None else np.intersect1d(selected, ids, assume_unique=True)
+        selected = np.unique(selected) if selected is not None else np.empty(0, dtype="int64")
+        self._facet_cache[key] = selected
+        return selected
+
+    def doc_ids_for(self, metadata_filter: Dict) -> frozenset:
+        """메타데이터 필터에 해당하는 청크 id 집합 (어휘 검색의 사전 필터용)."""
+        key = _filter_key(metadata_filter)
+        cached = self._facet_doc_id_cache.get(key)
+        if cached is None:
+            selected = self.faiss_ids_for(metadata_filter)
+            with self._lock:
+                self._conn.execute("CREATE TEMP TABLE IF NOT EXISTS selected_rows (faiss_idx INTEGER PRIMARY KEY)")
+                self._conn.execute("DELETE FROM selected_rows")
+                self._conn.executemany("INSERT INTO selected_rows VALUES (?)", ((int(i),) for i in selected))
+                rows = self._conn.execute(
+                    "SELECT d.doc_id FROM docs d JOIN selected_rows s ON s.faiss_idx = d.faiss_idx"
+                ).fetchall()
+            cached = frozenset(r[0] for r in rows)
+            self._facet_doc_id_cache[key] = cached
+        return cached
+
+    def delete(self, ids: List) -> None:
+        raise NotImplementedError("SQLiteDocstore는 읽기 전용입니다. load_vector_db_for_update()로 불러와 수정하세요.")
+
+
+class LazyIndexToDocstoreId(Mapping):
+    """FAISS 행 번호 -> 청크 id 매핑을 SQLite에서 필요한 만큼만 조회하는 dict 대체 객체."""
+    def __init__(self, docstore: SQLiteDocstore):
+        self._docstore = docstore
+
+    def __getitem__(self, faiss_idx: int) -> str:
+        with self._docstore._lock:
+            row = self._docstore._conn.execute(
+                "SELECT doc_id FROM docs WHERE faiss_idx = ?", (int(faiss_idx),)
+            ).fetchone()
+        if row is None:
+            raise KeyError(faiss_idx)
+        return row[0]
+
+    def __iter__(self) -> Iterator[int]:
+        with self._docstore._lock:
+            rows = self._docstore._conn.execute("SELECT faiss_idx FROM docs ORDER BY faiss_idx").fetchall()
+        return iter(r[0] for r in rows)
+
+    def __len__(self) -> int:
+        with self._docstore._lock:
+            return self._docstore._conn.execute("SELECT COUNT(*) FROM docs").fetchone()[0]
+
+
+def has_vector_db(db_path: str) -> bool:
+    return os.path.exists(os.path.join(db_path, INDEX_NAME)) and (
+        os.path.exists(os.path.join(db_path, DOCSTORE_NAME))
+        or os.path.exists(os.path.join(db_path, LEGACY_PICKLE_NAME))
+    )
+
+
+def is_legacy_format(db_path: str) -> bool:
+    """FAISS.save_local이 만든 pickle 기반 DB인지 확인합니다."""
+    return os.path.exists(os.path.join(db_path, LEGACY_PICKLE_NAME)) and not os.path.exists(
+        os.path.join(db_path, DOCSTORE_NAME)
+    )
+
+
+def load_vector_db(db_path: str, embeddings, mmap: bool = True) -> FAISS:
+    """
+    조회용 벡터스토어를 엽니다. 인덱스는 메모리 매핑으로 열어 여러 워커 프로세스가 같은 페이지를 공유하고,
+    docstore는 SQLite에서 필요한 청크만 읽습니다. 이전 형식(index.pkl)만 있으면 기존 방식으로 로드합니다.
+    현재 DB와 동기화된 근사 인덱스(IVF/HNSW)가 있으면 flat 인덱스 대신 사용합니다.
+    """
+    index_path = os.path.join(db_path, INDEX_NAME)
+    docstore_path = os.path.join(db_path, DOCSTORE_NAME)
+    if not os.path.exists(docstore_path):
+        return FAISS.load_local(db_path, embeddings=embeddings, allow_dangerous_deserialization=True)
+    index = load_ann_index(db_path, index_path, mmap=mmap)
+    if index is None:
+        index = read_index(index_path, mmap)
+    docstore = SQLiteDocstore(docstore_path)
+    return FAISS(embeddings, index, docstore, LazyIndexToDocstoreId(docstore))
+
+
+def filtered_similarity_search(vectorstore: FAISS, query: str, k: int, metadata_filter: Optional[Dict]) -> List[Document]:
+    """
+    메타데이터 필터에 해당하는 행만 대상으로 유사도 검색을 합니다.
+    SQLite docstore의 facets 색인으로 행 번호를 구해 faiss IDSelector로 넘기므로, 큰 top-k를 뽑아 사후 필터링하지 않습니다.
+    facets 색인이 없는 이전 형식의 DB는 LangChain의 사후 필터링으로 대체합니다.
+    """
+    if not metadata_filter:
+        return vectorstore.similarity_search(query, k=k)
+    docstore = vectorstore.docstore
+    if not isinstance(docstore, SQLiteDocstore) or not docstore.has_facets:
+        return vectorstore.similarity_search(query, k=k, filter=metadata_filter)
+    selected = docstore.faiss_ids_for(metadata_filter)
+    if len(selected) == 0:
+        return []
+    vector = np.array([vectorstore.embedding_function.embed_query(query)], dtype="float32")
+    if vectorstore._normalize_L2:
+        faiss.normalize_L2(vector)
+    params = make_filtered_search_params(vectorstore.index, selected)
+    _, indices = vectorstore.index.search(vector, min(k, len(selected)), params=params)
+    return docstore.get_by_faiss_idx([int(i) for i in indices[0] if i >= 0])
+
+
+def load_vector_db_for_update(db_path: str, embeddings) -> FAISS:
+    """추가/삭제가 가능하도록 인덱스와 docstore 전체를 메모리로 읽어옵니다 (DB 빌드 전용)."""
+    docstore_path = os.path.join(db_path, DOCSTORE_NAME)
+    if not os.path.exists(docstore_path):
+        return FAISS.load_local(db_path, embeddings=embeddings, allow_dangerous_deserialization=True)
+    index = faiss.read_index(os.path.join(db_path, INDEX_NAME))
+    conn = _connect_read_only(docstore_path)
+    try:
+        rows = conn.execute("SELECT faiss_idx, doc_id, page_content, metadata FROM docs ORDER BY faiss_idx").fetchall()
+    finally:
+        conn.close()
+    docs = {doc_id: Document(id=doc_id, page_content=text, metadata=json.loads(meta)) for _, doc_id, text, meta in rows}
+    index_to_docstore_id = {faiss_idx: doc_id for faiss_idx, doc_id, _, _ in rows}
+    return FAISS(embeddings, index, InMemoryDocstore(docs), index_to_docstore_id)
+
+
+def save_vector_db(vectorstore: FAISS, db_path: str):
+    """
+    인덱스는 index.faiss로, 청크 본문/메타데이터는 docstore.sqlite로 저장합니다 (pickle 사용 안 함).
+    두 파일 모두 임시 파일에 쓴 뒤 교체하므로 읽는 쪽이 반쯤 쓰인 파일을 보지 않습니다.
+    """
+    os.makedirs(db_path, exist_ok=True)
+    docstore_path = os.path.join(db_path, DOCSTORE_NAME)
+    index_path = os.path.join(db_path, INDEX_NAME)
+    tmp_docstore = docstore_path + ".tmp"
+    if os.path.exists(tmp_docstore):
+        os.remove(tmp_docstore)
+    conn = sqlite3.connect(tmp_docstore)
+    try:
+        conn.execute(
+            "CREATE TABLE docs (faiss_idx INTEGER PRIMARY KEY, doc_id TEXT NOT NULL UNIQUE,"
+            " page_content TEXT NOT NULL, metadata TEXT NOT NULL)"
+        )
+        rows, facet_rows = [], []
+        for faiss_idx, doc_id in vectorstore.index_to_docstore_id.items():
+            doc = vectorstore.docstore.search(doc_id)
+            if not isinstance(doc, Document):
+                raise ValueError(f"docstore에서 청크 '{doc_id}'를 찾을 수 없습니다.")
+            rows.append((int(faiss_idx), doc_id, doc.page_content, json.dumps(doc.metadata, ensure_ascii=False, default=str)))
+            facet_rows.extend((field, str(doc.metadata[field]), int(faiss_idx)) for field in FACET_FIELDS if doc.metadata.get(field))
+        conn.executemany("INSERT INTO docs VALUES (?, ?, ?, ?)", rows)
+        # 메타데이터 사전 필터용 색인: (필드, 값) -> FAISS 행 번호
+        conn.execute("CREATE TABLE facets (field TEXT NOT NULL, value TEXT NOT NULL, faiss_idx INTEGER NOT NULL)")
+        conn.executemany("INSERT INTO facets VALUES (?, ?, ?)", facet_rows)
+        conn.execute("CREATE INDEX idx_facets ON facets(field, value)")
+        conn.commit()
+    finally:
+        conn.close()
+    tmp_index = index_path + ".tmp"
+    faiss.write_index(vectorstore.index, tmp_index)
+    os.replace(tmp_docstore, docstore_path)
+    os.replace(tmp_index, index_path)
+    legacy_path = os.path.join(db_path, LEGACY_PICKLE_NAME)
+    if os.path.exists(legacy_path):
+        os.remove(legacy_path)
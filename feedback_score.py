@@ -4,13 +4,22 @@ import traceback
 from dotenv import load_dotenv
 
 # [개선점 1] LangChain의 구성 요소를 직접 활용합니다.
-from langchain_openai import AzureChatOpenAI, AzureOpenAIEmbeddings
-from langchain_community.vectorstores import FAISS
 from langchain_community.tools import DuckDuckGoSearchRun
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import JsonOutputParser
 from pydantic import BaseModel, Field
-from typing import List, Dict
+from typing import Any, Iterator, List, Dict, Optional, Tuple
+from langchain_core.caches import BaseCache
+from langchain_core.load import dumps
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration
+from resource_registry import get_registry
+from embedding_cache import CachedEmbeddings
+from llm_cache import bypass_llm_cache
+from context_gathering import NO_CONTEXT, gather_contexts
+from incremental_json import IncrementalJSONFieldParser
+from context_budget import ContextPart, assemble_context
+from doc_metadata import DOC_TYPE_GUIDE, DOC_TYPE_INTERVIEW, DOC_TYPE_QUESTION_BANK, metadata_filter_from
 
 # --- 환경 변수 및 클라이언트 초기화 ---
 load_dotenv()
@@ -30,29 +39,60 @@ class Feedback(BaseModel):
     모범답안: str = Field(description="지원자의 배경과 회사 인재상을 반영한 STAR 기법 기반 모범답안 예시")
     참고자료: List[str] = Field(description="웹검색 또는 내부 DB 기반의 참고 정보 요약")
 
+# 답변 피드백에는 면접 자료만 참고합니다 (채용 공고의 직무기술서는 제외).
+FEEDBACK_DOC_TYPES = [DOC_TYPE_INTERVIEW, DOC_TYPE_GUIDE, DOC_TYPE_QUESTION_BANK]
+# 참고 컨텍스트(회사 요약, 지원자 요약, DB 검색, 웹 검색) 전체의 토큰 예산. 넘으면 웹 → DB → 지원자 → 회사 순으로 줄입니다.
+FEEDBACK_CONTEXT_TOKENS = int(os.getenv("FEEDBACK_CONTEXT_TOKENS", 3000))
+
 # --- [개선점 4] 전체 로직을 클래스로 캡슐화 ---
 class FeedbackAgent:
     def __init__(self):
-        self.llm = AzureChatOpenAI(
-            azure_deployment=os.getenv("AZURE_OPENAI_DEPLOYMENT", "gpt-4o-mini"),
+        self.llm = get_registry().get_chat_llm(
+            os.getenv("AZURE_OPENAI_DEPLOYMENT", "gpt-4o-mini"),
             temperature=0.3,
-            max_tokens=1500
+            max_tokens=1500,
+            cache=True
         )
-        self.retriever = self._load_retriever()
         self.web_search = DuckDuckGoSearchRun(region='kr-kr')
         self.parser = JsonOutputParser(pydantic_object=Feedback)
         self.prompt = self._create_prompt()
         self.chain = self.prompt | self.llm | self.parser
 
-    def _load_retriever(self, db_path="faiss_db"):
-        if os.path.exists(db_path):
-            try:
-                embeddings = AzureOpenAIEmbeddings(model="text-embedding-3-small")
-                vectorstore = FAISS.load_local(db_path, embeddings=embeddings, allow_dangerous_deserialization=True)
-                return vectorstore.as_retriever(search_kwargs={'k': 3})
-            except Exception as e:
-                print(f"Warning: Failed to load FAISS DB. RAG will be disabled. Error: {e}")
-        return None
+    @property
+    def retriever(self):
+        # 공유 레지스트리에서 가져오므로 DB가 갱신되면 다음 호출부터 새 인덱스를 사용합니다.
+        return self._load_retriever()
+
+    def _load_retriever(self, interview_format: Optional[str] = None):
+        metadata_filter = metadata_filter_from(doc_type=FEEDBACK_DOC_TYPES, interview_format=interview_format)
+        retriever = get_registry().get_retriever(k=3, metadata_filter=metadata_filter)
+        if retriever is None:
+            print("Warning: FAISS DB is not available. RAG will be disabled.")
+        return retriever
+
+    def search_db(self, question: str, interview_format: Optional[str] = None) -> str:
+        """질문 하나로 내부 DB를 검색해 문서 본문을 이어 붙여 반환합니다. DB가 없으면 빈 문자열."""
+        retriever = self._load_retriever(interview_format) if interview_format else self.retriever
+        if not retriever:
+            return ""
+        docs = retriever.invoke(question)
+        return "\n\n".join([d.page_content for d in docs])
+
+    def search_db_batch(self, questions: List[str], interview_format: Optional[str] = None) -> Dict[str, str]:
+        """
+        여러 질문의 내부 DB 검색을 한꺼번에 수행해 {질문: 검색 결과}를 반환합니다.
+        질문 임베딩을 한 번의 API 호출로 만들어 임베딩 캐시에 넣은 뒤 검색을 동시에 실행하므로,
+        각 검색의 질의 임베딩은 캐시에서 바로 읽힙니다. DB가 없으면 빈 dict를 반환합니다.
+        """
+        questions = list(dict.fromkeys(q for q in questions if q))
+        retriever = self._load_retriever(interview_format) if interview_format else self.retriever
+        if not retriever or not questions:
+            return {}
+        embeddings = get_registry().get_embeddings()
+        if isinstance(embeddings, CachedEmbeddings):
+            embeddings.embed_documents(questions)
+        results = retriever.batch(questions)
+        return {q: "\n\n".join([d.page_content for d in docs]) for q, docs in zip(questions, results)}
 
     def _create_prompt(self):
         # [개선점 3] 프롬프트를 강화하여 agentA의 심층 분석 결과를 활용하도록 지시
@@ -98,33 +138,71 @@ class FeedbackAgent:
             partial_variables={"format_instructions": self.parser.get_format_instructions()}
         )
 
-    def analyze(self, question: str, answer: str, company_analysis: str = "", personal_info: str = "") -> Dict:
+    def _build_inputs(self, question: str, answer: str, company_analysis: str, personal_info: str,
+                      interview_format: Optional[str], context_from_db: Optional[str] = None) -> Dict:
+        # [개선점 2] 질문을 기반으로 RAG와 웹 검색을 동시에 수행 (출처별 제한 시간 초과 시 "관련 정보 없음")
+        sources = {"web": lambda: self.web_search.run(f"{company_analysis[:50]} {question}")}
+        if context_from_db is None:
+            sources["db"] = lambda: self.search_db(question, interview_format)
+        contexts = gather_contexts(sources)
+        if context_from_db is not None:
+            contexts["db"] = context_from_db
+        inputs = assemble_context([
+            ContextPart("company_analysis", company_analysis or "제공되지 않음", priority=1, min_tokens=400),
+            ContextPart("personal_info", personal_info or "제공되지 않음", priority=2, min_tokens=400),
+            ContextPart("context_from_db", contexts["db"] or NO_CONTEXT, priority=3),
+            ContextPart("web_context", contexts["web"] or NO_CONTEXT, priority=4),
+        ], FEEDBACK_CONTEXT_TOKENS, empty_text=NO_CONTEXT)
+        inputs.update(question=question, answer=answer)
+        return inputs
+
+    def analyze(self, question: str, answer: str, company_analysis: str = "", personal_info: str = "",
+                interview_format: Optional[str] = None, use_cache: bool = True,
+                context_from_db: Optional[str] = None) -> Dict:
         """
         모든 정보를 종합하여 지원자의 답변을 분석하고 JSON 형식의 피드백을 반환합니다.
+        interview_format(발표면접/토론면접/상황면접/경험면접)을 주면 해당 형식의 면접 자료만 검색합니다.
+        같은 질문/답변/컨텍스트에 대한 피드백은 응답 캐시에서 돌려주며, use_cache=False이면 항상 새로 생성합니다.
+        context_from_db를 주면(미리 가져온 내부 DB 검색 결과) 검색을 다시 하지 않고 그 값을 사용합니다.
         """
         try:
-            # [개선점 2] 질문을 기반으로 RAG 및 웹 검색 수행
-            context_from_db = ""
-            if self.retriever:
-                docs = self.retriever.invoke(question)
-                context_from_db = "\n\n".join([d.page_content for d in docs])
-
-            web_context = self.web_search.run(f"{company_analysis[:50]} {question}")
-
-            # LCEL 체인 실행
-            result = self.chain.invoke({
-                "question": question,
-                "answer": answer,
-                "company_analysis": company_analysis or "제공되지 않음",
-                "personal_info": personal_info or "제공되지 않음",
-                "context_from_db": context_from_db or "관련 정보 없음",
-                "web_context": web_context or "관련 정보 없음",
-            })
-            return result
+            inputs = self._build_inputs(question, answer, company_analysis, personal_info, interview_format, context_from_db)
+            if use_cache:
+                return self.chain.invoke(inputs)
+            with bypass_llm_cache():
+                return self.chain.invoke(inputs)
         except Exception as e:
             traceback.print_exc()
             return {"error": str(e)}
 
+    def stream_analyze(self, question: str, answer: str, company_analysis: str = "", personal_info: str = "",
+                       interview_format: Optional[str] = None, use_cache: bool = True,
+                       context_from_db: Optional[str] = None) -> Iterator[Tuple[str, Any]]:
+        """
+        analyze()의 스트리밍 버전. LLM 토큰을 받는 대로 파싱하여 피드백 필드(관련성, 논리성, ..., 모범답안)가
+        완성될 때마다 (필드명, 값)을 내보냅니다. 오류가 나면 ("error", 메시지)를 내보냅니다.
+        응답 캐시는 analyze()와 같은 키를 사용하므로, 캐시에 있으면 한 번에 모든 필드를 내보냅니다.
+        """
+        try:
+            inputs = self._build_inputs(question, answer, company_analysis, personal_info, interview_format, context_from_db)
+            messages = self.prompt.invoke(inputs).to_messages()
+            field_parser = IncrementalJSONFieldParser()
+            llm_cache = self.llm.cache if use_cache and isinstance(self.llm.cache, BaseCache) else None
+            prompt_key = dumps(messages)
+            if llm_cache is not None:
+                cached = llm_cache.lookup(prompt_key, "")
+                if cached:
+                    yield from field_parser.feed(cached[0].text)
+                    return
+            # stream()은 LangChain의 캐시를 거치지 않으므로 위에서 직접 조회하고 아래에서 직접 저장합니다.
+            for chunk in self.llm.stream(messages):
+                yield from field_parser.feed(chunk.content)
+            if llm_cache is not None and field_parser.text:
+                llm_cache.update(prompt_key, "", [ChatGeneration(message=AIMessage(content=field_parser.text))])
+        except Exception as e:
+            traceback.print_exc()
+            yield "error", str(e)
+
 # --- 단독 실행 테스트용 ---
 if __name__ == "__main__":
     # 1. 피드백 에이전트 생성
@@ -5,8 +5,15 @@ import re
 import unicodedata
 import olefile
 import zlib
+import xml.etree.ElementTree as ET
 import struct
+import time
+import pandas as pd
 from langchain_core.documents import Document
+from langchain_community.document_loaders import PyMuPDFLoader
+from doc_metadata import parse_filename
+
+SUPPORTED_EXTENSIONS = ['.pdf', '.hwp', '.hwpx', '.csv']
 
 def remove_chinese_characters(s: str) -> str:
     return re.sub(r'[\u4e00-\u9fff]+', '', s)
@@ -14,18 +21,65 @@ def remove_chinese_characters(s: str) -> str:
 def remove_control_characters(s: str) -> str:
     return "".join(ch for ch in s if unicodedata.category(ch)[0] != "C")
 
+def _build_strip_pattern() -> re.Pattern:
+    """
+    한자(U+4E00~U+9FFF)와 BMP 영역의 제어/미할당 문자(category C) 코드 포인트 표를 만들고,
+    연속 구간으로 묶어 하나의 문자 클래스 정규식으로 미리 컴파일합니다.
+    """
+    codepoints = set(range(0x4e00, 0xa000))
+    codepoints.update(cp for cp in range(0x10000) if unicodedata.category(chr(cp))[0] == "C")
+    ranges = []
+    for cp in sorted(codepoints):
+        if ranges and cp == ranges[-1][1] + 1:
+            ranges[-1][1] = cp
+        else:
+            ranges.append([cp, cp])
+    char_class = "".join(
+        re.escape(chr(lo)) if lo == hi else f"{re.escape(chr(lo))}-{re.escape(chr(hi))}" for lo, hi in ranges
+    )
+    return re.compile(f"[{char_class}]+")
+
+_STRIP_RE = _build_strip_pattern()
+_ASTRAL_RE = re.compile('[\U00010000-\U0010ffff]')
+
+def clean_extracted_text(s: str) -> str:
+    """
+    remove_control_characters(remove_chinese_characters(s))와 같은 결과를 정규식 한 번으로 얻습니다.
+    BMP 밖의 문자는 드물기 때문에, 있을 때만 문자 단위 검사를 추가로 수행합니다.
+    """
+    s = _STRIP_RE.sub('', s)
+    if _ASTRAL_RE.search(s):
+        s = remove_control_characters(s)
+    return s
+
 class HWPExtractor:
     FILE_HEADER_SECTION = "FileHeader"
     HWP_SUMMARY_SECTION = "\x05HwpSummaryInformation"
     SECTION_NAME_LENGTH = len("Section")
     BODYTEXT_SECTION = "BodyText"
     HWP_TEXT_TAGS = [67]
+    # 레코드 길이 필드가 0xfff이면 실제 길이는 헤더 뒤의 4바이트에 기록됩니다.
+    EXTENDED_SIZE = 0xfff
+    _RECORD_HEADER = struct.Struct("<I")
     def __init__(self, filename):
         self._ole = olefile.OleFileIO(filename)
         self._dirs = self._ole.listdir()
-        if not self.is_valid(): raise Exception("유효한 HWP 파일이 아닙니다.")
+        if not self.is_valid():
+            self._ole.close()
+            raise Exception("유효한 HWP 파일이 아닙니다.")
         self._compressed = self.is_compressed()
-        self.text = self._get_text()
+        self._text = None
+    def __enter__(self):
+        return self
+    def __exit__(self, *exc):
+        self.close()
+    def close(self):
+        self._ole.close()
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            self._text = "\n".join(self.iter_section_texts())
+        return self._text
     def is_valid(self) -> bool:
         return [self.FILE_HEADER_SECTION] in self._dirs and [self.HWP_SUMMARY_SECTION] in self._dirs
     def is_compressed(self) -> bool:
@@ -36,34 +90,156 @@ class HWPExtractor:
         m = [int(d[1][self.SECTION_NAME_LENGTH:]) for d in self._dirs if d[0] == self.BODYTEXT_SECTION]
         return ["BodyText/Section" + str(x) for x in sorted(m)]
     def get_text(self) -> str: return self.text
-    def _get_text(self) -> str:
-        sections = self.get_body_sections()
-        text_parts = [self._get_text_from_section(section) for section in sections]
-        return "\n".join(text_parts)
+    def iter_section_texts(self):
+        """섹션을 하나씩 읽고 압축 해제하여 텍스트를 내보냅니다. 한 번에 한 섹션만 메모리에 올라갑니다."""
+        for section in self.get_body_sections():
+            yield self._get_text_from_section(section)
+    def _read_section(self, section: str) -> bytes:
+        data = self._ole.openstream(section).read()
+        return zlib.decompress(data, -15) if self._compressed else data
     def _get_text_from_section(self, section: str) -> str:
-        bodytext = self._ole.openstream(section)
-        data = bodytext.read()
-        unpacked_data = zlib.decompress(data, -15) if self._compressed else data
-        size = len(unpacked_data)
+        """
+        레코드 헤더를 따라가며 텍스트 레코드만 디코딩합니다.
+        memoryview로 복사 없이 레코드를 가리키고, 조각은 리스트에 모아 한 번에 합친 뒤 정리합니다.
+        """
+        view = memoryview(self._read_section(section))
+        size = len(view)
+        unpack = self._RECORD_HEADER.unpack_from
+        text_tags = self.HWP_TEXT_TAGS
+        parts = []
+        append = parts.append
         i = 0
-        text = ""
-        while i < size:
-            header = struct.unpack_from("<I", unpacked_data, i)[0]
-            rec_type = header & 0x3ff
-            rec_len = (header >> 20) & 0xfff
-            if rec_type in self.HWP_TEXT_TAGS:
-                rec_data = unpacked_data[i + 4:i + 4 + rec_len]
-                decoded_text = rec_data.decode('utf-16', errors='ignore')
-                cleaned_text = remove_control_characters(remove_chinese_characters(decoded_text))
-                text += cleaned_text
-            i += 4 + rec_len
-        return text
+        while i + 4 <= size:
+            header = unpack(view, i)[0]
+            rec_len = header >> 20
+            i += 4
+            if rec_len == self.EXTENDED_SIZE and i + 4 <= size:
+                rec_len = unpack(view, i)[0]
+                i += 4
+            if header & 0x3ff in text_tags:
+                append(str(view[i:i + rec_len], 'utf-16', 'ignore'))
+            i += rec_len
+        return clean_extracted_text("".join(parts))
+
+class HWPXExtractor:
+    """
+    HWPX(OWPML, zip 컨테이너) 문서에서 본문 텍스트를 추출합니다.
+    Contents/section*.xml 멤버를 압축 해제 없이 zip에서 바로 스트림으로 열고,
+    iterparse로 <hp:t> 요소를 만나는 즉시 텍스트를 모은 뒤 요소를 비워 전체 DOM을 만들지 않습니다.
+    """
+    SECTION_PATTERN = re.compile(r"^Contents/section(\d+)\.xml$")
+    TEXT_TAG = "t"
+    PARAGRAPH_TAG = "p"
+    def __init__(self, filename):
+        if not zipfile.is_zipfile(filename): raise Exception("유효한 HWPX 파일이 아닙니다.")
+        self._zip = zipfile.ZipFile(filename)
+        self._sections = self.get_body_sections()
+        if not self._sections:
+            self._zip.close()
+            raise Exception("유효한 HWPX 파일이 아닙니다.")
+        self._text = None
+    def __enter__(self):
+        return self
+    def __exit__(self, *exc):
+        self.close()
+    def close(self):
+        self._zip.close()
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            self._text = "\n".join(self.iter_section_texts())
+        return self._text
+    def get_body_sections(self) -> list[str]:
+        matches = [(int(m.group(1)), name) for name in self._zip.namelist() if (m := self.SECTION_PATTERN.match(name))]
+        return [name for _, name in sorted(matches)]
+    def get_text(self) -> str: return self.text
+    def iter_section_texts(self):
+        for section in self._sections:
+            yield self._get_text_from_section(section)
+    @staticmethod
+    def _local_name(tag: str) -> str:
+        return tag.rsplit("}", 1)[-1]
+    def _get_text_from_section(self, section: str) -> str:
+        parts = []
+        with self._zip.open(section) as stream:
+            for _, elem in ET.iterparse(stream, events=("end",)):
+                name = self._local_name(elem.tag)
+                if name == self.TEXT_TAG:
+                    # <hp:t> 안의 <hp:tab/>, <hp:lineBreak/> 등은 자식 요소이므로 tail까지 이어 붙입니다.
+                    if elem.text:
+                        parts.append(elem.text)
+                    for child in elem:
+                        if child.tail:
+                            parts.append(child.tail)
+                    elem.clear()
+                elif name == self.PARAGRAPH_TAG:
+                    elem.clear()
+        return clean_extracted_text("".join(parts))
+
+def load_hwpx_text(file_path: str) -> list[Document]:
+    with HWPXExtractor(file_path) as extractor:
+        full_text = extractor.get_text()
+    return [Document(page_content=full_text, metadata={"source": os.path.basename(file_path)})]
 
 def load_hwp_text_with_extractor(file_path: str) -> list[Document]:
-    extractor = HWPExtractor(file_path)
-    full_text = extractor.get_text()
+    with HWPExtractor(file_path) as extractor:
+        full_text = extractor.get_text()
     return [Document(page_content=full_text, metadata={"source": os.path.basename(file_path)})]
 
+def load_csv_documents(file_path: str) -> list[Document]:
+    encodings_to_try = ['utf-8-sig', 'utf-8', 'cp949', 'euc-kr']
+    df = None
+    for encoding in encodings_to_try:
+        try:
+            df = pd.read_csv(file_path, encoding=encoding)
+            break
+        except (UnicodeDecodeError, FileNotFoundError):
+            continue
+    if df is None: raise ValueError("지원되는 인코딩으로 파일을 읽을 수 없습니다.")
+    file_basename = os.path.basename(file_path)
+    docs = []
+    for index, row in df.iterrows():
+        content = row.get("Question", " ".join(map(str, row.values)))
+        metadata = {"source": file_basename, "row": index + 1, **row.to_dict()}
+        docs.append(Document(page_content=content, metadata=metadata))
+    return docs
+
+def load_documents_from_file(file_path: str) -> list[Document]:
+    """확장자에 맞는 로더로 파일 하나를 Document 목록으로 변환합니다."""
+    ext = os.path.splitext(file_path)[1].lower()
+    if ext == '.pdf':
+        return PyMuPDFLoader(file_path).load()
+    if ext == '.hwpx' or (ext == '.hwp' and zipfile.is_zipfile(file_path)):
+        # 확장자가 .hwp여도 실제 내용이 zip 컨테이너면 HWPX 형식입니다.
+        return load_hwpx_text(file_path)
+    if ext == '.hwp':
+        return load_hwp_text_with_extractor(file_path)
+    if ext == '.csv':
+        return load_csv_documents(file_path)
+    raise ValueError(f"지원하지 않는 파일 형식입니다: {ext}")
+
+def parse_file_worker(file_path: str) -> dict:
+    """
+    프로세스 풀에서 실행되는 파싱 작업. 예외를 밖으로 던지지 않고
+    파일별 결과(문서, 오류, 소요 시간)를 딕셔너리로 돌려줍니다.
+    파일명에서 추출한 문서 종류/NCS 코드/면접 형식 등의 메타데이터를 모든 문서에 붙입니다.
+    """
+    start = time.perf_counter()
+    try:
+        docs = load_documents_from_file(file_path)
+        file_metadata = parse_filename(file_path)
+        for doc in docs:
+            doc.metadata.update(file_metadata)
+        error = None
+    except Exception as e:
+        docs, error = [], str(e)
+    return {
+        "file": os.path.basename(file_path),
+        "docs": docs,
+        "error": error,
+        "seconds": time.perf_counter() - start,
+    }
+
 def unzip_and_cleanup(directory: str):
     print("\n--- ZIP 파일 자동 압축 해제 시작 ---")
     zip_found = False
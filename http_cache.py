@@ -0,0 +1,202 @@
+import os
+import re
+import time
+import sqlite3
+import hashlib
+import threading
+from email.utils import formatdate
+from typing import Dict, NamedTuple, Optional
+import requests
+
+DEFAULT_HTTP_CACHE_PATH = os.path.join(".cache", "http.sqlite")
+# 서버가 Cache-Control max-age를 주지 않으면 이 시간 동안은 재검증 없이 저장된 응답을 사용합니다.
+DEFAULT_FRESH_SECONDS = 3600
+DEFAULT_HTTP_CACHE_MAX_BYTES = 512 * 1024 * 1024
+CHUNK_SIZE = 64 * 1024
+
+_MAX_AGE_RE = re.compile(r"max-age=(\d+)", re.IGNORECASE)
+
+
+class ResponseTooLarge(Exception):
+    pass
+
+
+class CachedResponse(NamedTuple):
+    url: str
+    status_code: int
+    content_type: str
+    encoding: Optional[str]
+    content: bytes
+    body_hash: str
+    from_cache: bool
+
+    @property
+    def text(self) -> str:
+        return self.content.decode(self.encoding or "utf-8", errors="replace")
+
+
+def download(session: requests.Session, url: str, timeout: float, max_bytes: Optional[int] = None,
+             headers: Optional[Dict[str, str]] = None) -> requests.Response:
+    """
+    스트리밍으로 응답 본문을 읽어 response._content에 채운 응답을 반환합니다.
+    max_bytes를 넘으면(Content-Length가 있으면 본문을 받기 전에) ResponseTooLarge를 냅니다. 304 응답은 본문 없이 반환합니다.
+    """
+    response = session.get(url, timeout=timeout, stream=True, headers=headers)
+    with response:
+        if response.status_code == 304:
+            response._content = b""
+            return response
+        response.raise_for_status()
+        declared = response.headers.get("Content-Length")
+        if max_bytes and declared and declared.isdigit() and int(declared) > max_bytes:
+            raise ResponseTooLarge(f"파일이 너무 큽니다 ({int(declared) // 1024}KB)")
+        buffer = bytearray()
+        for chunk in response.iter_content(CHUNK_SIZE):
+            buffer.extend(chunk)
+            if max_bytes and len(buffer) > max_bytes:
+                raise ResponseTooLarge(f"파일이 {max_bytes // 1024}KB를 넘어 다운로드를 중단했습니다")
+        response._content = bytes(buffer)
+    if "html" in response.headers.get("Content-Type", "").lower() and (
+        response.encoding is None or response.encoding.lower() == "iso-8859-1"
+    ):
+        response.encoding = response.apparent_encoding
+    return response
+
+
+def to_cached_response(response: requests.Response, from_cache: bool = False) -> CachedResponse:
+    return CachedResponse(
+        url=response.url, status_code=response.status_code, content_type=response.headers.get("Content-Type", ""),
+        encoding=response.encoding, content=response.content,
+        body_hash=hashlib.sha256(response.content).hexdigest(), from_cache=from_cache,
+    )
+
+
+class HttpCache:
+    """
+    URL -> 응답 본문을 저장하는 SQLite HTTP 캐시. 스크래퍼, 첨부 PDF 다운로더, 위키피디아 조회가 함께 사용합니다.
+    신선 기간(Cache-Control max-age 또는 fresh_seconds)이 지나면 ETag/Last-Modified로 조건부 요청을 보내 304면 저장본을 씁니다.
+    본문에서 추출한 텍스트도 (URL, 추출 방식, 본문 해시)로 저장하므로 캐시 적중 시 HTML/PDF 파싱도 건너뜁니다.
+    """
+    def __init__(self, path: str = DEFAULT_HTTP_CACHE_PATH, fresh_seconds: int = DEFAULT_FRESH_SECONDS,
+                 max_bytes: int = DEFAULT_HTTP_CACHE_MAX_BYTES):
+        self.path = path
+        self.fresh_seconds = fresh_seconds
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " url TEXT PRIMARY KEY, final_url TEXT NOT NULL, status INTEGER NOT NULL, content_type TEXT, encoding TEXT,"
+            " etag TEXT, last_modified TEXT, body BLOB NOT NULL, body_hash TEXT NOT NULL, size INTEGER NOT NULL,"
+            " expires_at REAL NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_used ON responses(last_used)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS extracted_texts ("
+            " url TEXT NOT NULL, extractor TEXT NOT NULL, body_hash TEXT NOT NULL, text TEXT NOT NULL, created_at REAL NOT NULL,"
+            " PRIMARY KEY (url, extractor))"
+        )
+        self._conn.commit()
+
+    def fetch(self, session: requests.Session, url: str, timeout: float, max_bytes: Optional[int] = None) -> CachedResponse:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT final_url, status, content_type, encoding, etag, last_modified, body, body_hash, expires_at"
+                " FROM responses WHERE url = ?", (url,)
+            ).fetchone()
+        if row is not None and now < row[8]:
+            self._touch(url, now)
+            self.hits += 1
+            return CachedResponse(row[0], row[1], row[2], row[3], row[6], row[7], True)
+        headers = {}
+        if row is not None:
+            if row[4]:
+                headers["If-None-Match"] = row[4]
+            if row[5]:
+                headers["If-Modified-Since"] = row[5]
+        response = download(session, url, timeout, max_bytes=max_bytes, headers=headers)
+        if response.status_code == 304 and row is not None:
+            with self._lock:
+                self._conn.execute(
+                    "UPDATE responses SET expires_at = ?, last_used = ? WHERE url = ?",
+                    (now + self._fresh_seconds(response), now, url),
+                )
+                self._conn.commit()
+            self.revalidated += 1
+            return CachedResponse(row[0], row[1], row[2], row[3], row[6], row[7], True)
+        self.misses += 1
+        cached = to_cached_response(response)
+        if "no-store" not in response.headers.get("Cache-Control", "").lower():
+            self._store(url, cached, response, now)
+        return cached
+
+    def _fresh_seconds(self, response: requests.Response) -> float:
+        cache_control = response.headers.get("Cache-Control", "")
+        if "no-cache" in cache_control.lower():
+            return 0
+        match = _MAX_AGE_RE.search(cache_control)
+        return int(match.group(1)) if match else self.fresh_seconds
+
+    def _store(self, url: str, cached: CachedResponse, response: requests.Response, now: float):
+        # 검증자가 없으면 받은 시각을 Last-Modified 대신 보내 서버가 304로 답할 수 있게 합니다.
+        last_modified = response.headers.get("Last-Modified")
+        etag = response.headers.get("ETag")
+        if not etag and not last_modified:
+            last_modified = formatdate(now, usegmt=True)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, cached.url, cached.status_code, cached.content_type, cached.encoding, etag, last_modified,
+                 cached.content, cached.body_hash, len(cached.content), now + self._fresh_seconds(response), now),
+            )
+            # 본문이 바뀌었으면 이전 본문에서 추출한 텍스트는 버립니다.
+            self._conn.execute("DELETE FROM extracted_texts WHERE url = ? AND body_hash != ?", (url, cached.body_hash))
+            self._conn.commit()
+            self._evict_if_needed()
+
+    def _touch(self, url: str, now: float):
+        with self._lock:
+            self._conn.execute("UPDATE responses SET last_used = ? WHERE url = ?", (now, url))
+            self._conn.commit()
+
+    def _evict_if_needed(self):
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        target = int(self.max_bytes * 0.9)
+        removed = 0
+        for url, size in self._conn.execute("SELECT url, size FROM responses ORDER BY last_used").fetchall():
+            if total <= target:
+                break
+            self._conn.execute("DELETE FROM responses WHERE url = ?", (url,))
+            self._conn.execute("DELETE FROM extracted_texts WHERE url = ?", (url,))
+            total -= size
+            removed += 1
+        self._conn.commit()
+        print(f"HTTP 캐시 정리: 오래된 응답 {removed}개 삭제")
+
+    def get_text(self, url: str, extractor: str, body_hash: str = "", max_age: Optional[float] = None) -> Optional[str]:
+        """저장된 추출 텍스트. body_hash가 다르거나(본문 변경) max_age보다 오래됐으면 None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT text, body_hash, created_at FROM extracted_texts WHERE url = ? AND extractor = ?", (url, extractor)
+            ).fetchone()
+        if row is None or row[1] != body_hash or (max_age is not None and time.time() - row[2] > max_age):
+            return None
+        return row[0]
+
+    def put_text(self, url: str, extractor: str, text: str, body_hash: str = ""):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO extracted_texts VALUES (?, ?, ?, ?, ?)", (url, extractor, body_hash, text, time.time())
+            )
+            self._conn.commit()
+
+    def stats_summary(self) -> str:
+        return f"HTTP 캐시: 적중 {self.hits}건, 재검증(304) {self.revalidated}건, 미스 {self.misses}건"
@@ -0,0 +1,86 @@
+import os
+import sys
+import shutil
+import tempfile
+import threading
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+PAGE_TEMPLATE = """<html><body>
+<nav class="gnb"><a href="/">홈</a> <a href="/jobs">채용</a></nav>
+<main>
+<h1>백엔드 개발자 채용 공고</h1>
+<p>{body} 저희 팀은 대규모 트래픽을 처리하는 결제 시스템을 개발하고 운영합니다. 함께 성장할 동료를 찾고 있습니다.</p>
+<p>주요 업무: 결제 API 설계 및 개발, 데이터 파이프라인 운영, 장애 대응 자동화와 모니터링 체계 개선.</p>
+<p>자격 요건: Java 또는 Kotlin 기반 서버 개발 경력 3년 이상, 관계형 데이터베이스 설계 경험이 있는 분.</p>
+<p>우대 사항: 대용량 메시지 큐(Kafka 등) 운영 경험, 클라우드 인프라(AWS, GCP) 기반 서비스 구축 경험, 오픈소스 기여 경험.</p>
+<p>채용 절차: 서류 전형, 과제 전형, 1차 기술 면접, 2차 컬처핏 면접, 처우 협의 순으로 진행되며 각 단계 결과는 메일로 안내드립니다.</p>
+<p>근무 조건: 정규직, 주 5일 근무, 유연 출퇴근제, 원격 근무 병행 가능, 장비 및 도서 구입비 지원, 건강 검진 지원.</p>
+<p>팀 소개: 결제플랫폼팀은 서버 개발자 12명과 데이터 엔지니어 4명으로 구성되어 있으며, 코드 리뷰와 기술 공유 세션을 매주 진행합니다.</p>
+<p>지원 방법: 채용 페이지에서 이력서와 포트폴리오를 제출해주세요. 경력 기술서에는 담당한 시스템의 규모와 본인의 역할을 구체적으로 적어주시면 좋습니다.</p>
+</main>
+</body></html>"""
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def write_page(path: str, body: str, mtime: float):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(PAGE_TEMPLATE.format(body=body))
+    # http.server는 파일 수정 시각으로 Last-Modified/304를 판단하므로 초 단위로 확실히 바뀌게 합니다.
+    os.utime(path, (mtime, mtime))
+
+
+def main():
+    """
+    로컬 http.server로 HTTP 캐시와 페이지 추출 결과 캐시를 검사합니다 (네트워크, 브라우저 불필요).
+    1) 처음 요청은 미스, 2) 신선 기간이 지나면 304 재검증 후 저장된 추출 결과 재사용, 3) 파일이 바뀌면 다시 추출.
+    """
+    work_dir = tempfile.mkdtemp(prefix="http_cache_test_")
+    site_dir = os.path.join(work_dir, "site")
+    os.makedirs(site_dir)
+    # 레지스트리가 HTTP 캐시를 처음 만들 때 읽으므로 web_scraper를 불러오기 전에 설정합니다. 신선 기간 0 = 매번 재검증.
+    os.environ["HTTP_CACHE_PATH"] = os.path.join(work_dir, "http.sqlite")
+    os.environ["HTTP_CACHE_FRESH_SECONDS"] = "0"
+    from resource_registry import get_registry
+    from web_scraper import scrape_page
+
+    page_path = os.path.join(site_dir, "job.html")
+    write_page(page_path, "버전1 공고입니다.", 1_700_000_000)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), partial(QuietHandler, directory=site_dir))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/job.html"
+    cache = get_registry().get_http_cache()
+
+    try:
+        # --- 1. 처음 요청: 미스, 새로 추출 ---
+        page = scrape_page(url)
+        assert cache.misses == 1 and cache.revalidated == 0, cache.stats_summary()
+        assert not page.from_cache and "버전1" in page.main_text
+        assert page.method == "http", "정적 HTML로 충분한 페이지인데 브라우저 렌더링을 시도했습니다"
+        assert "채용\n" not in page.main_text, "메뉴가 본문에 남아 있습니다"
+
+        # --- 2. 재요청: 304 재검증, 저장된 추출 결과 재사용 ---
+        page = scrape_page(url)
+        assert cache.misses == 1 and cache.revalidated == 1, cache.stats_summary()
+        assert page.from_cache and "버전1" in page.main_text
+
+        # --- 3. 파일 변경: 200 응답, 다시 추출 ---
+        write_page(page_path, "버전2 공고입니다.", 1_700_000_100)
+        page = scrape_page(url)
+        assert cache.misses == 2, cache.stats_summary()
+        assert not page.from_cache and "버전2" in page.main_text and "버전1" not in page.main_text
+    finally:
+        server.shutdown()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    print(cache.stats_summary())
+    print("HTTP 캐시 검사 통과")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+import json
+from typing import Any, Iterator, Optional, Tuple
+
+
+class IncrementalJSONFieldParser:
+    """
+    스트리밍으로 들어오는 JSON 객체 텍스트에서 최상위 필드가 완성되는 즉시 (키, 값)을 내보내는 파서.
+    LLM 출력 앞뒤의 ```json 코드 펜스나 설명 문장은 첫 '{' 이전/최상위 객체 이후이므로 무시됩니다.
+
+        parser = IncrementalJSONFieldParser()
+        for chunk in stream:
+            for key, value in parser.feed(chunk):
+                ...
+    """
+    def __init__(self):
+        self._started = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._done = False
+        self._string_start: Optional[int] = None
+        self._key: Optional[str] = None
+        self._value_start: Optional[int] = None
+        self._text = ""
+
+    @property
+    def text(self) -> str:
+        """지금까지 받은 전체 텍스트."""
+        return self._text
+
+    def feed(self, chunk: str) -> Iterator[Tuple[str, Any]]:
+        start = len(self._text)
+        self._text += chunk
+        for i in range(start, len(self._text)):
+            if self._done:
+                return
+            field = self._step(i, self._text[i])
+            if field is not None:
+                yield field
+
+    def _step(self, i: int, ch: str) -> Optional[Tuple[str, Any]]:
+        if not self._started:
+            if ch == "{":
+                self._started = True
+                self._depth = 1
+            return None
+        if self._in_string:
+            if self._escape:
+                self._escape = False
+            elif ch == "\\":
+                self._escape = True
+            elif ch == '"':
+                self._in_string = False
+                if self._depth == 1:
+                    if self._value_start is None:
+                        self._key = json.loads(self._text[self._string_start:i + 1])
+                    else:
+                        return self._emit(i + 1)
+            return None
+        if ch == '"':
+            self._in_string = True
+            self._string_start = i
+        elif ch in "{[":
+            self._depth += 1
+        elif ch in "}]":
+            self._depth -= 1
+            if self._depth == 1 and self._value_start is not None:
+                # 객체/배열 값이 닫힘
+                return self._emit(i + 1)
+            if self._depth == 0:
+                field = self._emit(i) if self._value_start is not None else None
+                self._done = True
+                return field
+        elif self._depth == 1:
+            if ch == ":" and self._key is not None:
+                self._value_start = i + 1
+            elif ch == "," and self._value_start is not None:
+                # 숫자/true/false/null 같은 값은 다음 쉼표에서 끝납니다.
+                return self._emit(i)
+        return None
+
+    def _emit(self, end: int) -> Optional[Tuple[str, Any]]:
+        raw = self._text[self._value_start:end].strip()
+        key, self._key, self._value_start = self._key, None, None
+        if not raw:
+            return None
+        try:
+            return key, json.loads(raw)
+        except json.JSONDecodeError:
+            return None
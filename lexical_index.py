@@ -0,0 +1,203 @@
+import os
+import re
+import math
+import sqlite3
+import threading
+import unicodedata
+from collections import Counter
+from typing import AbstractSet, Dict, List, NamedTuple, Optional
+from urllib.request import pathname2url
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from langchain_community.vectorstores import FAISS
+from faiss_storage import SQLiteDocstore, filtered_similarity_search
+
+LEXICAL_INDEX_NAME = "lexical.sqlite"
+# BM25 파라미터 (일반적인 기본값)
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Reciprocal Rank Fusion 상수
+RRF_K = 60
+# 질의 토큰이 이 개수 이하인 키워드형 질의만 어휘 검색 결과로 바로 답합니다.
+SHORTCUT_MAX_TERMS = 6
+# 한글/한자는 띄어쓰기와 조사 때문에 어절 단위로 맞지 않으므로 글자 bigram으로, 영문/숫자는 단어 단위로 색인합니다.
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:[._-][a-z0-9]+)*|[가-힣]+|[一-鿿]+")
+_INSERT_BATCH = 1000
+
+
+def tokenize(text: str) -> List[str]:
+    """한국어 문서용 토크나이저. 'SQL', 'NCS 코드(0203020101)' 같은 영문/숫자는 그대로, 한글은 2글자 단위로 자릅니다."""
+    tokens = []
+    for word in _TOKEN_RE.findall(unicodedata.normalize("NFC", text).lower()):
+        if word[0].isascii() or len(word) == 1:
+            tokens.append(word)
+        else:
+            tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+    return tokens
+
+
+class LexicalHit(NamedTuple):
+    doc_id: str
+    score: float
+    matched_terms: int
+
+
+def _connect(path: str, read_only: bool) -> sqlite3.Connection:
+    if read_only:
+        uri = "file:" + pathname2url(os.path.abspath(path)) + "?mode=ro"
+        return sqlite3.connect(uri, uri=True, check_same_thread=False)
+    conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("CREATE TABLE IF NOT EXISTS docs (doc_id TEXT PRIMARY KEY, length INTEGER NOT NULL)")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS postings (term TEXT NOT NULL, doc_id TEXT NOT NULL, tf INTEGER NOT NULL,"
+        " PRIMARY KEY (term, doc_id)) WITHOUT ROWID"
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_postings_doc ON postings(doc_id)")
+    return conn
+
+
+def sync_lexical_index(db_path: str, vectorstore: FAISS):
+    """
+    벡터스토어의 청크 목록과 역색인(lexical.sqlite)을 맞춥니다.
+    벡터스토어에서 사라진 청크는 지우고 새로 생긴 청크만 토큰화해 추가하므로, 변경된 파일만큼만 작업합니다.
+    """
+    path = os.path.join(db_path, LEXICAL_INDEX_NAME)
+    conn = _connect(path, read_only=False)
+    try:
+        indexed = {row[0] for row in conn.execute("SELECT doc_id FROM docs")}
+        current = set(vectorstore.index_to_docstore_id.values())
+        removed = list(indexed - current)
+        added = [doc_id for doc_id in vectorstore.index_to_docstore_id.values() if doc_id not in indexed]
+        if not removed and not added:
+            return
+        with conn:
+            for start in range(0, len(removed), _INSERT_BATCH):
+                batch = [(doc_id,) for doc_id in removed[start:start + _INSERT_BATCH]]
+                conn.executemany("DELETE FROM postings WHERE doc_id = ?", batch)
+                conn.executemany("DELETE FROM docs WHERE doc_id = ?", batch)
+            for start in range(0, len(added), _INSERT_BATCH):
+                doc_rows, posting_rows = [], []
+                for doc_id in added[start:start + _INSERT_BATCH]:
+                    doc = vectorstore.docstore.search(doc_id)
+                    if not isinstance(doc, Document):
+                        continue
+                    counts = Counter(tokenize(doc.page_content))
+                    doc_rows.append((doc_id, sum(counts.values())))
+                    posting_rows.extend((term, doc_id, tf) for term, tf in counts.items())
+                conn.executemany("INSERT OR REPLACE INTO docs VALUES (?, ?)", doc_rows)
+                conn.executemany("INSERT OR REPLACE INTO postings VALUES (?, ?, ?)", posting_rows)
+        print(f"어휘 색인 갱신: 청크 {len(added)}개 추가, {len(removed)}개 삭제")
+    finally:
+        conn.close()
+
+
+class LexicalIndex:
+    """lexical.sqlite를 읽기 전용으로 열어 BM25 점수로 청크 id를 찾습니다."""
+    def __init__(self, path: str):
+        self.path = path
+        self._conn = _connect(path, read_only=True)
+        self._lock = threading.Lock()
+        with self._lock:
+            count, avg_length = self._conn.execute("SELECT COUNT(*), AVG(length) FROM docs").fetchone()
+        self.doc_count = count
+        self.avg_length = avg_length or 1.0
+
+    def search(self, query: str, k: int, allowed: Optional[AbstractSet[str]] = None) -> List[LexicalHit]:
+        """allowed가 주어지면 그 청크 id들만 점수를 매깁니다 (메타데이터 사전 필터)."""
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms or self.doc_count == 0:
+            return []
+        scores: Dict[str, float] = {}
+        matched: Counter = Counter()
+        with self._lock:
+            for term in terms:
+                rows = self._conn.execute(
+                    "SELECT p.doc_id, p.tf, d.length FROM postings p JOIN docs d ON d.doc_id = p.doc_id WHERE p.term = ?",
+                    (term,),
+                ).fetchall()
+                if not rows:
+                    continue
+                idf = math.log(1 + (self.doc_count - len(rows) + 0.5) / (len(rows) + 0.5))
+                for doc_id, tf, length in rows:
+                    if allowed is not None and doc_id not in allowed:
+                        continue
+                    norm = tf + BM25_K1 * (1 - BM25_B + BM25_B * length / self.avg_length)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (BM25_K1 + 1) / norm
+                    matched[doc_id] += 1
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+        return [LexicalHit(doc_id, score, matched[doc_id]) for doc_id, score in ranked]
+
+    def close(self):
+        self._conn.close()
+
+
+def load_lexical_index(db_path: str) -> Optional[LexicalIndex]:
+    path = os.path.join(db_path, LEXICAL_INDEX_NAME)
+    if not os.path.exists(path):
+        return None
+    return LexicalIndex(path)
+
+
+class HybridRetriever(BaseRetriever):
+    """
+    BM25 어휘 검색과 벡터 검색 결과를 Reciprocal Rank Fusion으로 합치는 retriever.
+    키워드형 질의의 상위 k개가 모두 질의 토큰을 전부 포함하면(모호하지 않은 어휘 적중) 임베딩 호출 없이 어휘 결과를 반환합니다.
+    metadata_filter(예: {"doc_type": "면접자료", "interview_format": "토론면접"})를 주면 두 검색 모두 해당 청크만 대상으로 합니다.
+    lexical_index가 None이면 (필터가 적용된) 벡터 검색만 수행합니다.
+    """
+    vectorstore: FAISS
+    lexical_index: Optional[LexicalIndex] = None
+    k: int = 5
+    fetch_k: int = 20
+    lexical_shortcut: bool = True
+    metadata_filter: Optional[Dict] = None
+
+    model_config = {"arbitrary_types_allowed": True}
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        hits = self._lexical_search(query)
+        if self.lexical_shortcut and self._is_unambiguous(query, hits):
+            return self._load_documents([hit.doc_id for hit in hits[:self.k]])
+        if not hits:
+            return filtered_similarity_search(self.vectorstore, query, self.k, self.metadata_filter)
+        vector_docs = filtered_similarity_search(self.vectorstore, query, self.fetch_k, self.metadata_filter)
+        fused: Dict[str, float] = {}
+        docs_by_id: Dict[str, Document] = {}
+        for rank, doc in enumerate(vector_docs):
+            fused[doc.id] = fused.get(doc.id, 0.0) + 1.0 / (RRF_K + rank + 1)
+            docs_by_id[doc.id] = doc
+        for rank, hit in enumerate(hits):
+            fused[hit.doc_id] = fused.get(hit.doc_id, 0.0) + 1.0 / (RRF_K + rank + 1)
+        top_ids = [doc_id for doc_id, _ in sorted(fused.items(), key=lambda item: item[1], reverse=True)[:self.k]]
+        missing = [doc_id for doc_id in top_ids if doc_id not in docs_by_id]
+        docs_by_id.update({doc.id: doc for doc in self._load_documents(missing)})
+        return [docs_by_id[doc_id] for doc_id in top_ids if doc_id in docs_by_id]
+
+    def _lexical_search(self, query: str) -> List[LexicalHit]:
+        if self.lexical_index is None:
+            return []
+        if not self.metadata_filter:
+            return self.lexical_index.search(query, self.fetch_k)
+        docstore = self.vectorstore.docstore
+        if not isinstance(docstore, SQLiteDocstore) or not docstore.has_facets:
+            # 필터 색인이 없는 DB에서는 어휘 결과를 거를 수 없으므로 벡터 검색만 사용합니다.
+            return []
+        return self.lexical_index.search(query, self.fetch_k, allowed=docstore.doc_ids_for(self.metadata_filter))
+
+    def _is_unambiguous(self, query: str, hits: List[LexicalHit]) -> bool:
+        n_terms = len(set(tokenize(query)))
+        if not hits or n_terms == 0 or n_terms > SHORTCUT_MAX_TERMS:
+            return False
+        return all(hit.matched_terms == n_terms for hit in hits[:self.k])
+
+    def _load_documents(self, doc_ids: List[str]) -> List[Document]:
+        if not doc_ids:
+            return []
+        docstore = self.vectorstore.docstore
+        if hasattr(docstore, "get_many"):
+            found = docstore.get_many(doc_ids)
+        else:
+            found = {doc_id: docstore.search(doc_id) for doc_id in doc_ids}
+        return [found[doc_id] for doc_id in doc_ids if isinstance(found.get(doc_id), Document)]
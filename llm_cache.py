@@ -0,0 +1,173 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+import warnings
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Optional
+from langchain_core.caches import BaseCache, RETURN_VAL_TYPE
+from langchain_core.load import dumps, loads
+from embedding_cache import normalize_text
+
+DEFAULT_LLM_CACHE_PATH = os.path.join(".cache", "llm_responses.sqlite")
+DEFAULT_LLM_CACHE_TTL_SECONDS = 7 * 24 * 3600
+DEFAULT_LLM_CACHE_MAX_ENTRIES = 20_000
+
+_bypass_cache: ContextVar[bool] = ContextVar("bypass_llm_cache", default=False)
+
+
+@contextmanager
+def bypass_llm_cache():
+    """
+    이 블록 안의 LLM 호출은 캐시를 조회하지도 저장하지도 않습니다 (호출 지점별 캐시 해제).
+    예: 매번 새로운 결과가 필요한 심화 질문 생성.
+    """
+    token = _bypass_cache.set(True)
+    try:
+        yield
+    finally:
+        _bypass_cache.reset(token)
+
+
+def _normalize_prompt(prompt: str) -> str:
+    """
+    LangChain이 넘겨주는 직렬화된 메시지 목록에서 (메시지 종류, 내용)만 남기고 공백을 정규화합니다.
+    프롬프트 템플릿의 들여쓰기나 줄바꿈 차이로 같은 요청이 다른 키가 되지 않도록 합니다.
+    """
+    try:
+        messages = json.loads(prompt)
+        parts = []
+        for message in messages:
+            content = message["kwargs"]["content"]
+            if not isinstance(content, str):
+                content = json.dumps(content, ensure_ascii=False, sort_keys=True)
+            parts.append(f"{message['id'][-1]}:{normalize_text(content)}")
+        return "\n".join(parts)
+    except (ValueError, KeyError, TypeError):
+        return normalize_text(prompt)
+
+
+def make_cache_key(deployment: Optional[str], temperature: Optional[float], prompt: str) -> str:
+    raw = f"{deployment}\x00{temperature}\x00{_normalize_prompt(prompt)}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class LLMResponseStore:
+    """
+    LLM 응답을 저장하는 SQLite 저장소. 여러 LLM 클라이언트(배포/temperature별)가 하나의 파일을 공유합니다.
+    ttl_seconds가 지난 항목은 미스로 처리하고, 항목 수가 max_entries를 넘으면 가장 오래 사용되지 않은 것부터 지웁니다.
+    """
+    def __init__(self, path: str = DEFAULT_LLM_CACHE_PATH, ttl_seconds: int = DEFAULT_LLM_CACHE_TTL_SECONDS,
+                 max_entries: int = DEFAULT_LLM_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_responses ("
+            " key TEXT PRIMARY KEY, deployment TEXT, temperature REAL, response TEXT NOT NULL,"
+            " created_at REAL NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_responses_last_used ON llm_responses(last_used)")
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT response, created_at FROM llm_responses WHERE key = ?", (key,)).fetchone()
+            if row is not None and self.ttl_seconds and now - row[1] > self.ttl_seconds:
+                self._conn.execute("DELETE FROM llm_responses WHERE key = ?", (key,))
+                self._conn.commit()
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE llm_responses SET last_used = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, deployment: Optional[str], temperature: Optional[float], response: str):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_responses VALUES (?, ?, ?, ?, ?, ?)",
+                (key, deployment, temperature, response, now, now),
+            )
+            self._conn.commit()
+            self._evict_if_needed()
+
+    def _evict_if_needed(self):
+        count = self._conn.execute("SELECT COUNT(*) FROM llm_responses").fetchone()[0]
+        if count <= self.max_entries:
+            return
+        excess = count - int(self.max_entries * 0.9)
+        self._conn.execute(
+            "DELETE FROM llm_responses WHERE key IN (SELECT key FROM llm_responses ORDER BY last_used LIMIT ?)",
+            (excess,),
+        )
+        self._conn.commit()
+        print(f"LLM 응답 캐시 정리: 오래된 항목 {excess}개 삭제")
+
+    def clear(self, deployment: Optional[str] = None):
+        with self._lock:
+            if deployment is None:
+                self._conn.execute("DELETE FROM llm_responses")
+            else:
+                self._conn.execute("DELETE FROM llm_responses WHERE deployment = ?", (deployment,))
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM llm_responses").fetchone()[0]
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats_summary(self) -> str:
+        return f"LLM 응답 캐시: 적중 {self.hits}건, 미스 {self.misses}건 (적중률 {self.hit_rate:.1%}), 저장 항목 {len(self)}개"
+
+
+class LLMResponseCache(BaseCache):
+    """
+    LangChain 채팅 모델의 cache 인자로 넘기는 어댑터. 키는 (배포 이름, temperature, 정규화된 프롬프트 해시)입니다.
+    bypass_llm_cache() 블록 안에서는 조회와 저장을 모두 건너뜁니다.
+    """
+    def __init__(self, store: LLMResponseStore, deployment: Optional[str], temperature: Optional[float]):
+        self.store = store
+        self.deployment = deployment
+        self.temperature = temperature
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        if _bypass_cache.get():
+            return None
+        cached = self.store.get(make_cache_key(self.deployment, self.temperature, prompt))
+        if cached is None:
+            return None
+        try:
+            with warnings.catch_warnings():
+                # langchain_core.load.loads는 beta 표시 경고를 매번 출력합니다.
+                warnings.simplefilter("ignore")
+                return [loads(item) for item in json.loads(cached)]
+        except Exception as e:
+            print(f"경고: 손상된 LLM 캐시 항목을 무시합니다: {e}")
+            return None
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        if _bypass_cache.get():
+            return
+        response = json.dumps([dumps(generation) for generation in return_val])
+        self.store.put(make_cache_key(self.deployment, self.temperature, prompt), self.deployment, self.temperature, response)
+
+    def clear(self, **kwargs: Any) -> None:
+        self.store.clear(self.deployment)
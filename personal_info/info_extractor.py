@@ -7,12 +7,14 @@ import os
 # .env 파일 로드
 load_dotenv()
 
-def extract_relevant_info(document_text, link_info):
+def extract_relevant_info(document_text, link_info, llm_cache=None):
     """
     Extract relevant information from document text and links using gpt-4o-mini.
     Args:
         document_text (str): Text extracted from resume/CV files.
         link_info (str): Crawled information from GitHub, portfolio, or LinkedIn URLs.
+        llm_cache (BaseCache, optional): Response cache for identical inputs. main.py passes
+            get_registry().get_llm_cache("gpt-4o-mini", None). None always calls the LLM.
     Returns:
         str: Markdown string containing relevant information.
     """
@@ -23,7 +25,7 @@ def extract_relevant_info(document_text, link_info):
 
     # LLM 설정 (gpt-4o-mini)
     try:
-        llm = AzureChatOpenAI(model="gpt-4o-mini", api_key=api_key)
+        llm = AzureChatOpenAI(model="gpt-4o-mini", api_key=api_key, cache=llm_cache if llm_cache is not None else False)
     except Exception as e:
         raise ValueError(f"Failed to initialize LLM: {str(e)}")
 
@@ -119,10 +121,11 @@ def extract_relevant_info(document_text, link_info):
 
     # 체인 실행
     try:
-        result = chain.invoke({
+        inputs = {
             "document_text": document_text,
             "link_info": link_info
-        })
+        }
+        result = chain.invoke(inputs)
         result_text = result.content if hasattr(result, 'content') else str(result)
     except Exception as e:
         raise Exception(f"LLM invocation failed: {str(e)}")
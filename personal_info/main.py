@@ -1,6 +1,7 @@
 import argparse
-from document_processor import load_documents
-from info_extractor import extract_relevant_info
+from personal_info.document_processor import load_documents
+from personal_info.info_extractor import extract_relevant_info
+from resource_registry import get_registry
 import os
 import requests
 from bs4 import BeautifulSoup
@@ -47,7 +48,7 @@ def crawl_linkedin(url):
         print(f"Error crawling LinkedIn {url}: {e}")
         return f"LinkedIn: {url}"
 
-def main(file_paths, links):
+def main(file_paths, links, llm_cache=None):
     # 문서 로딩 (여러 PDF/DOCX 파일)
     try:
         document_text = load_documents(file_paths)
@@ -70,7 +71,7 @@ def main(file_paths, links):
 
     # 정보 추출
     try:
-        result = extract_relevant_info(document_text, link_info)
+        result = extract_relevant_info(document_text, link_info, llm_cache=llm_cache)
         # Markdown 파일로 저장
         output_file = "output.md"
         with open(output_file, 'w', encoding='utf-8') as f:
@@ -85,4 +86,5 @@ if __name__ == "__main__":
     parser.add_argument("--links", action="append", default=[], help="URLs for GitHub, portfolio, or LinkedIn, can be repeated")
     args = parser.parse_args()
 
-    main(args.file, args.links)
\ No newline at end of file
+    # 저장소 루트에서 `python -m personal_info.main --file ...`으로 실행합니다. 같은 입력이면 저장된 LLM 응답을 재사용합니다.
+    main(args.file, args.links, llm_cache=get_registry().get_llm_cache("gpt-4o-mini", None))
\ No newline at end of file
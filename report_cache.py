@@ -0,0 +1,146 @@
+import os
+import re
+import time
+import sqlite3
+import hashlib
+import threading
+import unicodedata
+from typing import Dict, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+from embedding_cache import normalize_text
+
+DEFAULT_REPORT_CACHE_PATH = os.path.join(".cache", "company_reports.sqlite")
+# 전체 보고서(채용 공고 포함)는 공고가 바뀔 수 있어 짧게, 회사 단위 섹션은 길게 유지합니다.
+DEFAULT_REPORT_TTL_SECONDS = 3 * 24 * 3600
+DEFAULT_SECTION_TTL_SECONDS = 30 * 24 * 3600
+# 직무와 무관하게 회사 단위로 재사용할 수 있는 보고서 섹션 (기업 개요, 경쟁사, 산업 동향)
+COMPANY_SECTIONS = ("1.1", "3.1", "3.2")
+
+_COMPANY_AFFIXES_RE = re.compile(r"\(주\)|㈜|주식회사|\(유\)|유한회사|\b(?:inc|corp|co|ltd|llc)\b\.?", re.IGNORECASE)
+_HEADING_RE = re.compile(r"^#{2,3}\s.*$", re.MULTILINE)
+_SECTION_ID_RE = re.compile(r"^###\s+(\d+\.\d+)\.?")
+_TRACKING_PARAM_PREFIXES = ("utm_", "fbclid", "gclid")
+
+
+def normalize_company(company_name: str) -> str:
+    """'(주)카카오', '주식회사 카카오', 'Kakao Corp.' 같은 표기 차이를 줄입니다."""
+    name = unicodedata.normalize("NFKC", company_name).lower()
+    name = _COMPANY_AFFIXES_RE.sub(" ", name)
+    return re.sub(r"[\s.,]+", "", name)
+
+
+def normalize_role(job_role: Optional[str]) -> str:
+    return normalize_text(job_role or "").lower()
+
+
+def normalize_url(url: Optional[str]) -> str:
+    """스킴/호스트 소문자화, 프래그먼트와 추적용 파라미터 제거, 쿼리 정렬."""
+    url = (url or "").strip()
+    if not url:
+        return ""
+    parts = urlsplit(url if "://" in url else "https://" + url)
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith(_TRACKING_PARAM_PREFIXES)
+    )
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, urlencode(query), ""))
+
+
+def report_key(company_name: str, job_role: Optional[str], url: Optional[str]) -> str:
+    raw = "\x00".join((normalize_company(company_name), normalize_role(job_role), normalize_url(url)))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def split_sections(report: str) -> Dict[str, str]:
+    """'### 1.1. 기업 개요' 같은 번호 섹션을 {'1.1': 본문}으로 나눕니다. 본문은 다음 제목 전까지입니다."""
+    sections = {}
+    headings = list(_HEADING_RE.finditer(report))
+    for i, heading in enumerate(headings):
+        match = _SECTION_ID_RE.match(heading.group(0))
+        if not match:
+            continue
+        end = headings[i + 1].start() if i + 1 < len(headings) else len(report)
+        sections[match.group(1)] = report[heading.end():end].strip("\n")
+    return sections
+
+
+def replace_sections(report: str, sections: Dict[str, str]) -> str:
+    """보고서의 해당 번호 섹션 본문을 주어진 내용으로 바꿉니다. 보고서에 없는 섹션은 무시합니다."""
+    headings = list(_HEADING_RE.finditer(report))
+    parts, last = [], 0
+    for i, heading in enumerate(headings):
+        match = _SECTION_ID_RE.match(heading.group(0))
+        if not match or match.group(1) not in sections:
+            continue
+        end = headings[i + 1].start() if i + 1 < len(headings) else len(report)
+        parts.append(report[last:heading.end()])
+        parts.append("\n" + sections[match.group(1)] + "\n")
+        last = end
+    parts.append(report[last:])
+    return "".join(parts)
+
+
+class ReportStore:
+    """
+    기업 분석 보고서를 (회사, 직무, 공고 URL) 정규화 키로 저장하는 SQLite 저장소.
+    전체 보고서와 별도로 회사 단위 섹션(COMPANY_SECTIONS)을 회사 키로 저장해 다른 직무 분석에서 재사용합니다.
+    """
+    def __init__(self, path: str = DEFAULT_REPORT_CACHE_PATH, report_ttl_seconds: int = DEFAULT_REPORT_TTL_SECONDS,
+                 section_ttl_seconds: int = DEFAULT_SECTION_TTL_SECONDS):
+        self.path = path
+        self.report_ttl_seconds = report_ttl_seconds
+        self.section_ttl_seconds = section_ttl_seconds
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS reports ("
+            " key TEXT PRIMARY KEY, company TEXT NOT NULL, job_role TEXT, url TEXT, report TEXT NOT NULL,"
+            " created_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS company_sections ("
+            " company TEXT NOT NULL, section TEXT NOT NULL, content TEXT NOT NULL, created_at REAL NOT NULL,"
+            " PRIMARY KEY (company, section))"
+        )
+        self._conn.commit()
+
+    def get_report(self, company_name: str, job_role: Optional[str], url: Optional[str]) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT report, created_at FROM reports WHERE key = ?", (report_key(company_name, job_role, url),)
+            ).fetchone()
+        if row is None or (self.report_ttl_seconds and time.time() - row[1] > self.report_ttl_seconds):
+            return None
+        return row[0]
+
+    def get_company_sections(self, company_name: str) -> Dict[str, str]:
+        cutoff = time.time() - self.section_ttl_seconds if self.section_ttl_seconds else 0
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT section, content FROM company_sections WHERE company = ? AND created_at >= ?",
+                (normalize_company(company_name), cutoff),
+            ).fetchall()
+        return dict(rows)
+
+    def put(self, company_name: str, job_role: Optional[str], url: Optional[str], report: str):
+        """보고서를 저장합니다. 번호 섹션을 하나도 찾을 수 없는(형식이 깨진) 보고서는 저장하지 않습니다."""
+        sections = split_sections(report)
+        if not sections:
+            return
+        now = time.time()
+        company = normalize_company(company_name)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO reports VALUES (?, ?, ?, ?, ?, ?)",
+                (report_key(company_name, job_role, url), company, normalize_role(job_role), normalize_url(url), report, now),
+            )
+            # 재사용해 그대로 들어간 섹션은 저장 시각을 갱신하지 않아 신선도 기준이 계속 연장되지 않도록 합니다.
+            self._conn.executemany(
+                "INSERT INTO company_sections VALUES (?, ?, ?, ?) ON CONFLICT(company, section) DO UPDATE SET"
+                " content = excluded.content, created_at = excluded.created_at WHERE content != excluded.content",
+                [(company, section, sections[section], now) for section in COMPANY_SECTIONS if sections.get(section, "").strip()],
+            )
+            self._conn.commit()
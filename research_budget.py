@@ -0,0 +1,137 @@
+import os
+import re
+import time
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+from langchain_core.tools import BaseTool, StructuredTool
+from report_cache import normalize_url
+
+DEFAULT_TIME_BUDGET_SECONDS = 240
+DEFAULT_TOKEN_BUDGET = 120_000
+REPORT_SECTIONS = ("1.1", "1.2", "2.1", "2.2", "3.1", "3.2")
+# 도구 호출(도구 이름 + 입력)이 어떤 보고서 섹션의 자료가 되는지 판단하는 규칙. SOP의 각 단계 검색어에 대응합니다.
+SECTION_QUERY_PATTERNS = {
+    "1.1": re.compile(r"홈페이지|회사\s*소개|연혁|비전|인재상", re.IGNORECASE),
+    "1.2": re.compile(r"기술\s*블로그|engineering|tech|개발\s*문화|기술\s*스택", re.IGNORECASE),
+    "2.2": re.compile(r"직무\s*기술서|\bJD\b|직무\s*설명|job\s*description", re.IGNORECASE),
+    "3.1": re.compile(r"경쟁사|competitor|시장\s*점유율", re.IGNORECASE),
+    "3.2": re.compile(r"트렌드|동향|전망|보고서|리포트|trend", re.IGNORECASE),
+}
+_ERROR_PREFIXES = ("웹사이트 스크래핑 중 오류", "No good", "Error")
+
+
+def _normalize_tool_input(tool_input: Any) -> str:
+    if isinstance(tool_input, dict):
+        tool_input = " ".join(str(v) for v in tool_input.values())
+    text = re.sub(r"\s+", " ", str(tool_input)).strip()
+    if re.match(r"https?://", text, re.IGNORECASE):
+        return normalize_url(text)
+    return text.lower()
+
+
+class ToolCallMemo:
+    """
+    한 번의 분석 실행 동안 같은 도구를 같은 입력(공백, 대소문자, URL 표기 정규화)으로 다시 호출하면 이전 결과를 돌려줍니다.
+    에이전트가 같은 검색어를 반복하거나 같은 URL을 두 번 스크래핑하는 경우를 막습니다.
+    """
+    def __init__(self):
+        self._results: Dict[Tuple[str, str], str] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+
+    def get_or_call(self, tool_name: str, tool_input: Any, fn: Callable[[], str]) -> str:
+        key = (tool_name, _normalize_tool_input(tool_input))
+        with self._lock:
+            if key in self._results:
+                self.hits += 1
+                print(f">>> 도구 호출 재사용: {tool_name}({key[1][:80]})")
+                return self._results[key]
+        result = fn()
+        with self._lock:
+            self._results[key] = result
+        return result
+
+    def wrap(self, tool: BaseTool) -> BaseTool:
+        """도구의 이름, 설명, 인자 형식은 그대로 두고 호출만 메모이즈한 도구를 만듭니다."""
+        def run(**kwargs):
+            return self.get_or_call(tool.name, kwargs, lambda: tool.invoke(kwargs))
+        return StructuredTool.from_function(
+            func=run, name=tool.name, description=tool.description, args_schema=tool.args_schema,
+        )
+
+    def wrap_all(self, tools: Iterable[BaseTool]) -> List[BaseTool]:
+        return [self.wrap(tool) for tool in tools]
+
+
+class TokenUsageCallback(BaseCallbackHandler):
+    """
+    LLM 응답의 토큰 사용량을 누적합니다 (에이전트 루프의 토큰 예산 확인용).
+    에이전트는 LLM을 스트리밍으로 호출하므로 llm_output이 비어 있습니다. 메시지의 usage_metadata를 먼저 보고
+    (AzureChatOpenAI는 stream_usage=True여야 채워짐), 없으면 llm_output의 token_usage를 씁니다.
+    """
+    def __init__(self):
+        self.total_tokens = 0
+
+    def on_llm_end(self, response: LLMResult, **kwargs: Any) -> None:
+        message_tokens = [
+            usage.get("total_tokens", 0) or 0
+            for generations in response.generations
+            for generation in generations
+            if (usage := getattr(getattr(generation, "message", None), "usage_metadata", None))
+        ]
+        if message_tokens:
+            self.total_tokens += sum(message_tokens)
+            return
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        self.total_tokens += usage.get("total_tokens", 0) or 0
+
+
+class ResearchBudget:
+    """
+    에이전트 루프를 언제 멈출지 결정합니다. 모든 보고서 섹션에 뒷받침 자료가 생겼거나,
+    경과 시간(ANALYZER_TIME_BUDGET_SECONDS) 또는 LLM 토큰(ANALYZER_TOKEN_BUDGET) 예산을 다 쓰면 중단합니다.
+    """
+    def __init__(self, posting_url: Optional[str] = None, covered_sections: Iterable[str] = (),
+                 time_budget_seconds: Optional[float] = None, token_budget: Optional[int] = None):
+        self.posting_url = normalize_url(posting_url) if posting_url else ""
+        self.covered = set(covered_sections)
+        if not self.posting_url:
+            # 공고 URL이 없으면 2.1은 채울 자료가 없으므로 기다리지 않습니다.
+            self.covered.add("2.1")
+        self.time_budget_seconds = time_budget_seconds or float(os.getenv("ANALYZER_TIME_BUDGET_SECONDS", DEFAULT_TIME_BUDGET_SECONDS))
+        self.token_budget = token_budget or int(os.getenv("ANALYZER_TOKEN_BUDGET", DEFAULT_TOKEN_BUDGET))
+        self.token_usage = TokenUsageCallback()
+        self.started_at = time.perf_counter()
+
+    def record(self, tool_name: str, tool_input: Any, observation: Any):
+        """도구 호출 결과가 비어 있지 않으면 해당하는 섹션을 자료 확보로 표시합니다."""
+        text = str(observation or "").strip()
+        if not text or text.startswith(_ERROR_PREFIXES):
+            return
+        query = _normalize_tool_input(tool_input)
+        if tool_name == "wikipedia":
+            self.covered.add("1.1")
+        if tool_name == "scrape_website_content" and self.posting_url and query == self.posting_url:
+            self.covered.add("2.1")
+        for section, pattern in SECTION_QUERY_PATTERNS.items():
+            if pattern.search(query):
+                self.covered.add(section)
+
+    @property
+    def missing_sections(self) -> List[str]:
+        return [section for section in REPORT_SECTIONS if section not in self.covered]
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started_at
+
+    def stop_reason(self) -> Optional[str]:
+        if not self.missing_sections:
+            return "모든 섹션의 자료 확보"
+        if self.elapsed >= self.time_budget_seconds:
+            return f"시간 예산 초과 ({self.elapsed:.0f}초)"
+        if self.token_usage.total_tokens >= self.token_budget:
+            return f"토큰 예산 초과 ({self.token_usage.total_tokens}토큰)"
+        return None
@@ -0,0 +1,63 @@
+import sys
+from typing import Any, Iterator, List, Optional
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult, LLMResult
+from research_budget import ResearchBudget, TokenUsageCallback
+
+
+class StreamingUsageModel(BaseChatModel):
+    """AzureChatOpenAI(stream_usage=True)처럼 마지막 청크에만 usage_metadata를 싣고, llm_output은 채우지 않는 가짜 모델."""
+    total_tokens: int = 120
+
+    @property
+    def _llm_type(self) -> str:
+        return "streaming-usage-fake"
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="답변"))])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        for piece in ("기업 ", "분석 ", "결과"):
+            yield ChatGenerationChunk(message=AIMessageChunk(content=piece))
+        usage = {"input_tokens": self.total_tokens - 20, "output_tokens": 20, "total_tokens": self.total_tokens}
+        yield ChatGenerationChunk(message=AIMessageChunk(content="", usage_metadata=usage))
+
+
+def main():
+    """
+    토큰 예산 콜백이 스트리밍 호출(에이전트 루프가 쓰는 방식)에서도 사용량을 세는지 검사합니다 (네트워크 불필요).
+    1) 스트리밍 응답의 usage_metadata 합산, 2) usage_metadata가 없을 때 llm_output 사용, 3) 예산 초과 시 중단 사유.
+    """
+    # --- 1. 스트리밍 응답: llm_output 없이 메시지의 usage_metadata로 집계 ---
+    callback = TokenUsageCallback()
+    model = StreamingUsageModel()
+    text = "".join(chunk.content for chunk in model.stream("질문", config={"callbacks": [callback]}))
+    assert text == "기업 분석 결과"
+    assert callback.total_tokens == 120, callback.total_tokens
+    for _ in model.stream("다음 질문", config={"callbacks": [callback]}):
+        pass
+    assert callback.total_tokens == 240, callback.total_tokens
+
+    # --- 2. 스트리밍이 아닌 응답: llm_output의 token_usage 사용 ---
+    callback = TokenUsageCallback()
+    callback.on_llm_end(LLMResult(
+        generations=[[ChatGeneration(message=AIMessage(content="답변"))]],
+        llm_output={"token_usage": {"total_tokens": 55}},
+    ))
+    assert callback.total_tokens == 55, callback.total_tokens
+
+    # --- 3. 예산을 넘으면 중단 사유를 돌려줌 ---
+    budget = ResearchBudget(token_budget=200)
+    budget.covered.update({"1.1", "1.2", "2.2"})
+    for _ in StreamingUsageModel(total_tokens=250).stream("질문", config={"callbacks": [budget.token_usage]}):
+        pass
+    reason = budget.stop_reason()
+    assert reason and "토큰 예산 초과" in reason, reason
+
+    print(f"토큰 예산 검사 통과 ({reason})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
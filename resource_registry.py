@@ -0,0 +1,236 @@
+import os
+import threading
+from typing import Dict, Optional, Tuple
+from dotenv import load_dotenv
+from langchain_openai import AzureChatOpenAI, AzureOpenAIEmbeddings
+from langchain_community.vectorstores import FAISS
+from faiss_storage import DOCSTORE_NAME, INDEX_NAME, LEGACY_PICKLE_NAME, load_vector_db
+from ann_index import ANN_META_NAME
+from lexical_index import LEXICAL_INDEX_NAME, HybridRetriever, LexicalIndex, load_lexical_index
+from embedding_cache import DEFAULT_CACHE_PATH, DEFAULT_MAX_ENTRIES, CachedEmbeddings, EmbeddingCache
+from llm_cache import (
+    DEFAULT_LLM_CACHE_MAX_ENTRIES, DEFAULT_LLM_CACHE_PATH, DEFAULT_LLM_CACHE_TTL_SECONDS, LLMResponseCache, LLMResponseStore,
+)
+from http_cache import DEFAULT_FRESH_SECONDS, DEFAULT_HTTP_CACHE_MAX_BYTES, DEFAULT_HTTP_CACHE_PATH, HttpCache
+from report_cache import DEFAULT_REPORT_CACHE_PATH, DEFAULT_REPORT_TTL_SECONDS, DEFAULT_SECTION_TTL_SECONDS, ReportStore
+from session_store import DEFAULT_SESSION_STORE_PATH, DEFAULT_SESSION_TTL_SECONDS, SessionStore
+
+load_dotenv()
+
+DB_PATH = "faiss_db"
+EMBEDDING_MODEL = "text-embedding-3-small"
+# 인덱스 버전 판단에 사용하는 파일 목록 (이전 형식의 index.pkl, 근사 인덱스 메타데이터, 어휘 색인 포함)
+INDEX_FILES = (INDEX_NAME, DOCSTORE_NAME, LEGACY_PICKLE_NAME, ANN_META_NAME, LEXICAL_INDEX_NAME)
+
+
+class ResourceRegistry:
+    """
+    FAISS 인덱스, 임베딩 클라이언트, LLM 클라이언트를 프로세스 전역에서 공유하는 레지스트리.
+    모든 리소스는 처음 요청될 때 한 번만 생성되며, 벡터 DB는 디스크의 인덱스 버전이 바뀐 경우에만 다시 로드합니다.
+    """
+    def __init__(self, db_path: str = DB_PATH, embedding_model: str = EMBEDDING_MODEL):
+        self.db_path = db_path
+        self.embedding_model = embedding_model
+        self._lock = threading.RLock()
+        self._embeddings = None
+        self._vectorstore: Optional[FAISS] = None
+        self._lexical_index: Optional[LexicalIndex] = None
+        self._index_version: Optional[Tuple] = None
+        self._chat_llms: Dict[Tuple, AzureChatOpenAI] = {}
+        self._openai_client = None
+        self._llm_response_store: Optional[LLMResponseStore] = None
+        self._report_store: Optional[ReportStore] = None
+        self._http_cache: Optional[HttpCache] = None
+        self._session_store: Optional[SessionStore] = None
+
+    def get_embeddings(self):
+        """
+        임베딩 클라이언트를 반환합니다. EMBEDDING_CACHE_PATH가 빈 문자열이 아니면
+        디스크 캐시(CachedEmbeddings)로 감싸서, 이미 임베딩한 청크와 질의는 API를 다시 호출하지 않습니다.
+        """
+        if self._embeddings is None:
+            with self._lock:
+                if self._embeddings is None:
+                    embeddings = AzureOpenAIEmbeddings(model=self.embedding_model)
+                    cache_path = os.getenv("EMBEDDING_CACHE_PATH", DEFAULT_CACHE_PATH)
+                    if cache_path:
+                        max_entries = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES))
+                        embeddings = CachedEmbeddings(embeddings, self.embedding_model, EmbeddingCache(cache_path, max_entries))
+                    self._embeddings = embeddings
+        return self._embeddings
+
+    def get_index_version(self) -> Optional[Tuple]:
+        """디스크에 저장된 인덱스 파일들의 (이름, 수정 시각, 크기)로 버전을 계산합니다. DB가 없으면 None."""
+        version = []
+        for name in INDEX_FILES:
+            path = os.path.join(self.db_path, name)
+            if os.path.exists(path):
+                stat = os.stat(path)
+                version.append((name, stat.st_mtime_ns, stat.st_size))
+        if len(version) < 2:
+            return None
+        return tuple(version)
+
+    def get_vectorstore(self) -> Optional[FAISS]:
+        """현재 디스크 버전의 벡터스토어를 반환합니다. 버전이 바뀐 경우에만 다시 로드합니다."""
+        version = self.get_index_version()
+        if version is not None and version == self._index_version:
+            return self._vectorstore
+        with self._lock:
+            version = self.get_index_version()
+            if version == self._index_version:
+                return self._vectorstore
+            if version is None:
+                self._vectorstore, self._lexical_index, self._index_version = None, None, None
+                return None
+            try:
+                print(f"--- 벡터 DB '{self.db_path}' 로드 (버전 변경 감지) ---")
+                # 인덱스는 메모리 매핑, 청크는 SQLite에서 top-k만 지연 조회합니다.
+                self._vectorstore = load_vector_db(self.db_path, self.get_embeddings())
+                self._lexical_index = load_lexical_index(self.db_path)
+                self._index_version = version
+            except Exception as e:
+                print(f"오류: FAISS DB 로드 실패: {e}")
+                self._vectorstore, self._lexical_index, self._index_version = None, None, None
+            return self._vectorstore
+
+    def get_lexical_index(self) -> Optional[LexicalIndex]:
+        """벡터스토어와 같은 버전의 어휘 색인(BM25)을 반환합니다. 색인이 없으면 None."""
+        self.get_vectorstore()
+        return self._lexical_index
+
+    def get_retriever(self, k: int = 5, hybrid: bool = True, metadata_filter: Optional[Dict] = None):
+        """
+        어휘 색인이 있으면 BM25 + 벡터 검색을 합친 HybridRetriever를, 없으면 벡터 검색 retriever를 반환합니다.
+        HYBRID_RETRIEVAL=0이면 항상 벡터 검색만 사용합니다.
+        metadata_filter(doc_metadata.metadata_filter_from 참고)를 주면 해당 문서 종류/면접 형식 등의 청크만 검색합니다.
+        """
+        with self._lock:
+            vectorstore = self.get_vectorstore()
+            lexical_index = self._lexical_index
+        if vectorstore is None:
+            return None
+        if not hybrid or os.getenv("HYBRID_RETRIEVAL", "1") == "0":
+            lexical_index = None
+        if lexical_index is None and not metadata_filter:
+            return vectorstore.as_retriever(search_kwargs={'k': k})
+        return HybridRetriever(vectorstore=vectorstore, lexical_index=lexical_index, k=k, metadata_filter=metadata_filter)
+
+    def get_chat_llm(self, deployment: Optional[str], temperature: float, max_tokens: int, cache: bool = False) -> AzureChatOpenAI:
+        """
+        채팅 LLM 클라이언트를 반환합니다. cache=True이면 같은 입력에 대한 응답을 디스크 캐시(get_llm_cache)에서 돌려줍니다.
+        """
+        key = (deployment, temperature, max_tokens, cache)
+        llm = self._chat_llms.get(key)
+        if llm is None:
+            with self._lock:
+                llm = self._chat_llms.get(key)
+                if llm is None:
+                    llm_cache = self.get_llm_cache(deployment, temperature) if cache else None
+                    llm = AzureChatOpenAI(
+                        azure_deployment=deployment, temperature=temperature, max_tokens=max_tokens,
+                        cache=llm_cache if llm_cache is not None else False,
+                    )
+                    self._chat_llms[key] = llm
+        return llm
+
+    def get_llm_response_store(self) -> Optional[LLMResponseStore]:
+        """
+        LLM 응답 캐시 저장소. LLM_CACHE_PATH가 빈 문자열이면 캐시를 사용하지 않습니다 (None).
+        LLM_CACHE_TTL_SECONDS, LLM_CACHE_MAX_ENTRIES로 만료 시간과 최대 항목 수를 조정합니다.
+        """
+        if self._llm_response_store is None:
+            with self._lock:
+                cache_path = os.getenv("LLM_CACHE_PATH", DEFAULT_LLM_CACHE_PATH)
+                if self._llm_response_store is None and cache_path:
+                    self._llm_response_store = LLMResponseStore(
+                        cache_path,
+                        ttl_seconds=int(os.getenv("LLM_CACHE_TTL_SECONDS", DEFAULT_LLM_CACHE_TTL_SECONDS)),
+                        max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", DEFAULT_LLM_CACHE_MAX_ENTRIES)),
+                    )
+        return self._llm_response_store
+
+    def get_llm_cache(self, deployment: Optional[str], temperature: Optional[float]) -> Optional[LLMResponseCache]:
+        """LangChain 채팅 모델의 cache 인자로 넘길 응답 캐시. 레지스트리 밖에서 만든 LLM(personal_info 등)에도 사용합니다."""
+        store = self.get_llm_response_store()
+        if store is None:
+            return None
+        return LLMResponseCache(store, deployment, temperature)
+
+    def get_report_store(self) -> Optional[ReportStore]:
+        """
+        기업 분석 보고서 캐시. REPORT_CACHE_PATH가 빈 문자열이면 사용하지 않습니다 (None).
+        REPORT_CACHE_TTL_SECONDS(전체 보고서), REPORT_SECTION_TTL_SECONDS(회사 단위 섹션)로 신선도 기준을 조정합니다.
+        """
+        if self._report_store is None:
+            with self._lock:
+                cache_path = os.getenv("REPORT_CACHE_PATH", DEFAULT_REPORT_CACHE_PATH)
+                if self._report_store is None and cache_path:
+                    self._report_store = ReportStore(
+                        cache_path,
+                        report_ttl_seconds=int(os.getenv("REPORT_CACHE_TTL_SECONDS", DEFAULT_REPORT_TTL_SECONDS)),
+                        section_ttl_seconds=int(os.getenv("REPORT_SECTION_TTL_SECONDS", DEFAULT_SECTION_TTL_SECONDS)),
+                    )
+        return self._report_store
+
+    def get_http_cache(self) -> Optional[HttpCache]:
+        """
+        웹 페이지, 첨부 PDF, 위키피디아 조회 결과를 저장하는 HTTP 캐시. HTTP_CACHE_PATH가 빈 문자열이면 사용하지 않습니다 (None).
+        HTTP_CACHE_FRESH_SECONDS(재검증 없이 사용하는 기간), HTTP_CACHE_MAX_BYTES(최대 저장 용량)로 조정합니다.
+        """
+        if self._http_cache is None:
+            with self._lock:
+                cache_path = os.getenv("HTTP_CACHE_PATH", DEFAULT_HTTP_CACHE_PATH)
+                if self._http_cache is None and cache_path:
+                    self._http_cache = HttpCache(
+                        cache_path,
+                        fresh_seconds=int(os.getenv("HTTP_CACHE_FRESH_SECONDS", DEFAULT_FRESH_SECONDS)),
+                        max_bytes=int(os.getenv("HTTP_CACHE_MAX_BYTES", DEFAULT_HTTP_CACHE_MAX_BYTES)),
+                    )
+        return self._http_cache
+
+    def get_session_store(self) -> Optional[SessionStore]:
+        """
+        면접 세션(MemoryHub) 저장소. SESSION_STORE_PATH가 빈 문자열이면 사용하지 않습니다 (None).
+        SESSION_TTL_SECONDS 동안 저장되지 않은 세션은 삭제합니다.
+        """
+        if self._session_store is None:
+            with self._lock:
+                store_path = os.getenv("SESSION_STORE_PATH", DEFAULT_SESSION_STORE_PATH)
+                if self._session_store is None and store_path:
+                    self._session_store = SessionStore(
+                        store_path, ttl_seconds=int(os.getenv("SESSION_TTL_SECONDS", DEFAULT_SESSION_TTL_SECONDS))
+                    )
+        return self._session_store
+
+    def get_openai_client(self):
+        """LangChain을 거치지 않는 호출(azure_answer_analysis)을 위한 Azure OpenAI SDK 클라이언트."""
+        if self._openai_client is None:
+            with self._lock:
+                if self._openai_client is None:
+                    from openai import AzureOpenAI
+                    self._openai_client = AzureOpenAI(
+                        azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
+                        api_key=os.getenv("AZURE_OPENAI_API_KEY"),
+                        api_version=os.getenv("AZURE_OPENAI_API_VERSION", "2024-12-01-preview"),
+                    )
+        return self._openai_client
+
+    def invalidate(self):
+        """캐시된 벡터스토어를 버려 다음 요청 시 디스크에서 다시 로드하도록 합니다."""
+        with self._lock:
+            self._vectorstore, self._lexical_index, self._index_version = None, None, None
+
+
+_registry: Optional[ResourceRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> ResourceRegistry:
+    """프로세스 전역 레지스트리를 반환합니다. 최초 호출 시 생성됩니다."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = ResourceRegistry()
+    return _registry
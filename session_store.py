@@ -0,0 +1,191 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+import hashlib
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Set, Type, TypeVar
+from pydantic import BaseModel
+
+DEFAULT_SESSION_STORE_PATH = os.path.join(".cache", "sessions.sqlite")
+# 마지막 저장 이후 이 시간이 지난 세션은 저장소를 열 때 삭제합니다.
+DEFAULT_SESSION_TTL_SECONDS = 14 * 24 * 3600
+CHAT_HISTORY_FIELD = "chat_history"
+
+HubT = TypeVar("HubT", bound=BaseModel)
+
+
+def _fingerprint(value: Any) -> str:
+    return hashlib.sha256(json.dumps(value, ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class SessionStore:
+    """
+    MemoryHub(개인 정보, 기업 분석, 면접 진행 상태)를 세션 ID로 저장하는 SQLite 저장소. 어느 워커에서든 세션 ID로 이어서 진행할 수 있습니다.
+    필드는 '섹션.필드' 단위로 저장하고 마지막 저장 이후 바뀐 필드만 다시 씁니다. 대화 기록은 새 메시지만 덧붙입니다.
+    불러올 때 lazy_fields(기업 분석 보고서 전문 등 큰 필드)는 읽지 않고, ensure_loaded()로 처음 필요할 때 읽습니다.
+    """
+    def __init__(self, path: str = DEFAULT_SESSION_STORE_PATH, ttl_seconds: int = DEFAULT_SESSION_TTL_SECONDS):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        # 세션별로 마지막으로 저장한 필드 값의 지문, 대화 기록 저장 위치, 아직 읽지 않은 큰 필드
+        self._saved: Dict[str, Dict[str, str]] = {}
+        self._saved_messages: Dict[str, int] = {}
+        self._unloaded: Dict[str, Set[str]] = {}
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions (session_id TEXT PRIMARY KEY, created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS session_fields ("
+            " session_id TEXT NOT NULL, field TEXT NOT NULL, value TEXT NOT NULL, updated_at REAL NOT NULL,"
+            " PRIMARY KEY (session_id, field))"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS chat_messages ("
+            " session_id TEXT NOT NULL, seq INTEGER NOT NULL, role TEXT NOT NULL, content TEXT NOT NULL, created_at REAL NOT NULL,"
+            " PRIMARY KEY (session_id, seq))"
+        )
+        self._conn.commit()
+        self._purge_expired()
+
+    @staticmethod
+    def new_session_id() -> str:
+        return uuid.uuid4().hex
+
+    def _purge_expired(self):
+        if not self.ttl_seconds:
+            return
+        cutoff = time.time() - self.ttl_seconds
+        with self._lock:
+            expired = [row[0] for row in self._conn.execute("SELECT session_id FROM sessions WHERE updated_at < ?", (cutoff,))]
+            for table in ("chat_messages", "session_fields", "sessions"):
+                self._conn.executemany(f"DELETE FROM {table} WHERE session_id = ?", [(sid,) for sid in expired])
+            self._conn.commit()
+        if expired:
+            print(f"세션 저장소 정리: 오래된 세션 {len(expired)}개 삭제")
+
+    @staticmethod
+    def _section_fields(hub: BaseModel) -> Dict[str, Any]:
+        """허브의 하위 모델(섹션) 필드들을 {'섹션.필드': 값}으로 펼칩니다. 대화 기록은 따로 저장하므로 제외합니다."""
+        fields = {}
+        for section in type(hub).model_fields:
+            value = getattr(hub, section)
+            if not isinstance(value, BaseModel):
+                continue
+            for name, field_value in value.model_dump(mode="json").items():
+                if name != CHAT_HISTORY_FIELD:
+                    fields[f"{section}.{name}"] = field_value
+        return fields
+
+    @staticmethod
+    def _placeholder(hub: BaseModel, key: str) -> Any:
+        section, name = key.split(".", 1)
+        field = type(getattr(hub, section)).model_fields[name]
+        return field.get_default(call_default_factory=True)
+
+    def save(self, hub: BaseModel, session_id: str):
+        """바뀐 필드와 새로 추가된 대화 메시지만 저장합니다. 대화 기록이 새로 시작되었으면 대화 기록 전체를 다시 씁니다."""
+        now = time.time()
+        saved = self._saved.setdefault(session_id, {})
+        unloaded = self._unloaded.setdefault(session_id, set())
+        changed: Dict[str, str] = {}
+        for key, value in self._section_fields(hub).items():
+            if key in unloaded:
+                # 아직 읽지 않은 큰 필드가 기본값 그대로이면 저장된 값을 덮어쓰지 않습니다.
+                if value == self._placeholder(hub, key):
+                    continue
+                unloaded.discard(key)
+            fingerprint = _fingerprint(value)
+            if saved.get(key) != fingerprint:
+                changed[key] = json.dumps(value, ensure_ascii=False)
+                saved[key] = fingerprint
+
+        history: List[dict] = getattr(getattr(hub, "interview_session", None), CHAT_HISTORY_FIELD, None) or []
+        count = self._saved_messages.get(session_id, 0)
+        last_key = f"{CHAT_HISTORY_FIELD}.last"
+        rewrite = len(history) < count or (count and saved.get(last_key) != _fingerprint(history[count - 1]))
+        start = 0 if rewrite else count
+        new_messages = [(session_id, seq, msg["role"], msg["content"], now) for seq, msg in enumerate(history) if seq >= start]
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO sessions VALUES (?, ?, ?) ON CONFLICT(session_id) DO UPDATE SET updated_at = excluded.updated_at",
+                (session_id, now, now),
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO session_fields VALUES (?, ?, ?, ?)",
+                [(session_id, key, value, now) for key, value in changed.items()],
+            )
+            if rewrite:
+                self._conn.execute("DELETE FROM chat_messages WHERE session_id = ?", (session_id,))
+            self._conn.executemany("INSERT OR REPLACE INTO chat_messages VALUES (?, ?, ?, ?, ?)", new_messages)
+            self._conn.commit()
+        self._saved_messages[session_id] = len(history)
+        if history:
+            saved[last_key] = _fingerprint(history[-1])
+
+    def load(self, session_id: str, hub_cls: Type[HubT], lazy_fields: Iterable[str] = ()) -> Optional[HubT]:
+        """저장된 세션을 hub_cls로 복원합니다. 세션이 없거나 만료되었으면 None."""
+        lazy_fields = set(lazy_fields)
+        with self._lock:
+            exists = self._conn.execute("SELECT 1 FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+            if exists is None:
+                return None
+            # 큰 필드는 값을 읽지 않고 저장되어 있는지만 확인합니다.
+            marks = ", ".join("?" * len(lazy_fields))
+            rows = self._conn.execute(
+                f"SELECT field, CASE WHEN field IN ({marks}) THEN NULL ELSE value END FROM session_fields WHERE session_id = ?",
+                (*lazy_fields, session_id),
+            ).fetchall()
+            messages = self._conn.execute(
+                "SELECT role, content FROM chat_messages WHERE session_id = ? ORDER BY seq", (session_id,)
+            ).fetchall()
+        data: Dict[str, Dict[str, Any]] = {}
+        saved, unloaded = {}, set()
+        for key, value in rows:
+            if key in lazy_fields:
+                unloaded.add(key)
+                continue
+            section, name = key.split(".", 1)
+            data.setdefault(section, {})[name] = json.loads(value)
+            saved[key] = _fingerprint(data[section][name])
+        history = [{"role": role, "content": content} for role, content in messages]
+        data.setdefault("interview_session", {})[CHAT_HISTORY_FIELD] = history
+        hub = hub_cls.model_validate(data)
+        self._saved[session_id] = saved
+        self._unloaded[session_id] = unloaded
+        self._saved_messages[session_id] = len(history)
+        if history:
+            saved[f"{CHAT_HISTORY_FIELD}.last"] = _fingerprint(history[-1])
+        print(f"세션 '{session_id}' 복원 (메시지 {len(history)}개, 나중에 읽을 필드 {len(unloaded)}개)")
+        return hub
+
+    def _load_field_value(self, session_id: str, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM session_fields WHERE session_id = ? AND field = ?", (session_id, key)
+            ).fetchone()
+        return row[0] if row else None
+
+    def ensure_loaded(self, hub: BaseModel, session_id: str, *keys: str):
+        """load()에서 건너뛴 큰 필드 중 keys에 해당하는 것을 읽어 허브에 채웁니다. 이미 읽었으면 아무것도 하지 않습니다."""
+        unloaded = self._unloaded.get(session_id, set())
+        for key in keys:
+            if key not in unloaded:
+                continue
+            unloaded.discard(key)
+            section, name = key.split(".", 1)
+            if getattr(getattr(hub, section), name) != self._placeholder(hub, key):
+                # 읽기 전에 새 값이 들어갔으면 그 값을 유지합니다 (다음 save()에서 저장됨).
+                continue
+            raw = self._load_field_value(session_id, key)
+            if raw is None:
+                continue
+            value = json.loads(raw)
+            setattr(getattr(hub, section), name, value)
+            self._saved.setdefault(session_id, {})[key] = _fingerprint(value)
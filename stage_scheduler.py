@@ -0,0 +1,100 @@
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence
+
+DEFAULT_STAGE_WORKERS = 4
+
+
+class StageError(Exception):
+    """단계 실행 중 발생한 오류. 어느 단계에서 실패했는지(stage)와 원래 예외(cause)를 함께 전달합니다."""
+    def __init__(self, stage: "Stage", cause: BaseException):
+        super().__init__(f"{stage.label}: {cause}")
+        self.stage = stage
+        self.cause = cause
+
+
+class Stage(NamedTuple):
+    """
+    준비 파이프라인의 한 단계. fn은 선행 단계(deps)의 결과를 {단계 이름: 결과}로 받습니다.
+    optional=True인 단계는 실패해도 전체를 중단하지 않고 결과를 None으로 둡니다.
+    """
+    name: str
+    label: str
+    fn: Callable[[Dict[str, Any]], Any]
+    deps: Sequence[str] = ()
+    optional: bool = False
+
+
+class StageEvent(NamedTuple):
+    stage: Stage
+    status: str  # "started" | "done" | "failed"
+    elapsed: float
+    error: Optional[BaseException] = None
+
+
+class StageScheduler:
+    """
+    단계들을 의존 관계(DAG)에 따라 실행합니다. 선행 단계가 없는 단계들은 동시에 시작하고,
+    나머지 단계는 선행 단계가 모두 끝나는 즉시 시작합니다.
+    단계 함수는 작업 스레드에서 실행되지만 on_event 콜백은 항상 run()을 호출한 스레드에서 불리므로
+    Streamlit 화면 갱신을 콜백에서 해도 됩니다.
+    """
+    def __init__(self, stages: List[Stage], max_workers: Optional[int] = None):
+        names = [stage.name for stage in stages]
+        if len(set(names)) != len(names):
+            raise ValueError("단계 이름이 중복되었습니다.")
+        for stage in stages:
+            unknown = [dep for dep in stage.deps if dep not in names]
+            if unknown:
+                raise ValueError(f"'{stage.name}' 단계의 선행 단계를 찾을 수 없습니다: {unknown}")
+        self.stages = stages
+        self.max_workers = max_workers or int(os.getenv("PREPARE_STAGE_WORKERS", DEFAULT_STAGE_WORKERS))
+
+    def run(self, on_event: Optional[Callable[[StageEvent], None]] = None) -> Dict[str, Any]:
+        """
+        모든 단계를 실행하고 {단계 이름: 결과}를 반환합니다.
+        필수 단계가 실패하면 아직 시작하지 않은 단계는 실행하지 않고, 진행 중인 단계가 끝나기를 기다린 뒤 StageError를 냅니다.
+        """
+        emit = on_event or (lambda event: None)
+        results: Dict[str, Any] = {}
+        pending = list(self.stages)
+        running: Dict[Future, Stage] = {}
+        started_at: Dict[str, float] = {}
+        failure: Optional[StageError] = None
+        start = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="stage") as executor:
+            while pending or running:
+                if failure is None:
+                    for stage in [s for s in pending if all(dep in results for dep in s.deps)]:
+                        pending.remove(stage)
+                        inputs = {dep: results[dep] for dep in stage.deps}
+                        started_at[stage.name] = time.perf_counter()
+                        running[executor.submit(stage.fn, inputs)] = stage
+                        emit(StageEvent(stage, "started", 0.0))
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage = running.pop(future)
+                    elapsed = time.perf_counter() - started_at[stage.name]
+                    try:
+                        results[stage.name] = future.result()
+                    except Exception as e:
+                        print(f"경고: '{stage.label}' 단계 실패 ({elapsed:.2f}초): {e}")
+                        emit(StageEvent(stage, "failed", elapsed, e))
+                        if stage.optional:
+                            results[stage.name] = None
+                        elif failure is None:
+                            failure = StageError(stage, e)
+                        continue
+                    print(f"'{stage.label}' 단계 완료 ({elapsed:.2f}초)")
+                    emit(StageEvent(stage, "done", elapsed))
+
+        if failure is not None:
+            raise failure
+        if pending:
+            raise ValueError(f"순환 의존 관계로 실행할 수 없는 단계가 있습니다: {[stage.name for stage in pending]}")
+        print(f"준비 파이프라인 완료 (전체 {time.perf_counter() - start:.2f}초)")
+        return results
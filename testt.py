@@ -3,9 +3,9 @@ from dotenv import load_dotenv
 
 # 기존에 만든 두 개의 핵심 로직을 임포트합니다.
 from agentA import run_analyzer
-from langchain_community.vectorstores import FAISS
-from langchain_openai import AzureOpenAIEmbeddings, AzureChatOpenAI
+from langchain_openai import AzureChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
+from resource_registry import get_registry
 
 # .env 파일 로드
 load_dotenv()
@@ -16,18 +16,11 @@ def search_internal_db(query: str, k: int = 5) -> list[str]:
     (RAG_test.py의 핵심 로직)
     """
     print(f"\n--- 내부 DB에서 '{query}'(으)로 유사도 검색 시작 ---")
-    db_path = "faiss_db"
-    if not os.path.exists(db_path):
-        print(" -> FAISS DB를 찾을 수 없습니다. build_faiss_db.py를 먼저 실행하세요.")
-        return []
-
     try:
-        embeddings = AzureOpenAIEmbeddings(model="text-embedding-3-small")
-        vectorstore = FAISS.load_local(
-            db_path,
-            embeddings=embeddings,
-            allow_dangerous_deserialization=True
-        )
+        vectorstore = get_registry().get_vectorstore()
+        if vectorstore is None:
+            print(" -> FAISS DB를 찾을 수 없습니다. build_faiss_db.py를 먼저 실행하세요.")
+            return []
         results = vectorstore.similarity_search(query, k=k)
         
         # 검색된 문서의 내용만 추출하여 리스트로 반환
@@ -0,0 +1,126 @@
+import os
+import json
+import hashlib
+from typing import Dict, List, Optional
+from pydantic import BaseModel, Field
+
+MANIFEST_NAME = "manifest.json"
+LEGACY_LOG_NAME = "processed_files.log"
+
+# --- 매니페스트 구조 정의 ---
+class FileEntry(BaseModel):
+    sha256: str
+    size: int
+    mtime: float
+    chunk_ids: List[str] = Field(default_factory=list)
+    embedding_model: str
+
+class Manifest(BaseModel):
+    files: Dict[str, FileEntry] = Field(default_factory=dict)
+
+class ManifestDiff(BaseModel):
+    added: List[str] = Field(default_factory=list)
+    modified: List[str] = Field(default_factory=list)
+    deleted: List[str] = Field(default_factory=list)
+    unchanged: List[str] = Field(default_factory=list)
+
+    def has_changes(self) -> bool:
+        return bool(self.added or self.modified or self.deleted)
+
+    def files_to_process(self) -> List[str]:
+        return sorted(self.added + self.modified)
+
+    def describe(self) -> str:
+        lines = [f"추가 {len(self.added)}개, 변경 {len(self.modified)}개, 삭제 {len(self.deleted)}개, 유지 {len(self.unchanged)}개"]
+        for label, names in (("+", self.added), ("~", self.modified), ("-", self.deleted)):
+            lines.extend(f"  {label} {name}" for name in sorted(names))
+        return "\n".join(lines)
+
+def file_sha256(path: str, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def make_entry(path: str, embedding_model: str, sha256: Optional[str] = None, chunk_ids: Optional[List[str]] = None) -> FileEntry:
+    stat = os.stat(path)
+    return FileEntry(
+        sha256=sha256 or file_sha256(path),
+        size=stat.st_size,
+        mtime=stat.st_mtime,
+        chunk_ids=chunk_ids or [],
+        embedding_model=embedding_model,
+    )
+
+def load_manifest(db_path: str, embedding_model: str, vectorstore=None, doc_dir: str = "data") -> Manifest:
+    """
+    매니페스트를 읽습니다. 매니페스트 없이 processed_files.log만 있는 기존 DB는
+    docstore의 source 메타데이터로 파일별 청크 id를 복원하여 변환합니다.
+    """
+    manifest_path = os.path.join(db_path, MANIFEST_NAME)
+    if os.path.exists(manifest_path):
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            return Manifest.model_validate(json.load(f))
+    manifest = Manifest()
+    log_path = os.path.join(db_path, LEGACY_LOG_NAME)
+    if vectorstore is None or not os.path.exists(log_path):
+        return manifest
+    print("기존 processed_files.log를 매니페스트로 변환합니다...")
+    ids_by_source: Dict[str, List[str]] = {}
+    for doc_id in vectorstore.index_to_docstore_id.values():
+        doc = vectorstore.docstore.search(doc_id)
+        source = getattr(doc, "metadata", {}).get("source")
+        if source:
+            # PDF 로더는 source에 전체 경로를 기록하므로 파일명 기준으로 맞춥니다.
+            ids_by_source.setdefault(os.path.basename(source), []).append(doc_id)
+    for source, chunk_ids in ids_by_source.items():
+        path = os.path.join(doc_dir, source)
+        if os.path.exists(path):
+            manifest.files[source] = make_entry(path, embedding_model, chunk_ids=chunk_ids)
+        else:
+            # 이미 삭제된 파일: 다음 diff에서 삭제 대상으로 잡히도록 빈 해시로 남겨둡니다.
+            manifest.files[source] = FileEntry(sha256="", size=0, mtime=0, chunk_ids=chunk_ids, embedding_model=embedding_model)
+    return manifest
+
+def save_manifest(db_path: str, manifest: Manifest):
+    """임시 파일에 쓴 뒤 교체하여, 중간에 실패해도 이전 매니페스트가 깨지지 않도록 합니다."""
+    manifest_path = os.path.join(db_path, MANIFEST_NAME)
+    tmp_path = manifest_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest.model_dump(), f, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, manifest_path)
+    log_path = os.path.join(db_path, LEGACY_LOG_NAME)
+    if os.path.exists(log_path):
+        os.remove(log_path)
+
+def compute_diff(manifest: Manifest, doc_dir: str, current_files: List[str], embedding_model: str) -> tuple[ManifestDiff, Dict[str, str]]:
+    """
+    현재 파일 목록과 매니페스트를 비교합니다. 크기와 수정 시각이 같으면 해시 계산을 생략하고,
+    다르면 해시로 실제 내용 변경 여부를 판단합니다. 새로 계산한 해시는 재사용을 위해 함께 반환합니다.
+    """
+    diff = ManifestDiff()
+    hashes: Dict[str, str] = {}
+    for name in sorted(current_files):
+        path = os.path.join(doc_dir, name)
+        entry = manifest.files.get(name)
+        if entry is None:
+            diff.added.append(name)
+            continue
+        if entry.embedding_model != embedding_model:
+            diff.modified.append(name)
+            continue
+        stat = os.stat(path)
+        if stat.st_size == entry.size and stat.st_mtime == entry.mtime:
+            diff.unchanged.append(name)
+            continue
+        hashes[name] = file_sha256(path)
+        if hashes[name] == entry.sha256:
+            diff.unchanged.append(name)
+            # 내용은 같고 mtime만 바뀐 경우 다음 실행에서 다시 해시하지 않도록 갱신합니다.
+            manifest.files[name] = entry.model_copy(update={"mtime": stat.st_mtime, "size": stat.st_size})
+        else:
+            diff.modified.append(name)
+    current = set(current_files)
+    diff.deleted = sorted(name for name in manifest.files if name not in current)
+    return diff, hashes
@@ -0,0 +1,418 @@
+import os
+import re
+import json
+import time
+import atexit
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import List, Optional, Tuple
+import requests
+from requests.adapters import HTTPAdapter
+from urllib.parse import urljoin
+from bs4 import BeautifulSoup
+import fitz
+from pydantic import BaseModel
+from content_extraction import extract_main_text
+from http_cache import CachedResponse, download, to_cached_response
+from resource_registry import get_registry
+
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/126.0 Safari/537.36"
+)
+HTTP_TIMEOUT = 10
+# 본문 텍스트가 이보다 짧으면 자바스크립트로 그려지는 페이지로 보고 브라우저로 다시 엽니다.
+MIN_STATIC_TEXT_CHARS = 500
+BROWSER_PAGE_LOAD_TIMEOUT = 20
+# 렌더링 대기: 본문 길이가 STABLE_CHECKS번 연속 그대로이면 로딩이 끝난 것으로 봅니다.
+RENDER_POLL_SECONDS = 0.25
+RENDER_STABLE_CHECKS = 2
+RENDER_MAX_WAIT_SECONDS = 8
+# 메모리 누수를 막기 위해 브라우저 하나로 이만큼 페이지를 연 뒤에는 새로 띄웁니다.
+BROWSER_MAX_PAGES = 50
+# 풀의 브라우저가 모두 사용 중일 때 반납을 기다리는 최대 시간.
+BROWSER_ACQUIRE_TIMEOUT = 60
+
+_SPA_ROOT_RE = re.compile(r'<div[^>]+id=["\'](?:root|app|__next|__nuxt)["\'][^>]*>\s*</div>', re.IGNORECASE)
+_JS_REQUIRED_RE = re.compile(r"(enable|requires?)\s+javascript|자바스크립트를\s*(활성화|사용)", re.IGNORECASE)
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def get_http_session() -> requests.Session:
+    """연결을 재사용하는 프로세스 전역 HTTP 세션 (페이지, 첨부 PDF 다운로드가 함께 사용)."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=16, pool_maxsize=16, max_retries=1)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                session.headers.update({"User-Agent": USER_AGENT, "Accept-Language": "ko-KR,ko;q=0.9,en;q=0.8"})
+                _session = session
+    return _session
+
+
+def visible_text_length(html: str) -> int:
+    soup = BeautifulSoup(html, "html.parser")
+    for tag in soup(["script", "style", "noscript", "template"]):
+        tag.decompose()
+    return len(soup.get_text(separator=" ", strip=True))
+
+
+def needs_javascript(html: str) -> bool:
+    """정적 HTML만으로 내용이 충분한지 판단합니다. 빈 SPA 루트, 'JavaScript 필요' 안내, 너무 짧은 본문이면 True."""
+    if _SPA_ROOT_RE.search(html):
+        return True
+    if visible_text_length(html) < MIN_STATIC_TEXT_CHARS:
+        return True
+    return bool(_JS_REQUIRED_RE.search(html[:20000])) and visible_text_length(html) < MIN_STATIC_TEXT_CHARS * 4
+
+
+def fetch_url(url: str, timeout: float = HTTP_TIMEOUT, max_bytes: Optional[int] = None) -> CachedResponse:
+    """공유 세션으로 URL을 가져옵니다. HTTP 캐시가 설정되어 있으면 저장본/조건부 요청(ETag, Last-Modified)을 사용합니다."""
+    http_cache = get_registry().get_http_cache()
+    if http_cache is None:
+        return to_cached_response(download(get_http_session(), url, timeout, max_bytes=max_bytes))
+    return http_cache.fetch(get_http_session(), url, timeout, max_bytes=max_bytes)
+
+
+def fetch_static(url: str) -> Optional[CachedResponse]:
+    """브라우저 없이 HTTP로 페이지를 가져옵니다. HTML이 아니거나 실패하면 None."""
+    try:
+        response = fetch_url(url)
+    except requests.RequestException as e:
+        print(f">>> HTTP 요청 실패, 브라우저로 재시도합니다: {e}")
+        return None
+    if "html" not in (response.content_type or "html").lower():
+        return None
+    return response
+
+
+class BrowserPool:
+    """
+    헤드리스 Chrome 인스턴스를 띄워 둔 채 여러 도구 호출이 돌려 쓰는 풀.
+    브라우저는 처음 필요할 때 만들어지고, 프로세스 종료 시(atexit) 모두 종료됩니다.
+    """
+    def __init__(self, size: int = 2, acquire_timeout: float = BROWSER_ACQUIRE_TIMEOUT):
+        self.size = size
+        self.acquire_timeout = acquire_timeout
+        # 마지막에 반납된 브라우저부터 다시 씁니다 (LIFO). _created는 대여 중인 브라우저까지 포함한 수입니다.
+        self._idle: List = []
+        self._created = 0
+        self._cond = threading.Condition()
+        self._closed = False
+
+    def _create_driver(self):
+        # selenium/Chrome은 정적 페이지만 다룰 때는 필요 없으므로 실제로 브라우저가 필요할 때 불러옵니다.
+        from selenium import webdriver
+        options = webdriver.ChromeOptions()
+        options.add_argument("--headless=new")
+        options.add_argument("--no-sandbox")
+        options.add_argument("--disable-dev-shm-usage")
+        options.add_argument("--disable-gpu")
+        options.add_argument(f"--user-agent={USER_AGENT}")
+        options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
+        # DOMContentLoaded까지만 기다리고, 나머지는 아래의 조건 기반 대기로 처리합니다.
+        options.page_load_strategy = "eager"
+        driver = webdriver.Chrome(options=options)
+        driver.set_page_load_timeout(BROWSER_PAGE_LOAD_TIMEOUT)
+        driver._pages_served = 0
+        return driver
+
+    def _checkout(self):
+        """쉬는 브라우저를 꺼내거나, 빈 자리가 있으면 새로 만듭니다. 둘 다 안 되면 반납/폐기 알림을 기다립니다."""
+        deadline = time.monotonic() + self.acquire_timeout
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("브라우저 풀이 이미 종료되었습니다.")
+                if self._idle:
+                    return self._idle.pop()
+                if self._created < self.size:
+                    # 자리를 먼저 예약하고, 브라우저는 락 밖에서 띄웁니다.
+                    self._created += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(f"{self.acquire_timeout:g}초 동안 사용할 수 있는 브라우저가 없습니다.")
+                self._cond.wait(remaining)
+        try:
+            return self._create_driver()
+        except Exception:
+            self._release_slot()
+            raise
+
+    @contextmanager
+    def acquire(self):
+        driver = self._checkout()
+        healthy = True
+        try:
+            yield driver
+        except Exception:
+            # 타임아웃 등으로 상태를 알 수 없는 브라우저는 다시 쓰지 않습니다.
+            healthy = False
+            raise
+        finally:
+            driver._pages_served += 1
+            if healthy and driver._pages_served < BROWSER_MAX_PAGES:
+                with self._cond:
+                    if not self._closed:
+                        self._idle.append(driver)
+                        self._cond.notify()
+                        driver = None
+            if driver is not None:
+                self._discard(driver)
+
+    def _release_slot(self):
+        # 자리가 비었음을 알려, 기다리던 쪽이 새 브라우저를 만들 수 있게 합니다.
+        with self._cond:
+            self._created -= 1
+            self._cond.notify()
+
+    def _discard(self, driver):
+        self._release_slot()
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def shutdown(self):
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._cond.notify_all()
+        for driver in idle:
+            self._discard(driver)
+
+
+_browser_pool: Optional[BrowserPool] = None
+_browser_pool_lock = threading.Lock()
+
+
+def get_browser_pool() -> BrowserPool:
+    global _browser_pool
+    if _browser_pool is None:
+        with _browser_pool_lock:
+            if _browser_pool is None:
+                _browser_pool = BrowserPool(size=int(os.getenv("SCRAPER_BROWSER_POOL_SIZE", 2)))
+                atexit.register(_browser_pool.shutdown)
+    return _browser_pool
+
+
+def _wait_for_render(driver):
+    """document.readyState가 complete가 되고 본문 길이가 더 이상 늘지 않을 때까지 기다립니다 (고정 sleep 대체)."""
+    from selenium.webdriver.support.ui import WebDriverWait
+    try:
+        WebDriverWait(driver, RENDER_MAX_WAIT_SECONDS, poll_frequency=RENDER_POLL_SECONDS).until(
+            lambda d: d.execute_script("return document.readyState") == "complete"
+        )
+    except Exception:
+        pass
+    deadline = time.monotonic() + RENDER_MAX_WAIT_SECONDS
+    last_length, stable = -1, 0
+    while time.monotonic() < deadline and stable < RENDER_STABLE_CHECKS:
+        length = driver.execute_script("return document.body ? document.body.innerText.length : 0")
+        stable = stable + 1 if length == last_length and length > 0 else 0
+        last_length = length
+        time.sleep(RENDER_POLL_SECONDS)
+
+
+def render_with_browser(url: str) -> Tuple[str, str]:
+    with get_browser_pool().acquire() as driver:
+        driver.get(url)
+        _wait_for_render(driver)
+        return driver.page_source, driver.current_url
+
+
+def fetch_page_html(url: str) -> Tuple[str, str, str]:
+    """
+    페이지 HTML을 가져옵니다. 먼저 HTTP로 받아 내용이 충분하면 그대로 쓰고,
+    자바스크립트 렌더링이 필요해 보이면 풀의 브라우저로 다시 엽니다. (html, 최종 URL, 사용한 방법)을 반환합니다.
+    """
+    return _fetch_page_html(url, fetch_static(url))
+
+
+def _fetch_page_html(url: str, static: Optional[CachedResponse]) -> Tuple[str, str, str]:
+    start = time.perf_counter()
+    if static is not None and not needs_javascript(static.text):
+        print(f">>> HTTP로 페이지를 가져왔습니다{' (HTTP 캐시)' if static.from_cache else ''}")
+        return static.text, static.url, "http"
+    try:
+        html, final_url = render_with_browser(url)
+    except Exception as e:
+        if static is None:
+            raise
+        # 브라우저를 쓸 수 없으면 정적 HTML이라도 사용합니다.
+        print(f">>> 브라우저 렌더링 실패, 정적 HTML을 사용합니다: {e}")
+        return static.text, static.url, "http"
+    print(f">>> 브라우저로 페이지를 렌더링했습니다 ({time.perf_counter() - start:.2f}초)")
+    return html, final_url, "browser"
+
+
+# 추출 방식이 바뀌면 버전을 올려 이전에 저장된 추출 결과를 쓰지 않도록 합니다.
+PAGE_EXTRACTOR = "page:v2"
+# 브라우저로 렌더링한 결과는 정적 HTML(빈 껍데기일 수 있음)이 그대로여도 내용이 바뀔 수 있어 따로, 신선 기간 동안만 저장합니다.
+BROWSER_PAGE_EXTRACTOR = PAGE_EXTRACTOR + ":browser"
+
+
+class ScrapedPage(BaseModel):
+    url: str
+    main_text: str
+    pdf_links: List[Tuple[str, str]]
+    method: str
+    from_cache: bool = False
+
+
+def extract_page(html: str, page_url: str, method: str) -> ScrapedPage:
+    """
+    페이지 본문 텍스트와 PDF 링크((링크 텍스트, 절대 URL) 목록)를 추출합니다.
+    PDF 링크는 메뉴나 사이드바에 있을 수도 있으므로 본문 추출(반복 요소 제거) 전에 페이지 전체에서 찾습니다.
+    """
+    soup = BeautifulSoup(html, 'html.parser')
+    pdf_links = [
+        (link.get_text(strip=True), urljoin(page_url, link['href']))
+        for link in soup.find_all('a', href=lambda href: href and href.lower().endswith('.pdf'))
+    ]
+    main_text = extract_main_text(soup)
+    return ScrapedPage(url=page_url, main_text=main_text, pdf_links=pdf_links, method=method)
+
+
+def scrape_page(url: str) -> ScrapedPage:
+    """
+    페이지를 가져와 본문과 PDF 링크를 추출합니다. HTTP 캐시에 같은 본문(해시)에서 추출한 결과가 있으면
+    HTML 파싱과 브라우저 렌더링을 모두 건너뜁니다. 브라우저로 렌더링한 결과는 정적 HTML이 같더라도
+    HTTP 캐시의 신선 기간(HTTP_CACHE_FRESH_SECONDS)이 지나면 다시 렌더링합니다.
+    """
+    static = fetch_static(url)
+    http_cache = get_registry().get_http_cache()
+    if static is not None and http_cache is not None:
+        cached = http_cache.get_text(url, PAGE_EXTRACTOR, static.body_hash)
+        if cached is None:
+            cached = http_cache.get_text(url, BROWSER_PAGE_EXTRACTOR, static.body_hash, max_age=http_cache.fresh_seconds)
+        if cached is not None:
+            print(">>> 저장된 페이지 추출 결과를 사용합니다.")
+            page = ScrapedPage.model_validate_json(cached)
+            page.from_cache = True
+            return page
+    html, page_url, method = _fetch_page_html(url, static)
+    page = extract_page(html, page_url, method)
+    if static is not None and http_cache is not None:
+        extractor = BROWSER_PAGE_EXTRACTOR if page.method == "browser" else PAGE_EXTRACTOR
+        http_cache.put_text(url, extractor, page.model_dump_json(), static.body_hash)
+    return page
+
+
+# --- 첨부 PDF 다운로드 ---
+PDF_DOWNLOAD_TIMEOUT = 20
+PDF_MAX_BYTES = int(os.getenv("SCRAPER_PDF_MAX_BYTES", 15 * 1024 * 1024))
+PDF_MAX_PAGES = int(os.getenv("SCRAPER_PDF_MAX_PAGES", 30))
+
+_pdf_executor = None
+_pdf_executor_lock = threading.Lock()
+
+
+class PdfAttachment(BaseModel):
+    title: str
+    url: str
+    text: str = ""
+    error: Optional[str] = None
+    pages_read: int = 0
+    bytes_read: int = 0
+    from_cache: bool = False
+    download_seconds: float = 0.0
+    extract_seconds: float = 0.0
+
+
+def _get_pdf_executor() -> ThreadPoolExecutor:
+    global _pdf_executor
+    if _pdf_executor is None:
+        with _pdf_executor_lock:
+            if _pdf_executor is None:
+                _pdf_executor = ThreadPoolExecutor(max_workers=int(os.getenv("SCRAPER_PDF_WORKERS", 4)), thread_name_prefix="pdf")
+    return _pdf_executor
+
+
+def _extract_pdf_text(data: bytes, char_budget: int, max_pages: int) -> Tuple[str, int, bool]:
+    """
+    앞쪽 페이지부터 읽다가 char_budget 글자를 채우면 나머지 페이지는 파싱하지 않습니다.
+    (텍스트, 읽은 쪽수, 예산 때문에 중간에 멈추지 않았는지)를 반환합니다.
+    """
+    parts, total, pages = [], 0, 0
+    with fitz.open(stream=data, filetype="pdf") as pdf_doc:
+        for page in pdf_doc:
+            if pages >= max_pages or total >= char_budget:
+                break
+            text = page.get_text()
+            parts.append(text)
+            total += len(text)
+            pages += 1
+    complete = total < char_budget
+    return "".join(parts)[:char_budget], pages, complete
+
+
+def _fetch_attachment(attachment: PdfAttachment, char_budget: int) -> PdfAttachment:
+    try:
+        start = time.perf_counter()
+        response = fetch_url(attachment.url, PDF_DOWNLOAD_TIMEOUT, max_bytes=PDF_MAX_BYTES)
+        attachment.bytes_read = len(response.content)
+        attachment.from_cache = response.from_cache
+        attachment.download_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        http_cache = get_registry().get_http_cache()
+        extractor = f"pdf:{PDF_MAX_PAGES}"
+        cached = http_cache.get_text(attachment.url, extractor, response.body_hash) if http_cache is not None else None
+        if cached is not None:
+            cached = json.loads(cached)
+            # 이전 추출이 더 작은 예산에서 중간에 멈춘 것이라면 다시 추출합니다.
+            if not cached["complete"] and len(cached["text"]) < char_budget:
+                cached = None
+        if cached is not None:
+            attachment.text, attachment.pages_read = cached["text"][:char_budget], cached["pages"]
+        else:
+            text, attachment.pages_read, complete = _extract_pdf_text(response.content, char_budget, PDF_MAX_PAGES)
+            attachment.text = text
+            if http_cache is not None:
+                http_cache.put_text(
+                    attachment.url, extractor,
+                    json.dumps({"text": text, "pages": attachment.pages_read, "complete": complete}, ensure_ascii=False),
+                    response.body_hash,
+                )
+        attachment.extract_seconds = time.perf_counter() - start
+    except Exception as e:
+        attachment.error = str(e)
+    return attachment
+
+
+def fetch_pdf_attachments(links: List[Tuple[str, str]], char_budget: int) -> List[PdfAttachment]:
+    """
+    (링크 텍스트, URL) 목록의 PDF를 제한된 개수의 스레드로 동시에 내려받아 텍스트를 추출합니다.
+    결과는 링크 순서대로 char_budget 글자까지만 모으며, 예산이 차면 아직 시작하지 않은 다운로드는 취소합니다.
+    """
+    if char_budget <= 0 or not links:
+        return []
+    executor = _get_pdf_executor()
+    futures = [executor.submit(_fetch_attachment, PdfAttachment(title=title, url=url), char_budget) for title, url in links]
+    results: List[PdfAttachment] = []
+    remaining = char_budget
+    for i, future in enumerate(futures):
+        attachment = future.result()
+        attachment.text = attachment.text[:remaining]
+        remaining -= len(attachment.text)
+        results.append(attachment)
+        if attachment.error:
+            print(f">>> PDF '{attachment.title}' 처리 실패: {attachment.error}")
+        else:
+            print(
+                f">>> PDF '{attachment.title}' 텍스트 추출 성공: {attachment.pages_read}쪽, {attachment.bytes_read // 1024}KB "
+                f"(다운로드 {attachment.download_seconds:.2f}초{', 캐시' if attachment.from_cache else ''}, 추출 {attachment.extract_seconds:.2f}초)"
+            )
+        if remaining <= 0:
+            cancelled = sum(f.cancel() for f in futures[i + 1:])
+            if cancelled:
+                print(f">>> 출력 한도에 도달해 남은 PDF {cancelled}개는 건너뜁니다.")
+            break
+    return results